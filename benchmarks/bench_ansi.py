@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+"""
+    Measures the throughput of converting a synthetic log, with ANSI color
+    sequences as written by cij.emph() etc., to HTML, cij.reporter.ansi_to_html
+    compared to converting it line by line with a regex substitution
+"""
+from __future__ import print_function
+import argparse
+import resource
+import time
+import sys
+import os
+import re
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.sep.join([ROOT, "modules"]))
+
+import cij.reporter     # pylint: disable=wrong-import-position
+import cij              # pylint: disable=wrong-import-position
+
+CHUNK = 1024 * 1024
+
+LINE_SEQ = re.compile(r"\x1b\[([0-9;]*)([A-Za-z])")
+
+
+def log_block():
+    """@returns a CHUNK of log, colored lines of cij.emph() etc. and output"""
+
+    lines = []
+    size = 0
+    idx = 0
+    while size < CHUNK:
+        if idx % 4 == 0:
+            line = "%s# [2020-01-01 00:00:%02d] cij.cmd: 'ls -l /tmp'%s\n" % (
+                [cij.PR_EMPH_CC, cij.PR_GOOD_CC, cij.PR_WARN_CC,
+                 cij.PR_ERR_CC][idx % 16 // 4], idx % 60, cij.PR_NC
+            )
+        else:
+            line = "-rw-r--r-- 1 root %6d Jan  1 00:00 <file_%d> & co\n" % (
+                idx, idx
+            )
+        lines.append(line)
+        size += len(line)
+        idx += 1
+
+    return "".join(lines)[:CHUNK]
+
+
+def log_chunks(size):
+    """Generates 'size' bytes of log in chunks"""
+
+    block = log_block()
+    for _ in range(size // CHUNK):
+        yield block
+
+
+def line_sub(match):
+    """Returns the HTML of a matched sequence, without regard to state"""
+
+    if match.group(2) != "m":
+        return ""
+    if match.group(1) in ["", "0"]:
+        return "</span>"
+
+    return '<span class="ansi%s">' % match.group(1).split(";")[-1]
+
+
+def lines_to_html(chunks):
+    """Generates the HTML of the chunks, a line at a time, with re.sub()"""
+
+    for chunk in chunks:
+        for line in chunk.splitlines(True):
+            line = line.replace("&", "&amp;").replace("<", "&lt;").replace(
+                ">", "&gt;"
+            )
+            yield LINE_SEQ.sub(line_sub, line)
+
+
+def bench(convert, size):
+    """@returns wall-clock in seconds and bytes of HTML of converting"""
+
+    bgn = time.time()
+    produced = 0
+    for html in convert(log_chunks(size)):
+        produced += len(html)
+
+    return time.time() - bgn, produced
+
+
+def main():
+    """Parse arguments and run the benchmark for each converter"""
+
+    prsr = argparse.ArgumentParser(description=__doc__)
+    prsr.add_argument(
+        "--size", type=int, default=1024, help="MiB of synthetic log"
+    )
+    args = prsr.parse_args()
+
+    for name, convert in [
+            ("lines", lines_to_html),
+            ("cij", cij.reporter.ansi_to_html)
+    ]:
+        wallc, produced = bench(convert, args.size * CHUNK)
+
+        print("ansi: %-6s log: %5d MiB, html: %6.1f MiB, wallc: %7.3f s, "
+              "%6.1f MiB/s, maxrss: %d KiB" % (
+                  name, args.size, produced / float(CHUNK), wallc,
+                  args.size / wallc,
+                  resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+              ))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+"""
+    Measures the wall-clock and peak memory of cij.runner.trun_to_junitfile()
+    on a synthetic trun, compared to the former xml.dom.minidom implementation
+"""
+from __future__ import print_function
+from xml.dom import minidom
+import argparse
+import tempfile
+import shutil
+import time
+import sys
+import os
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.sep.join([ROOT, "modules"]))
+
+import cij.runner   # pylint: disable=wrong-import-position
+
+
+def trun_synthetic(output, ntcases, nsuites):
+    """@returns a trun with 'ntcases' spread over 'nsuites', every 10th fails"""
+
+    trun = {
+        "conf": {"OUTPUT": output},
+        "stamp": {"begin": 1000, "end": 5000},
+        "testsuites": []
+    }
+    for sid in range(nsuites):
+        tsuite = {
+            "name": "suite%d" % sid,
+            "ident": "suite%d_%d" % (sid, sid),
+            "testcases": []
+        }
+        for tid in range(ntcases // nsuites):
+            tsuite["testcases"].append({
+                "name": "tcase_%d" % tid,
+                "ident": "%s/tcase_%d.sh" % (tsuite["ident"], tid),
+                "wallc": 1.5,
+                "rcode": 1 if tid % 10 == 0 else 0,
+                "status": "FAIL" if tid % 10 == 0 else "PASS",
+                "log_fpath": os.sep.join([output, "run.log"])
+            })
+        trun["testsuites"].append(tsuite)
+
+    return trun
+
+
+def trun_to_junitfile_minidom(trun, fpath):
+    """The former implementation, building a DOM, for comparison"""
+
+    doc = minidom.Document()
+    doc_testsuites = doc.createElement('testsuites')
+    doc_testsuites.setAttribute("duration", str(4000))
+    doc.appendChild(doc_testsuites)
+
+    for tsuite in trun["testsuites"]:
+        doc_tsuite = doc.createElement("testsuite")
+        doc_tsuite.setAttribute("name", tsuite["name"])
+        doc_tsuite.setAttribute("package", tsuite["ident"])
+        doc_tsuite.setAttribute("tests", str(len(tsuite["testcases"])))
+
+        nfailures = 0
+        wallc_total = 0.0
+        for tcase in tsuite["testcases"]:
+            wallc_total += tcase["wallc"]
+
+            doc_tcase = doc.createElement("testcase")
+            doc_tcase.setAttribute("name", str(tcase["name"]))
+            doc_tcase.setAttribute("classname", str(tcase["ident"]))
+            doc_tcase.setAttribute("time", "%0.3f" % tcase["wallc"])
+            if tcase["rcode"] != 0:
+                nfailures += 1
+                doc_failure = doc.createElement("failure")
+                doc_failure.setAttribute("message", "test failed")
+                doc_tcase.appendChild(doc_failure)
+
+            doc_tsuite.appendChild(doc_tcase)
+
+        doc_tsuite.setAttribute("failures", str(nfailures))
+        doc_tsuite.setAttribute("time", "%0.3f" % wallc_total)
+        doc_testsuites.appendChild(doc_tsuite)
+
+    with open(fpath, "w") as junit:
+        junit.write(doc.toprettyxml(indent="  "))
+
+    return 0
+
+
+def bench(func):
+    """@returns wall-clock in seconds and peak memory in bytes of func()"""
+
+    if tracemalloc:
+        tracemalloc.start()
+
+    bgn = time.time()
+    if func():
+        return None, None
+    wallc = time.time() - bgn
+
+    peak = None
+    if tracemalloc:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return wallc, peak
+
+
+def main():
+    """Parse arguments and run the benchmark for each writer"""
+
+    prsr = argparse.ArgumentParser(description=__doc__)
+    prsr.add_argument("--tcases", type=int, default=10000, help="testcases")
+    prsr.add_argument("--tsuites", type=int, default=100, help="testsuites")
+    prsr.add_argument(
+        "--system-out", type=int, default=4096,
+        help="bytes of log embedded for failed testcases by the stream writer"
+    )
+    args = prsr.parse_args()
+
+    tmpd = tempfile.mkdtemp(prefix="cij_bench_")
+    try:
+        with open(os.sep.join([tmpd, "run.log"]), "w") as log:
+            log.write("# some output of the testcase\n" * 1000)
+
+        trun = trun_synthetic(tmpd, args.tcases, args.tsuites)
+        fpath = os.sep.join([tmpd, "trun.xml"])
+
+        writers = [
+            ("minidom", lambda: trun_to_junitfile_minidom(trun, fpath)),
+            ("stream", lambda: cij.runner.trun_to_junitfile(trun, fpath)),
+            ("stream+system-out", lambda: cij.runner.trun_to_junitfile(
+                trun, fpath, args.system_out
+            ))
+        ]
+        for name, func in writers:
+            wallc, peak = bench(func)
+            if wallc is None:
+                print("writer: %s failed" % name)
+                return 1
+
+            print("writer: %-18s tcases: %d, wallc: %7.3f s, peak: %s" % (
+                name, args.tcases, wallc,
+                "%.1f KiB" % (peak / 1024.0) if peak else "n/a"
+            ))
+    finally:
+        shutil.rmtree(tmpd)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+"""
+    Measures the per-script overhead of cij.runner.script_run() for each of the
+    runner executors, using a script that does nothing but exit
+"""
+from __future__ import print_function
+import argparse
+import tempfile
+import shutil
+import time
+import sys
+import os
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.sep.join([ROOT, "modules"]))
+os.environ["PATH"] = os.pathsep.join([
+    os.sep.join([ROOT, "bin"]), os.environ.get("PATH", "")
+])
+
+import cij.runner   # pylint: disable=wrong-import-position
+
+
+def bench(executor, count, tmpd):
+    """@returns the average wall-clock, in seconds, of running a no-op script"""
+
+    output = os.sep.join([tmpd, executor])
+    os.makedirs(output)
+
+    env_fpath = os.sep.join([output, "env.sh"])
+    with open(env_fpath, "w") as env_file:
+        env_file.write("export SSH_HOST=localhost\n")
+
+    script_fpath = os.sep.join([output, "noop.sh"])
+    with open(script_fpath, "w") as script_file:
+        script_file.write("exit 0\n")
+
+    trun = {
+        "conf": {
+            "VERBOSE": 0,
+            "OUTPUT": output,
+            "ENV_FPATH": env_fpath,
+            "EXECUTOR": executor
+        }
+    }
+    script = {
+        "fpath": script_fpath,
+        "res_root": output,
+        "log_fpath": os.sep.join([output, "noop.log"]),
+        "evars": {"FOO": 42},
+        "rcode": None,
+        "wallc": None
+    }
+
+    cij.runner.script_run(trun, script)     # Warm-up e.g. start the bashd
+
+    bgn = time.time()
+    for _ in range(count):
+        if cij.runner.script_run(trun, script):
+            print("script failed, see: %r" % script["log_fpath"])
+            return None
+    wallc = time.time() - bgn
+
+    cij.runner.bashd_stop_all()
+
+    return wallc / count
+
+
+def main():
+    """Parse arguments and run the benchmark for each executor"""
+
+    prsr = argparse.ArgumentParser(description=__doc__)
+    prsr.add_argument("--count", type=int, default=50, help="scripts to run")
+    args = prsr.parse_args()
+
+    tmpd = tempfile.mkdtemp(prefix="cij_bench_")
+    try:
+        for executor in cij.runner.EXECUTORS:
+            wallc = bench(executor, args.count, tmpd)
+            if wallc is None:
+                return 1
+
+            print("executor: %-6s count: %d, per-script: %7.2f ms" % (
+                executor, args.count, wallc * 1000
+            ))
+    finally:
+        shutil.rmtree(tmpd)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
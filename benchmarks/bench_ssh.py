@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+"""
+    Measures the commands per second of cij.ssh.command() and cij.ssh.push()
+    against an SSH server, e.g. a local sshd, each connecting anew compared to
+    multiplexed over a single connection, as set up by the runner for a trun
+"""
+from __future__ import print_function
+import argparse
+import tempfile
+import time
+import sys
+import os
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.sep.join([ROOT, "modules"]))
+
+import cij.ssh      # pylint: disable=wrong-import-position
+import cij          # pylint: disable=wrong-import-position
+
+
+def bench(func, count):
+    """@returns calls per second of 'count' calls of func(), None on error"""
+
+    bgn = time.time()
+    for _ in range(count):
+        if func():
+            return None
+
+    return count / (time.time() - bgn)
+
+
+def main():
+    """Parse arguments and run the benchmark without and with multiplexing"""
+
+    prsr = argparse.ArgumentParser(description=__doc__)
+    prsr.add_argument("--host", default="localhost", help="SSH_HOST")
+    prsr.add_argument("--user", default="root", help="SSH_USER")
+    prsr.add_argument("--port", default="22", help="SSH_PORT")
+    prsr.add_argument("--key", help="SSH_KEY")
+    prsr.add_argument("--count", type=int, default=50, help="calls of each")
+    args = prsr.parse_args()
+
+    cij.ENV["SSH_HOST"] = args.host
+    cij.ENV["SSH_USER"] = args.user
+    cij.ENV["SSH_PORT"] = args.port
+    cij.ENV["SSH_CMD_TIME"] = "0"
+    if args.key:
+        cij.ENV["SSH_KEY"] = args.key
+    cij.ENV.pop("SSH_CONTROL_PATH", None)
+
+    src = tempfile.NamedTemporaryFile(prefix="cij_bench_")
+    src.write(b"x" * 4096)
+    src.flush()
+
+    ops = [
+        ("command", lambda: cij.ssh.command(["true"], echo=False)[0]),
+        ("push", lambda: cij.ssh.push(src.name, "/tmp/cij_bench_push")[0])
+    ]
+
+    for name, mux in [("connect", False), ("mux", True)]:
+        dpath = cij.ssh.control_start() if mux else None
+        try:
+            for op_name, func in ops:
+                rate = bench(func, args.count)
+                if rate is None:
+                    cij.err("ssh: %s %s failed, is the server reachable?" % (
+                        name, op_name
+                    ))
+                    return 1
+
+                print("ssh: %-8s %-8s count: %4d, %7.1f calls/s" % (
+                    name, op_name, args.count, rate
+                ))
+        finally:
+            if dpath:
+                cij.ssh.control_stop(dpath)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+"""
+    Measures the wall-clock of dumping and loading a trun.yml of synthetic
+    truns, with cij.yml compared to the pure-Python PyYAML Dumper and Loader
+"""
+from __future__ import print_function
+import argparse
+import tempfile
+import shutil
+import time
+import sys
+import os
+import yaml
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.sep.join([ROOT, "modules"]))
+
+import cij.yml      # pylint: disable=wrong-import-position
+
+
+def tcase_synthetic(output, tsuite, tid):
+    """@returns a tcase as persisted by the runner, every 10th fails"""
+
+    ident = "%s/tcase_%d.sh" % (tsuite["ident"], tid)
+    res_root = os.sep.join([output, ident])
+
+    return {
+        "ident": ident,
+        "name": "tcase_%d" % tid,
+        "fname": "tcase_%d.sh" % tid,
+        "fpath": os.sep.join([res_root, "tcase_%d.sh" % tid]),
+        "fpath_orig": "/opt/cijoe/testcases/tcase_%d.sh" % tid,
+        "res_root": res_root,
+        "aux_root": os.sep.join([res_root, "_aux"]),
+        "aux_list": [],
+        "log_fpath": os.sep.join([res_root, "run.log"]),
+        "hooks": {"enter": [], "exit": []},
+        "evars": {"TESTCASE_NAME": "tcase_%d" % tid},
+        "status": "FAIL" if tid % 10 == 0 else "PASS",
+        "rcode": 1 if tid % 10 == 0 else 0,
+        "wallc": 1.5 + tid % 7,
+        "rusage": {"utime": 0.12, "stime": 0.03, "maxrss": 4096},
+        "stamp": {"begin": 1000.0 + tid, "end": 1001.5 + tid},
+        "cached": None,
+        "timeout": None,
+        "timedout": False,
+        "retries": 0,
+        "attempts": 1
+    }
+
+
+def trun_synthetic(output, ntcases, nsuites):
+    """@returns a trun with 'ntcases' spread over 'nsuites'"""
+
+    trun = {
+        "ver": "0.0.38",
+        "conf": {"OUTPUT": output, "TESTPLAN_NAME": "synthetic"},
+        "evars": {"SSH_HOST": "localhost"},
+        "progress": {"PASS": 0, "FAIL": 0, "UNKN": 0},
+        "stamp": {"begin": 1000, "end": 5000},
+        "hooks": {"enter": [], "exit": []},
+        "status": "FAIL",
+        "testsuites": []
+    }
+    for sid in range(nsuites):
+        tsuite = {
+            "name": "suite%d" % sid,
+            "ident": "suite%d_%d" % (sid, sid),
+            "res_root": os.sep.join([output, "suite%d_%d" % (sid, sid)]),
+            "status": "FAIL",
+            "testcases": []
+        }
+        for tid in range(ntcases // nsuites):
+            tsuite["testcases"].append(tcase_synthetic(output, tsuite, tid))
+        trun["testsuites"].append(tsuite)
+
+    return trun
+
+
+def python_dump(trun, fpath):
+    """Dump as cij.runner.trun_to_file() did, with the pure-Python Dumper"""
+
+    with open(fpath, "w") as yml_file:
+        yml_file.write(yaml.dump(
+            trun, explicit_start=True, default_flow_style=False
+        ))
+
+
+def python_load(fpath):
+    """Load as cij.runner.trun_from_file() did, with the pure-Python Loader"""
+
+    with open(fpath, "r") as yml_file:
+        return yaml.safe_load(yml_file)
+
+
+def cij_dump(trun, fpath):
+    """Dump as cij.runner.trun_to_file() does"""
+
+    with open(fpath, "w") as yml_file:
+        cij.yml.dump(
+            trun, yml_file, explicit_start=True, default_flow_style=False
+        )
+
+
+def cij_load(fpath):
+    """Load as cij.runner.trun_from_file() does"""
+
+    with open(fpath, "r") as yml_file:
+        return cij.yml.load(yml_file)
+
+
+def bench(func, *args):
+    """@returns wall-clock in seconds of func(*args)"""
+
+    bgn = time.time()
+    func(*args)
+
+    return time.time() - bgn
+
+
+def main():
+    """Parse arguments and run the benchmark for each trun size"""
+
+    prsr = argparse.ArgumentParser(description=__doc__)
+    prsr.add_argument(
+        "--tcases", default="1000,10000,50000",
+        help="comma-separated list of testcase counts, a trun per count"
+    )
+    prsr.add_argument("--tsuites", type=int, default=100, help="testsuites")
+    args = prsr.parse_args()
+
+    print("cij.yml: libyaml: %r" % cij.yml.LIBYAML)
+
+    tmpd = tempfile.mkdtemp(prefix="cij_bench_")
+    try:
+        fpath = os.sep.join([tmpd, "trun.yml"])
+        for ntcases in (int(count) for count in args.tcases.split(",")):
+            trun = trun_synthetic(tmpd, ntcases, args.tsuites)
+
+            for name, dump, load in [
+                    ("python", python_dump, python_load),
+                    ("cij.yml", cij_dump, cij_load)
+            ]:
+                dump_wallc = bench(dump, trun, fpath)
+                load_wallc = bench(load, fpath)
+
+                print("yaml: %-8s tcases: %6d, size: %7.1f MiB, "
+                      "dump: %7.3f s, load: %7.3f s" % (
+                          name, ntcases,
+                          os.path.getsize(fpath) / (1024.0 * 1024.0),
+                          dump_wallc, load_wallc
+                      ))
+    finally:
+        shutil.rmtree(tmpd)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""
+bashd.py    - Persistent and pre-initialized bash process for running scripts
+
+Functions:
+    bashd.start()   - Start a bash process with CIJOE and the given env loaded
+    bashd.run()     - Run a script in a subshell forked from the bash process
+    bashd.times()   - CPU-time of the subshells waited for by the bash process
+    bashd.stop()    - Stop the bash process
+
+The bash process sources 'cijoe.sh' and the env file once. Each script is then
+run in a subshell forked from it, with job-control enabled such that every
+subshell is the leader of its own process-group. Requests are NUL-terminated
+shell-commands written to stdin, responses are lines on stdout:
+
+    pid <PID>       - The subshell is started, PID is also its process-group
+    rcode <RCODE>   - The subshell has exited with RCODE
+
+The subshells are children of the bash process, not of the runner, thus only
+their CPU-time is available, see times(). The remaining rusage of a script,
+max RSS, block I/O and context switches, is recorded as None when it is run
+by bashd.
+"""
+from subprocess import Popen, PIPE
+import os
+try:
+    from shlex import quote
+except ImportError:
+    from pipes import quote
+import cij
+
+BOOT = (
+    'CIJ_ROOT=$(cij_root) && '
+    'source $CIJ_ROOT/modules/cijoe.sh && '
+    'source %s || exit 1; '
+    'set -m; '
+    'exec 3>&1 1>/dev/null 2>&1; '
+    'echo ready >&3; '
+    'while IFS= read -r -d "" req; do '
+    '  eval "$req" & '
+    '  pid=$!; '
+    '  echo "pid $pid" >&3; '
+    '  wait "$pid"; '
+    '  echo "rcode $?" >&3; '
+    'done'
+)
+
+
+def start(env_fpath):
+    """
+    Start a bash process with CIJOE and the env at 'env_fpath' loaded
+
+    @returns the process on success, None otherwise
+    """
+
+    with open(os.devnull, "w") as null:
+        proc = Popen(
+            ["bash", "-c", BOOT % quote(env_fpath)],
+            stdin=PIPE,
+            stdout=PIPE,
+            stderr=null,
+            close_fds=True,
+            universal_newlines=True
+        )
+
+    if proc.stdout.readline().strip() != "ready":
+        cij.err("cij.bashd.start: failed { env_fpath: %r }" % env_fpath)
+        proc.wait()
+        return None
+
+    return proc
+
+
+def request(env_fpath, cwd, log_fpath, evars, cmd):
+    """
+    Returns the shell-command running 'cmd' in a subshell with the given
+    'evars' exported, the env re-sourced, cwd changed to 'cwd' and output
+    appended to 'log_fpath'
+
+    The env is re-sourced after exporting 'evars' such that it has the same
+    precedence over 'evars' as when running the script in a fresh bash
+    """
+
+    exports = " ".join(
+        "export %s=%s;" % (key, quote(str(evars[key]))) for key in evars
+    )
+
+    return "( cd %s || exit 1; exec >> %s 2>&1 < /dev/null; %s " \
+        "source %s; %s )" % (
+        quote(cwd),
+        quote(log_fpath),
+        exports,
+        quote(env_fpath),
+        cmd
+    )
+
+
+def run(proc, req, on_pid=None):
+    """
+    Run the request, as constructed by request(), in a subshell of 'proc',
+    'on_pid' is called with the pid of the subshell once it is started
+
+    @returns the rcode of the subshell
+    """
+
+    proc.stdin.write(req + "\0")
+    proc.stdin.flush()
+
+    resp = proc.stdout.readline().split()
+    if len(resp) != 2 or resp[0] != "pid":
+        cij.err("cij.bashd.run: invalid response: %r" % resp)
+        return 1
+
+    if on_pid:
+        on_pid(int(resp[1]))
+
+    resp = proc.stdout.readline().split()
+    if len(resp) != 2 or resp[0] != "rcode":
+        cij.err("cij.bashd.run: invalid response: %r" % resp)
+        return 1
+
+    return int(resp[1])
+
+
+def times(proc):
+    """
+    Returns the (user, sys) CPU-time, in seconds, accumulated by the subshells
+    that the bash process has waited for, from /proc, None when unavailable
+    """
+
+    try:
+        with open("/proc/%d/stat" % proc.pid, "r") as stat_fd:
+            stat = stat_fd.read()
+    except (IOError, OSError):
+        return None
+
+    fields = stat[stat.rfind(")") + 2:].split()     # Fields after 'comm'
+    ticks = float(os.sysconf("SC_CLK_TCK"))
+
+    return int(fields[13]) / ticks, int(fields[14]) / ticks
+
+
+def stop(proc):
+    """Stop the given bash process, @returns its rcode"""
+
+    proc.stdin.close()
+
+    return proc.wait()
+
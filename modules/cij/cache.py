@@ -0,0 +1,115 @@
+"""
+cache.py    - Content-addressed store of testcase results
+
+Functions:
+    cache.key()     - Hash of the files and evars determining a result
+    cache.inputs()  - The files found at the given input paths
+    cache.lookup()  - Returns a stored result, or None
+    cache.store()   - Store a result
+    cache.clear()   - Remove all stored results
+
+A result is stored as two files in the cache directory, named by the key:
+
+    <key>.yml       - The rcode and wallc of the original run
+    <key>.log       - The output of the original run
+"""
+import hashlib
+import shutil
+import os
+import cij.yml
+import cij
+
+
+def inputs(paths):
+    """
+    Generates (name, fpath) of the files at 'paths', directories are walked in
+    sorted order skipping hidden entries and __pycache__, 'name' is the path
+    of the file relative to the given path it was found in
+    """
+
+    for path in paths:
+        if not os.path.isdir(path):
+            yield os.path.basename(path), path
+            continue
+
+        for root, dnames, fnames in os.walk(path):
+            dnames[:] = sorted(
+                dname for dname in dnames
+                if not dname.startswith(".") and dname != "__pycache__"
+            )
+            for fname in sorted(fnames):
+                if fname.startswith(".") or fname.endswith(".pyc"):
+                    continue
+
+                fpath = os.sep.join([root, fname])
+                yield os.path.relpath(fpath, path), fpath
+
+
+def key(fpaths, evars, input_paths=None):
+    """
+    Returns the hex-digest of the content of the files at 'fpaths' and the
+    given 'evars', the order of 'fpaths' matters, the order of 'evars' not
+
+    The names and content of the files found at 'input_paths', see inputs(),
+    are part of the key as well
+    """
+
+    digest = hashlib.sha256()
+
+    for fpath in fpaths:
+        digest.update(b"\0file\0")
+        with open(fpath, "rb") as cfd:
+            digest.update(cfd.read())
+
+    for name, fpath in inputs(input_paths if input_paths else []):
+        digest.update(("\0input\0%s\0" % name).encode("utf-8"))
+        with open(fpath, "rb") as cfd:
+            digest.update(cfd.read())
+
+    for evar in sorted(evars):
+        digest.update(("\0evar\0%s=%s" % (evar, evars[evar])).encode("utf-8"))
+
+    return digest.hexdigest()
+
+
+def lookup(cache_root, ckey):
+    """
+    Returns the result stored for 'ckey' as a dict with 'rcode', 'wallc' and
+    'log_fpath', None when nothing is stored
+    """
+
+    meta_fpath = os.sep.join([cache_root, "%s.yml" % ckey])
+    log_fpath = os.sep.join([cache_root, "%s.log" % ckey])
+
+    if not (os.path.exists(meta_fpath) and os.path.exists(log_fpath)):
+        return None
+
+    with open(meta_fpath, "r") as meta_fd:
+        result = cij.yml.load(meta_fd)
+
+    result["log_fpath"] = log_fpath
+
+    return result
+
+
+def store(cache_root, ckey, rcode, wallc, log):
+    """Store the given result, 'log' being the output of the run, as bytes"""
+
+    if not os.path.exists(cache_root):
+        os.makedirs(cache_root)
+
+    with open(os.sep.join([cache_root, "%s.log" % ckey]), "wb") as log_fd:
+        log_fd.write(log)
+
+    with open(os.sep.join([cache_root, "%s.yml" % ckey]), "w") as meta_fd:
+        cij.yml.dump({"rcode": rcode, "wallc": wallc}, meta_fd)
+
+
+def clear(cache_root):
+    """Remove all results stored in the cache at 'cache_root'"""
+
+    if not os.path.exists(cache_root):
+        return
+
+    cij.warn("cij.cache.clear: cache_root: %r" % cache_root)
+    shutil.rmtree(cache_root)
@@ -0,0 +1,247 @@
+"""
+events.py   - Live event stream of a test run
+
+Functions:
+    events.start()      - Start publishing events at the given path
+    events.publish()    - Publish an event to all subscribers
+    events.stop()       - Stop publishing and disconnect subscribers
+
+Events are published as newline-delimited JSON on a Unix socket, any number of
+subscribers can connect to it during the run, e.g.:
+
+    socat - UNIX-CONNECT:/tmp/cijoe.sock
+
+When the path is an existing named pipe, events are written to the pipe
+instead, for a single reader which must have opened it before the run starts.
+An existing socket, e.g. left behind by a killed run, is replaced, any other
+existing file at the path is an error and is left untouched.
+
+Each event is an object with the keys:
+
+    ev      - The kind of event, e.g. 'tcase', 'script', 'progress'
+    key     - The ident of the struct the event is about, when any
+    data    - The fields which changed, e.g. 'status', 'rcode', 'eta'
+    stamp   - The time of the event in seconds since the epoch
+
+Events are queued for each subscriber and sent as far as it accepts them
+without blocking, a subscriber is only ever sent whole lines. Subscribers
+which do not keep up, having MAX_PENDING events queued, are disconnected once
+the event in flight is sent, such that a slow subscriber never stalls the
+run. When stopping, the queued events are sent within FLUSH_TIMEOUT.
+"""
+from collections import deque
+import threading
+import select
+import socket
+import errno
+import stat
+import json
+import time
+import os
+import cij
+
+MAX_PENDING = 1024              # Events queued for a subscriber, at most
+FLUSH_TIMEOUT = 5.0             # Seconds to send queued events when stopping
+
+LOCK = threading.Lock()         # Guards SUBSCRIBERS
+SUBSCRIBERS = []                # See subscriber()
+SERVER = {"sock": None, "path": None}
+
+
+def subscriber(conn):
+    """
+    Returns a subscriber of the connected socket, or the pipe file-descriptor,
+    'conn', with its queue of 'lines' to send, the 'offset' sent of the first
+    of them, and whether it is 'slow', that is, to be disconnected
+    """
+
+    return {"conn": conn, "lines": deque(), "offset": 0, "slow": False}
+
+
+def start(path):
+    """Start publishing events at 'path', @returns 0 on success"""
+
+    if os.path.exists(path) and stat.S_ISFIFO(os.stat(path).st_mode):
+        try:
+            SUBSCRIBERS.append(subscriber(
+                os.open(path, os.O_WRONLY | os.O_NONBLOCK)
+            ))
+        except OSError as exc:
+            cij.err("cij.events: no reader of named pipe: %r" % exc)
+            return 1
+
+        return 0
+
+    if os.path.exists(path):
+        if not stat.S_ISSOCK(os.stat(path).st_mode):
+            cij.err("cij.events: path: %r exists, not a socket" % path)
+            return 1
+
+        os.remove(path)                     # Stale socket of a previous run
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.bind(path)
+        sock.listen(8)
+    except socket.error as exc:
+        cij.err("cij.events: failed binding: %r" % exc)
+        sock.close()
+        return 1
+
+    SERVER["sock"] = sock
+    SERVER["path"] = path
+
+    acceptor = threading.Thread(target=accept, args=(sock,))
+    acceptor.daemon = True
+    acceptor.start()
+
+    return 0
+
+
+def accept(sock):
+    """Accept subscribers until the server socket is closed"""
+
+    while True:
+        try:
+            conn, _ = sock.accept()
+        except (socket.error, OSError):
+            return
+
+        conn.setblocking(False)
+        with LOCK:
+            SUBSCRIBERS.append(subscriber(conn))
+
+
+def write(conn, data):
+    """
+    Write what 'conn' accepts of 'data' without blocking
+
+    @returns the number of bytes written, raises socket.error or OSError when
+    'conn' is gone
+    """
+
+    try:
+        if isinstance(conn, int):
+            return os.write(conn, data)
+
+        return conn.send(data)
+    except (socket.error, OSError) as exc:
+        if exc.errno in [errno.EAGAIN, errno.EWOULDBLOCK]:
+            return 0
+        raise
+
+
+def send(sub):
+    """
+    Send the queued lines of the subscriber as far as it accepts them without
+    blocking, @returns False when it is gone
+    """
+
+    lines = sub["lines"]
+    try:
+        while lines:
+            sub["offset"] += write(sub["conn"], lines[0][sub["offset"]:])
+            if sub["offset"] < len(lines[0]):       # Send the rest later
+                break
+
+            lines.popleft()
+            sub["offset"] = 0
+    except (socket.error, OSError):
+        return False
+
+    return True
+
+
+def enqueue(sub, line):
+    """
+    Queue the line for the subscriber, when it has MAX_PENDING lines queued
+    it is marked slow, and all but the line in flight are dropped
+    """
+
+    if sub["slow"]:
+        return
+
+    if len(sub["lines"]) < MAX_PENDING:
+        sub["lines"].append(line)
+        return
+
+    sub["slow"] = True
+    in_flight = sub["lines"][0] if sub["offset"] else None
+    sub["lines"].clear()
+    if in_flight:
+        sub["lines"].append(in_flight)
+
+
+def close(sub):
+    """Disconnect the given subscriber"""
+
+    try:
+        if isinstance(sub["conn"], int):
+            os.close(sub["conn"])
+        else:
+            sub["conn"].close()
+    except (socket.error, OSError):
+        pass
+
+
+def publish(kind, key=None, data=None):
+    """Publish an event to all subscribers, a no-op when there are none"""
+
+    if not SUBSCRIBERS:
+        return
+
+    line = (json.dumps({
+        "ev": kind,
+        "key": key,
+        "data": data,
+        "stamp": time.time()
+    }) + "\n").encode("utf-8")
+
+    with LOCK:
+        for sub in list(SUBSCRIBERS):
+            enqueue(sub, line)
+            if send(sub) and not (sub["slow"] and not sub["lines"]):
+                continue
+
+            if sub["slow"]:
+                cij.warn("cij.events: disconnecting slow subscriber")
+
+            SUBSCRIBERS.remove(sub)
+            close(sub)
+
+
+def flush(sub, deadline):
+    """Send the queued lines of the subscriber, waiting until 'deadline'"""
+
+    while send(sub) and sub["lines"]:
+        left = deadline - time.time()
+        if left <= 0:
+            break
+
+        try:
+            select.select([], [sub["conn"]], [], left)
+        except (select.error, OSError, ValueError):
+            break
+
+
+def stop():
+    """Stop publishing, sending queued events and disconnecting subscribers"""
+
+    deadline = time.time() + FLUSH_TIMEOUT
+    with LOCK:
+        while SUBSCRIBERS:
+            sub = SUBSCRIBERS.pop()
+            flush(sub, deadline)
+            close(sub)
+
+    if SERVER["sock"] is not None:
+        try:                                # Wakes up the acceptor
+            SERVER["sock"].shutdown(socket.SHUT_RDWR)
+        except (socket.error, OSError):
+            pass
+        SERVER["sock"].close()
+        if os.path.exists(SERVER["path"]):
+            os.remove(SERVER["path"])
+
+        SERVER["sock"] = None
+        SERVER["path"] = None
@@ -0,0 +1,362 @@
+"""
+    Historical testcase durations, from previous runs, for scheduling runs
+
+    Durations are read from the output of previous runs, that is, from their
+    trun.yml or run journal, or from a history store. The store is a YAML file
+    mapping testcase idents to their most recent wall-clock durations:
+
+    s1_0/tc_pass_1.sh: [12.3, 11.9, 12.8]
+
+    Estimates are the median of the samples of a testcase ident, falling back
+    to the median of the samples of testcases with the same filename
+
+    For trend analysis across runs, the results of many runs are ingested
+    into an index, a SQLite database, see index_ingest() and index_trends()
+    and the `cij_history` tool
+"""
+from __future__ import print_function
+import hashlib
+import sqlite3
+import os
+import cij.results
+import cij.runner
+import cij.yml
+import cij
+
+STORE_NSAMPLES = 10
+
+
+def samples_from_trun(trun):
+    """Returns {ident: [wallc]} for the completed testcases of 'trun'"""
+
+    samples = {}
+
+    for tsuite in trun.get("testsuites", []):
+        for tcase in tsuite.get("testcases", []):
+            if tcase.get("status") not in ["PASS", "FAIL", "TIMEOUT", "FLAKY"]:
+                continue
+            if tcase.get("wallc") is None:
+                continue
+
+            samples.setdefault(tcase["ident"], []).append(tcase["wallc"])
+
+    return samples
+
+
+def samples_from_path(path):
+    """
+    Returns {ident: [wallc]} from a run output directory or a history store,
+    or None when 'path' is neither
+    """
+
+    if os.path.isdir(path):
+        if not cij.runner.trun_exists(path):
+            return None
+
+        return samples_from_trun(
+            cij.runner.trun_from_file(cij.runner.yml_fpath(path))
+        )
+
+    if not os.path.exists(path):
+        return None
+
+    with open(path, "r") as store_fd:
+        return cij.yml.load(store_fd) or {}
+
+
+def median(values):
+    """Returns the median of the given non-empty list of values"""
+
+    values = sorted(values)
+    mid = len(values) // 2
+
+    if len(values) % 2:
+        return values[mid]
+
+    return (values[mid - 1] + values[mid]) / 2.0
+
+
+def durations_load(paths):
+    """
+    Returns the estimated duration, in seconds, of testcases, keyed by ident
+    as well as by testcase filename, from samples at the given 'paths'
+    """
+
+    samples = {}
+    for path in paths:
+        psamples = samples_from_path(path)
+        if psamples is None:
+            cij.warn("cij.history: no durations at path: %r" % path)
+            continue
+
+        for ident, wallcs in psamples.items():
+            samples.setdefault(ident, []).extend(wallcs)
+
+    fname_samples = {}
+    for ident, wallcs in samples.items():
+        fname_samples.setdefault(ident.split("/")[-1], []).extend(wallcs)
+
+    durations = {}
+    for fname, wallcs in fname_samples.items():
+        durations[fname] = median(wallcs)
+    for ident, wallcs in samples.items():
+        durations[ident] = median(wallcs)
+
+    return durations
+
+
+def estimate(durations, tcase):
+    """
+    Returns the estimated duration of the given tcase, using the average of
+    the per-ident estimates when the tcase has no history, None when nothing
+    is known
+    """
+
+    if tcase["ident"] in durations:
+        return durations[tcase["ident"]]
+
+    if tcase["fname"] in durations:
+        return durations[tcase["fname"]]
+
+    # Idents are "<tsuite>/<fname>", the filename entries are duplicates
+    idents = [wallc for key, wallc in durations.items() if "/" in key]
+    if idents:
+        return sum(idents) / float(len(idents))
+
+    return None
+
+
+def store_update(fpath, trun, nsamples=STORE_NSAMPLES):
+    """Add the durations of the given trun to the history store at 'fpath'"""
+
+    store = {}
+    if os.path.exists(fpath):
+        with open(fpath, "r") as store_fd:
+            store = cij.yml.load(store_fd) or {}
+
+    for ident, wallcs in samples_from_trun(trun).items():
+        store[ident] = (store.get(ident, []) + wallcs)[-nsamples:]
+
+    with open(fpath, "w") as store_fd:
+        cij.yml.dump(store, store_fd, default_flow_style=None)
+
+
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY, digest TEXT UNIQUE, path TEXT,
+    testplan TEXT, env TEXT, status TEXT, stamp_begin REAL, stamp_end REAL
+);
+CREATE TABLE IF NOT EXISTS tcases (
+    run INTEGER, ident TEXT, status TEXT, rcode INTEGER, wallc REAL,
+    PRIMARY KEY (run, ident)
+) WITHOUT ROWID;
+"""
+
+PASSING = ["PASS", "FLAKY"]
+FAILING = ["FAIL", "TIMEOUT"]
+
+
+def index_open(fpath):
+    """Returns a connection to the index at 'fpath', created when missing"""
+
+    conn = sqlite3.connect(fpath)
+    conn.executescript(INDEX_SCHEMA)
+
+    return conn
+
+
+def digest(fpath):
+    """Returns the hex-digest of the content of the file at 'fpath'"""
+
+    sha = hashlib.sha256()
+    with open(fpath, "rb") as dfd:
+        for chunk in iter(lambda: dfd.read(1 << 20), b""):
+            sha.update(chunk)
+
+    return sha.hexdigest()
+
+
+def run_rows(path):
+    """
+    Returns the run and tcase rows of the run output at 'path', read from its
+    trun.db when it has one, its trun.yml otherwise
+    """
+
+    if os.path.exists(cij.results.fpath(path)):
+        conn = sqlite3.connect(cij.results.fpath(path))
+        try:
+            run = conn.execute(
+                "SELECT testplan, env, status, stamp_begin, stamp_end "
+                "FROM trun"
+            ).fetchone()
+            tcases = conn.execute(
+                "SELECT ident, status, rcode, wallc FROM tcases"
+            ).fetchall()
+        finally:
+            conn.close()
+
+        return run, tcases
+
+    trun = cij.runner.trun_from_file(cij.runner.yml_fpath(path))
+    stamp = trun.get("stamp") or {}
+
+    run = (
+        trun["conf"].get("TESTPLAN_NAME"), trun["conf"].get("ENV_NAME"),
+        trun.get("status"), stamp.get("begin"), stamp.get("end")
+    )
+    tcases = [
+        (tc["ident"], tc["status"], tc.get("rcode"), tc.get("wallc"))
+        for ts in trun["testsuites"] for tc in ts["testcases"]
+    ]
+
+    return run, tcases
+
+
+def index_ingest(conn, path):
+    """
+    Ingest the run output at 'path' into the index, runs are identified by the
+    digest of their trun.yml, thus a run already ingested is skipped, as is a
+    run in progress, having no trun.yml yet
+
+    @returns True when the run was ingested
+    """
+
+    yml_fpath = cij.runner.yml_fpath(path)
+    if not os.path.exists(yml_fpath):
+        cij.warn("cij.history: %r, has no trun.yml, skipping" % path)
+        return False
+
+    ydigest = digest(yml_fpath)
+    if conn.execute(
+            "SELECT 1 FROM runs WHERE digest = ?", [ydigest]
+    ).fetchone():
+        return False
+
+    try:
+        run, tcases = run_rows(path)
+    except (sqlite3.Error, cij.yml.YAMLError, KeyError, TypeError) as exc:
+        cij.warn("cij.history: %r, failed reading: %r" % (path, exc))
+        return False
+
+    with conn:
+        run_id = conn.execute(
+            "INSERT INTO runs (digest, path, testplan, env, status, "
+            "stamp_begin, stamp_end) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [ydigest, path] + list(run)
+        ).lastrowid
+        conn.executemany(
+            "INSERT INTO tcases VALUES (?, ?, ?, ?, ?)",
+            ([run_id] + list(tcase) for tcase in tcases)
+        )
+
+    return True
+
+
+def tcase_trend(ident, series, recent, threshold):
+    """
+    Returns the trend of the tcase with the given 'series', a (run, status,
+    wallc) per run, oldest first, for the runs the tcase was part of:
+
+    flaky_rate  - Fraction of runs FLAKY or with an outcome unlike the previous
+    ratio       - Median wallc of the 'recent' runs over that of those before
+    regressed   - True when 'ratio' is 'threshold' or above
+    good, bad   - The run which last passed and the first of the failing runs
+                  following it, when failing in the latest run; the range of
+                  changes to bisect
+    """
+
+    ran = [(run, status, wallc) for run, status, wallc in series
+           if status in PASSING + FAILING]
+
+    flips = sum(
+        (prev[1] in PASSING) != (cur[1] in PASSING)
+        for prev, cur in zip(ran, ran[1:])
+    )
+    flaky = sum(status == "FLAKY" for _, status, _ in ran)
+
+    wallcs = [wallc for _, status, wallc in ran
+              if status in PASSING and wallc is not None]
+    baseline = median(wallcs[:-recent]) if wallcs[:-recent] else None
+    current = median(wallcs[-recent:]) if wallcs[-recent:] else None
+
+    ratio = None
+    if baseline and current is not None:
+        ratio = current / baseline
+
+    good = bad = None
+    if ran and ran[-1][1] in FAILING:
+        bad = ran[-1][0]
+        for run, status, _ in reversed(ran):
+            if status in PASSING:
+                good = run
+                break
+            bad = run
+
+    return {
+        "ident": ident,
+        "runs": len(ran),
+        "fails": sum(status in FAILING for _, status, _ in ran),
+        "flaky_rate": (flaky + flips) / float(len(ran)) if ran else 0.0,
+        "wallc_baseline": baseline,
+        "wallc_recent": current,
+        "ratio": ratio,
+        "regressed": ratio is not None and ratio >= threshold,
+        "good": good,
+        "bad": bad
+    }
+
+
+def index_trends(conn, testplan=None, nruns=30, recent=5, threshold=1.2):
+    """
+    Returns the trends of the testcases in the latest 'nruns' runs in the
+    index, optionally only runs of 'testplan', see tcase_trend():
+
+    {"runs": [{"id", "path", "testplan", "status", "stamp_begin"}, ...],
+     "tcases": [tcase_trend(), ...]}
+
+    The runs are oldest first, the tcases are ordered by those failing in the
+    latest run, then by the regression of their duration and flakiness
+    """
+
+    query = "SELECT id, path, testplan, env, status, stamp_begin FROM runs"
+    params = []
+    if testplan:
+        query += " WHERE testplan = ?"
+        params.append(testplan)
+    query += " ORDER BY stamp_begin DESC, id DESC LIMIT ?"
+    params.append(nruns)
+
+    keys = ["id", "path", "testplan", "env", "status", "stamp_begin"]
+    runs = [
+        dict(zip(keys, row)) for row in conn.execute(query, params)
+    ][::-1]
+    order = dict((run["id"], idx) for idx, run in enumerate(runs))
+
+    results = {}
+    for run_id, ident, status, wallc in conn.execute(
+            "SELECT run, ident, status, wallc FROM tcases WHERE run IN (%s)" %
+            ", ".join(["?"] * len(runs)),
+            list(order)
+    ):
+        results.setdefault(ident, []).append((run_id, status, wallc))
+
+    runs_by_id = dict((run["id"], run) for run in runs)
+    tcases = []
+    for ident, series in results.items():
+        series.sort(key=lambda res: order[res[0]])
+        trend = tcase_trend(ident, series, recent, threshold)
+        statuses = dict((run_id, status) for run_id, status, _ in series)
+        trend["series"] = [statuses.get(run["id"]) for run in runs]
+        trend["good"] = runs_by_id.get(trend["good"])
+        trend["bad"] = runs_by_id.get(trend["bad"])
+        tcases.append(trend)
+
+    tcases.sort(key=lambda trend: (
+        trend["bad"] is None,
+        not trend["regressed"],
+        -(trend["ratio"] or 0.0),
+        -trend["flaky_rate"],
+        trend["ident"]
+    ))
+
+    return {"runs": runs, "tcases": tcases}
@@ -0,0 +1,208 @@
+"""
+merge.py    - Merge the output of the shards of a sharded test run
+
+Functions:
+    merge.tree_merge()      - Merge the files of a shard into the merged output
+    merge.trun_merge()      - Returns the trun merged from the shard truns
+    merge.main()            - Merge shard outputs into trun.yml, trun.xml etc.
+
+Each shard, `cij_runner --shard i/K`, runs its part of the testcases of the
+same testplan, leaving the rest UNKN. A testcase is thus taken from the shard
+which ran it, and a testsuite, entered by several shards, is FAIL when it
+failed in any of them, as is a target of a parallel run. Logs of the trun,
+testsuites and targets, written by every shard entering them, are
+concatenated in the order of the shards.
+"""
+from __future__ import print_function
+import shutil
+import os
+import cij.reporter
+import cij.results
+import cij.runner
+import cij
+
+SKIP_FNAMES = [
+    "trun.yml", "trun.xml", "trun.journal", "trun.db", "report.html"
+]
+
+
+def tree_merge(src, dst):
+    """
+    Merge the files in 'src' into 'dst', "*.log" files are appended to, other
+    files existing in 'dst' are kept as is, the report cache of 'src' is not
+    merged as it is of the shard and not of the merged trun
+    """
+
+    for root, dnames, fnames in os.walk(src):
+        rel = os.path.relpath(root, src)
+        if rel == "." and cij.reporter.CACHE_DNAME in dnames:
+            dnames.remove(cij.reporter.CACHE_DNAME)
+
+        dst_root = os.path.normpath(os.sep.join([dst, rel]))
+        if not os.path.exists(dst_root):
+            os.makedirs(dst_root)
+
+        for fname in fnames:
+            if rel == "." and fname in SKIP_FNAMES:
+                continue
+
+            src_fpath = os.sep.join([root, fname])
+            dst_fpath = os.sep.join([dst_root, fname])
+
+            if not os.path.exists(dst_fpath):
+                shutil.copy2(src_fpath, dst_fpath)
+            elif fname.endswith(".log"):
+                with open(src_fpath, "rb") as src_fd, \
+                        open(dst_fpath, "ab") as dst_fd:
+                    shutil.copyfileobj(src_fd, dst_fd)
+
+
+def stamp_merge(stamps):
+    """Returns the stamp spanning the given stamps"""
+
+    begins = [stmp["begin"] for stmp in stamps if stmp and stmp.get("begin")]
+    ends = [stmp["end"] for stmp in stamps if stmp and stmp.get("end")]
+
+    return {
+        "begin": min(begins) if begins else None,
+        "end": max(ends) if ends else None
+    }
+
+
+def status_merge(statuses):
+    """
+    Returns the most severe of the given statuses, in the order: FAIL,
+    TIMEOUT, FLAKY and PASS, UNKN when none of them
+    """
+
+    for status in ["FAIL", "TIMEOUT", "FLAKY", "PASS"]:
+        if status in statuses:
+            return status
+
+    return "UNKN"
+
+
+def trun_merge(truns):
+    """
+    Returns the trun merged from the given shard truns, all of the same
+    testplan and rehomed to the merged output, the first trun is modified
+    """
+
+    trun = truns[0]
+
+    for tsuite_idx, tsuite in enumerate(trun["testsuites"]):
+        tsuites = [tr["testsuites"][tsuite_idx] for tr in truns]
+
+        ran = [ts for ts in tsuites if (ts.get("stamp") or {}).get("begin")]
+        if ran and ran[0] is not tsuite:            # Hooks of a shard entering
+            tsuite["hooks"] = ran[0]["hooks"]
+            tsuite["worker"] = ran[0].get("worker")
+
+        tsuite["status"] = status_merge([ts["status"] for ts in tsuites])
+        tsuite["stamp"] = stamp_merge([ts.get("stamp") for ts in tsuites])
+        tsuite["aborted"] = any(ts.get("aborted") for ts in tsuites)
+
+        for tcase_idx, tcase in enumerate(tsuite["testcases"]):
+            for shard in tsuites:
+                candidate = shard["testcases"][tcase_idx]
+                if candidate["status"] != "UNKN":
+                    tsuite["testcases"][tcase_idx] = candidate
+                    break
+
+    for target_idx, target in enumerate(trun.get("targets") or []):
+        targets = [
+            tr["targets"][target_idx] for tr in truns
+            if len(tr.get("targets") or []) > target_idx
+        ]
+        target["status"] = status_merge([tg["status"] for tg in targets])
+        target["stamp"] = stamp_merge([tg.get("stamp") for tg in targets])
+
+    trun["progress"] = dict((key, 0) for key in cij.runner.Trun()["progress"])
+    for tsuite in trun["testsuites"]:
+        for tcase in tsuite["testcases"]:
+            trun["progress"][tcase["status"]] += 1
+
+    if trun["progress"]["UNKN"]:
+        cij.warn("merge: tcases: %d, not run by any shard, were the shards "
+                 "given the same history?" % trun["progress"]["UNKN"])
+
+    trun["status"] = status_merge([tr["status"] for tr in truns])
+    trun["stamp"] = stamp_merge([tr.get("stamp") for tr in truns])
+    trun["aborted"] = any(tr.get("aborted") for tr in truns)
+
+    trun["conf"]["SHARD"] = None
+    trun["conf"]["TESTCASE_SELECTION"] = None
+
+    return trun
+
+
+def trun_load(shard_root):
+    """Returns the trun of the shard in 'shard_root', None when missing"""
+
+    if not cij.runner.trun_exists(shard_root):
+        cij.err("merge: %r, has no trun" % shard_root)
+        return None
+
+    return cij.runner.trun_from_file(cij.runner.yml_fpath(shard_root))
+
+
+def truns_check(truns, shard_roots):
+    """Returns True when the truns are shards of the same testplan"""
+
+    idents = [
+        [(ts["ident"], [tc["ident"] for tc in ts["testcases"]])
+         for ts in tr["testsuites"]]
+        for tr in truns
+    ]
+    shards = [tuple(tr["conf"].get("SHARD") or []) for tr in truns]
+
+    for shard_root, tr_idents, shard in zip(shard_roots, idents, shards):
+        if tr_idents != idents[0]:
+            cij.err("merge: %r, not a run of the same testplan" % shard_root)
+            return False
+
+        if shards.count(shard) > 1:
+            cij.err("merge: %r, duplicate shard: %r" % (shard_root, shard))
+            return False
+
+    nshards = set(shard[1] for shard in shards if shard)
+    if len(nshards) != 1 or len(truns) not in nshards:
+        cij.warn("merge: shards: %r, some are missing" % shards)
+
+    return True
+
+
+def main(args):
+    """
+    Merge the shard outputs, args.shards, into args.output, producing trun.yml,
+    trun.xml and trun.db, and a report when args.report is given
+
+    @returns 0 on success
+    """
+
+    truns = [trun_load(shard_root) for shard_root in args.shards]
+    if None in truns or not truns_check(truns, args.shards):
+        return 1
+
+    for shard_root, trun in zip(args.shards, truns):
+        cij.emph("merge: %r" % shard_root)
+
+        tree_merge(shard_root, args.output)
+        cij.reporter.rehome(trun["conf"]["OUTPUT"], args.output, trun)
+        trun["conf"]["OUTPUT"] = args.output
+
+    trun = trun_merge(truns)
+
+    cij.runner.trun_to_file(trun)
+    if cij.runner.trun_to_junitfile(trun, system_out=args.system_out):
+        return 1
+    if cij.results.trun_to_dbfile(trun):
+        return 1
+
+    cij.emph("merge:progress %r" % trun["progress"])
+    cij.emph("merge:trun %r" % trun["status"], trun["status"] != "PASS")
+
+    if args.report:
+        return cij.reporter.main(args)
+
+    return 0
@@ -1,14 +1,67 @@
 #!/usr/bin/env python
 """
     Library functions for cij_reporter
+
+    Testcases are processed in a pool of processes, and the result of
+    processing a testcase is cached in the '_report' directory of the output,
+    keyed by the mtime and size of the files in its res_root, such that
+    regenerating a report, e.g. after resuming or re-running some testcases,
+    only processes the testcases which changed
+
+    Logs are not inlined in full, the report holds at most LOG_HEAD bytes of
+    the beginning and LOG_TAIL bytes of the end of each log, read without
+    loading the log into memory, and links to the full logs. Logs may be
+    gzip-compressed, "run.log.gz", either by the reporter, see runlogs_gzip(),
+    or otherwise, and are read transparently. The ANSI color sequences of
+    the logs, e.g. those of cij.emph(), are converted to HTML spans, see
+    ansi_to_html()
+
+    A paginated report, see pages_to_htmlfiles(), is an index page, with the
+    status of each testsuite and testcase, linking to a page per testsuite and
+    per testcase, these are stored in '_report/pages' of the output. The page
+    of a testcase is rendered by the worker processing it, and only when the
+    testcase, or the templates, changed since the page was rendered
 """
+import multiprocessing
+import operator
+import heapq
+import re
+import collections
 import datetime
+import hashlib
+import shutil
 import glob
+import gzip
+import json
+import stat
 import os
 import jinja2
 import cij.runner
 import cij
 
+CACHE_DNAME = "_report"     # Cache of processed testcases, in the output
+CACHE_VERSION = 4           # Bump when changing what tcase_fields() produces
+PAGES_DNAME = "pages"       # Pages of the paginated report, in the cache
+PAGE_HEAVY = ["src_content", "log_content"]    # Fields only on tcase pages
+
+LOG_HEAD = 64 * 1024        # Bytes of the beginning of a log in the report
+LOG_TAIL = 64 * 1024        # Bytes of the end of a log in the report
+LOG_CHUNK = 1024 * 1024     # Bytes read at a time when streaming a log
+
+AUX_CAP = 100               # Files listed per directory of an aux tree
+
+ANSI_SEQ = re.compile(r"\x1b\[([0-9;]*)([A-Za-z])")   # Params and command
+ANSI_PARTIAL = re.compile(r"\x1b(?:\[[0-9;]*)?\Z")  # Sequence cut by a chunk
+ANSI_SGR = {}               # HTML of the SGR sequences by their params
+ANSI_CLASSES = dict(
+    [("1", "ansi1")] +
+    [("%d" % code, "ansi%d" % code) for code in range(30, 38)] +
+    [("%d" % code, "ansi%d" % (code - 60)) for code in range(90, 98)]
+)
+
+TMPL_ENVS = {}              # Jinja environments by template directory
+TMPL_CACHE = None           # Bytecode cache directory, None: in the tempdir
+
 
 def extract_hook_names(ent):
     """Extract hook names from the given entity"""
@@ -30,6 +83,18 @@ def extract_hook_names(ent):
     return hnames
 
 
+def tcase_src_fpath(tcase):
+    """
+    Returns the path to the source of the given tcase, the copy in its res_root
+    or, when it did not run and thus has no copy, the original
+    """
+
+    if os.path.exists(tcase["fpath"]) or not tcase.get("fpath_orig"):
+        return tcase["fpath"]
+
+    return tcase["fpath_orig"]
+
+
 def tcase_comment(tcase):
     """
     Extract testcase comment section / testcase description
@@ -37,7 +102,7 @@ def tcase_comment(tcase):
     @returns the testcase-comment from the tcase["fpath"] as a list of strings
     """
 
-    src = open(tcase["fpath"]).read()
+    src = open(tcase_src_fpath(tcase)).read()
     if len(src) < 3:
         cij.err("rprtr::tcase_comment: invalid src, tcase: %r" % tcase["name"])
         return None
@@ -88,19 +153,19 @@ def tcase_parse_descr(tcase):
     return descr_short, descr_long
 
 
-def runlogs_to_html(run_root):
+def runlog_fpaths(run_root):
     """
-    Returns content of the given 'fpath' with HTML annotations, currently simply
-    a conversion of ANSI color codes to HTML elements
+    Returns the paths to the logs in 'run_root', "*.log" and "*.log.gz", those
+    of enter-hooks first, then that of the script and those of exit-hooks
     """
 
-    if not os.path.isdir(run_root):
-        return "CANNOT_LOCATE_LOGFILES"
-
     hook_enter = []
     hook_exit = []
     tcase = []
-    for fpath in glob.glob(os.sep.join([run_root, "*.log"])):
+    for fpath in sorted(
+            glob.glob(os.sep.join([run_root, "*.log"])) +
+            glob.glob(os.sep.join([run_root, "*.log.gz"]))
+    ):
         if "exit" in fpath:
             hook_exit.append(fpath)
             continue
@@ -111,13 +176,200 @@ def runlogs_to_html(run_root):
 
         tcase.append(fpath)
 
-    content = ""
-    for fpath in hook_enter + tcase + hook_exit:
-        content += "# BEGIN: run-log from log_fpath: %s\n" % fpath
-        content += open(fpath, "r").read()
-        content += "# END: run-log from log_fpath: %s\n\n" % fpath
+    return hook_enter + tcase + hook_exit
+
+
+def runlog_open(fpath):
+    """Returns the log at 'fpath' opened for reading bytes, gzip or not"""
+
+    if fpath.endswith(".gz"):
+        return gzip.open(fpath, "rb")
+
+    return open(fpath, "rb")
+
+
+def runlog_excerpt(fpath, head=LOG_HEAD, tail=LOG_TAIL):
+    """
+    Returns the beginning, at most 'head' bytes, and the end, at most 'tail'
+    bytes, of the log at 'fpath', cut at whole lines, and the size of the log
+
+    A plain log is read by seeking to its end, a compressed log is streamed,
+    keeping no more than 'tail' bytes of it, thus the memory used is bounded
+    by 'head' + 'tail' regardless of the size of the log
+    """
+
+    with runlog_open(fpath) as log_fd:
+        first = log_fd.read(head) if head else b""
+
+        if fpath.endswith(".gz"):
+            size = len(first)
+            chunks = collections.deque()
+            kept = 0
+            for chunk in iter(lambda: log_fd.read(LOG_CHUNK), b""):
+                size += len(chunk)
+                chunks.append(chunk)
+                kept += len(chunk)
+                while chunks and kept - len(chunks[0]) >= tail:
+                    kept -= len(chunks.popleft())
+            last = b"".join(chunks)
+            last = last[len(last) - tail:] if tail else b""
+        else:
+            log_fd.seek(0, os.SEEK_END)
+            size = log_fd.tell()
+            log_fd.seek(max(size - tail, len(first)))
+            last = log_fd.read() if tail else b""
+
+    skipped = size - len(first) - len(last)
+    if skipped:
+        if b"\n" in first:
+            first = first[:first.rfind(b"\n") + 1]
+        if b"\n" in last:
+            last = last[last.find(b"\n") + 1:]
+        skipped = size - len(first) - len(last)
+
+    content = first.decode("utf-8", "replace")
+    if skipped:
+        content += "\n# ... %d bytes of the log skipped, see the full log: " \
+                   "%s ...\n\n" % (skipped, fpath)
+    content += last.decode("utf-8", "replace")
+
+    return content, size
+
+
+def ansi_sgr(params):
+    """
+    Returns the HTML switching to the Select Graphic Rendition of 'params',
+    closing the span of the current rendition and opening that of the new
+    one, when it is not the default rendition, e.g. "0;36" becomes:
+
+    '</span><span class="ansi36">'
+
+    The HTML of each distinct 'params' is produced once and kept in ANSI_SGR,
+    a log has a handful of these, thus converting a sequence is a lookup
+    """
+
+    if params not in ANSI_SGR:
+        classes = []
+        for code in params.split(";"):
+            if code in ["", "0", "00"]:
+                classes = []
+            elif code in ANSI_CLASSES and ANSI_CLASSES[code] not in classes:
+                classes.append(ANSI_CLASSES[code])
+
+        ANSI_SGR[params] = "</span>%s" % (
+            '<span class="%s">' % " ".join(classes) if classes else ""
+        )
+
+    return ANSI_SGR[params]
+
+
+def ansi_to_html(chunks):
+    """
+    Generates the HTML of the text 'chunks', e.g. the chunks of a log read
+    piecewise, with the characters special to HTML escaped and the ANSI color
+    sequences converted to spans, other escape sequences are removed
+
+    The text is converted in a single pass, a chunk at a time, and a sequence
+    cut by the end of a chunk is completed by the next, thus the memory used
+    is bounded by the size of the chunks regardless of the size of the text
+    """
+
+    pending = ""
+    opened = False
+    for chunk in chunks:
+        text = pending + chunk if pending else chunk
+
+        pending = ""
+        partial = ANSI_PARTIAL.search(text, max(len(text) - 64, 0))
+        if partial:
+            pending = text[partial.start():]
+            text = text[:partial.start()]
+
+        text = text.replace("&", "&amp;").replace("<", "&lt;").replace(
+            ">", "&gt;"
+        )
+        if "\x1b" not in text:
+            yield text
+            continue
+
+        parts = ANSI_SEQ.split(text)
+        html = [parts[0]]
+        for idx in range(1, len(parts), 3):
+            if parts[idx + 1] == "m":
+                sgr = ansi_sgr(parts[idx])
+                html.append(sgr if opened else sgr[len("</span>"):])
+                opened = sgr != "</span>"
+            html.append(parts[idx + 2])
+
+        yield "".join(html).replace("\x1b", "")
+
+    if opened:
+        yield "</span>"
+
+
+def runlogs_to_html(run_root, head=LOG_HEAD, tail=LOG_TAIL):
+    """
+    Returns the content of the logs in 'run_root' as HTML, see ansi_to_html(),
+    of each log the first 'head' and last 'tail' bytes
+    """
+
+    if not os.path.isdir(run_root):
+        return "CANNOT_LOCATE_LOGFILES"
+
+    content = []
+    for fpath in runlog_fpaths(run_root):
+        try:
+            excerpt, _ = runlog_excerpt(fpath, head, tail)
+        except (IOError, OSError, EOFError) as exc:
+            excerpt = "# FAILED reading log: %r\n" % exc
+
+        content.append("# BEGIN: run-log from log_fpath: %s\n" % fpath)
+        content.append(excerpt)
+        content.append("# END: run-log from log_fpath: %s\n\n" % fpath)
+
+    return "".join(ansi_to_html(content))
 
-    return content
+
+def runlogs_listing(run_root):
+    """Returns the name, path and size on disk, of the logs in 'run_root'"""
+
+    listing = []
+    for fpath in runlog_fpaths(run_root):
+        try:
+            size = os.path.getsize(fpath)
+        except OSError:
+            continue
+
+        listing.append({
+            "fname": os.path.basename(fpath),
+            "fpath": fpath,
+            "size": size
+        })
+
+    return listing
+
+
+def runlogs_gzip(run_root, min_size):
+    """
+    Compress the "*.log" files in 'run_root' of at least 'min_size' bytes,
+    replacing "run.log" with "run.log.gz", @returns the number compressed
+    """
+
+    count = 0
+    for fpath in glob.glob(os.sep.join([run_root, "*.log"])):
+        if os.path.getsize(fpath) < min_size:
+            continue
+
+        with open(fpath, "rb") as log_fd:
+            with gzip.open("%s.gz.tmp" % fpath, "wb") as gz_fd:
+                shutil.copyfileobj(log_fd, gz_fd, LOG_CHUNK)
+
+        shutil.copystat(fpath, "%s.gz.tmp" % fpath)
+        os.rename("%s.gz.tmp" % fpath, "%s.gz" % fpath)
+        os.remove(fpath)
+        count += 1
+
+    return count
 
 
 def src_to_html(fpath):
@@ -134,66 +386,413 @@ def src_to_html(fpath):
     return open(fpath, "r").read()
 
 
-def aux_listing(aux_root):
-    """Listing"""
+class AuxEntry(object):
+    """
+    The part of os.DirEntry used by aux_listing(), for Pythons without
+    os.scandir(), Python < 3.5, from os.lstat() and os.stat()
+    """
+
+    __slots__ = ("name", "path")
+
+    def __init__(self, dpath, name):
+        self.name = name
+        self.path = os.sep.join([dpath, name])
+
+    def is_dir(self, follow_symlinks=True):
+        """Returns True when the entry is a directory"""
+
+        return stat.S_ISDIR(
+            (os.stat if follow_symlinks else os.lstat)(self.path).st_mode
+        )
+
+    def stat(self):
+        """Returns the stat() of the entry, following symlinks"""
+
+        return os.stat(self.path)
+
+
+def aux_scandir(dpath):
+    """Returns the entries of the directory 'dpath', see AuxEntry"""
+
+    if hasattr(os, "scandir"):
+        return os.scandir(dpath)
+
+    return [AuxEntry(dpath, name) for name in os.listdir(dpath)]
+
+
+def aux_listing(aux_root, cap=AUX_CAP):
+    """
+    Returns the listing of the files in the 'aux_root' tree, of each its name,
+    relative to 'aux_root', path, size and mtime, of at most 'cap' files per
+    directory, by name, the files not listed are counted by an entry of their
+    directory, e.g. of a directory of per-second fio logs:
+
+    [{"name": "fio/bw.1.log", "fpath": ".../fio/bw.1.log", "size": 2048,
+      "mtime": 1536000000.0, "more": 0}, ...,
+     {"name": "fio/", "fpath": ".../fio", "size": None, "mtime": None,
+      "more": 86300}]
+
+    The tree is read by os.scandir(), which provides the type of the entries
+    without a stat(), thus only the listed files are stat()'ed, and of a large
+    directory only the listed files are sorted, older Pythons fall back to
+    os.listdir(), see aux_scandir()
+    """
+
+    by_name = operator.attrgetter("name")
 
     listing = []
 
-    for root, _, fnames in os.walk(aux_root):
-        count = len(aux_root.split(os.sep))
-        prefix = root.split(os.sep)[count:]
+    dirs = [(aux_root, "")]
+    while dirs:
+        dpath, prefix = dirs.pop()
+
+        subdirs = []
+        files = []
+        try:
+            for ent in aux_scandir(dpath):
+                try:
+                    is_dir = ent.is_dir(follow_symlinks=False)
+                except OSError:
+                    is_dir = False
+                (subdirs if is_dir else files).append(ent)
+        except OSError:
+            continue
 
-        for fname in fnames:
-            listing.append(os.sep.join(prefix + [fname]))
+        for ent in heapq.nsmallest(cap, files, key=by_name):
+            try:
+                ent_stat = ent.stat()
+                size, mtime = ent_stat.st_size, ent_stat.st_mtime
+            except OSError:                 # E.g. a dangling symlink
+                size, mtime = None, None
+
+            listing.append({
+                "name": prefix + ent.name,
+                "fpath": ent.path,
+                "size": size,
+                "mtime": mtime,
+                "more": 0
+            })
+
+        if len(files) > cap:
+            listing.append({
+                "name": prefix or "./",
+                "fpath": dpath,
+                "size": None,
+                "mtime": None,
+                "more": len(files) - cap
+            })
+
+        dirs += [
+            (ent.path, prefix + ent.name + os.sep)
+            for ent in sorted(subdirs, key=by_name, reverse=True)
+        ]
 
     return listing
 
 
-def process_tsuite(tsuite):
+def process_tsuite(tsuite, logs=None):
     """Goes through the tsuite and processes "*.log" """
 
+    logs = logs or {}
+
     # scoop of output from all run-logs
 
-    tsuite["log_content"] = runlogs_to_html(tsuite["res_root"])
+    tsuite["log_content"] = runlogs_to_html(
+        tsuite["res_root"],
+        logs.get("head", LOG_HEAD),
+        logs.get("tail", LOG_TAIL)
+    )
+    tsuite["log_files"] = runlogs_listing(tsuite["res_root"])
     tsuite["aux_list"] = aux_listing(tsuite["aux_root"])
     tsuite["hnames"] = extract_hook_names(tsuite)
 
     return True
 
 
-def process_tcase(tcase):
-    """Goes through the trun and processes "run.log" """
+def tcase_fields(tcase, logs=None):
+    """
+    Returns the fields of the given tcase produced by processing it, 'logs'
+    holds the "head" and "tail" limits of log excerpts
+    """
+
+    logs = logs or {}
+
+    fields = {
+        "src_content": src_to_html(tcase_src_fpath(tcase)),
+        "log_content": runlogs_to_html(
+            tcase["res_root"],
+            logs.get("head", LOG_HEAD),
+            logs.get("tail", LOG_TAIL)
+        ),
+        "log_files": runlogs_listing(tcase["res_root"]),
+        "aux_list": aux_listing(tcase["aux_root"]),
+    }
+    fields["descr_short"], fields["descr_long"] = tcase_parse_descr(tcase)
 
-    tcase["src_content"] = src_to_html(tcase["fpath"])
-    tcase["log_content"] = runlogs_to_html(tcase["res_root"])
-    tcase["aux_list"] = aux_listing(tcase["aux_root"])
-    tcase["descr_short"], tcase["descr_long"] = tcase_parse_descr(tcase)
+    return fields
+
+
+def tcase_cache_key(tcase, logs=None):
+    """
+    Returns the cache-key of the given tcase; a digest of its paths and the
+    path, mtime and size of the files it is processed from
+
+    Of the aux files only those listed are processed, see aux_listing(), thus
+    of the aux tree the directories are part of the key, their mtime changes
+    when files are added, removed or renamed, and the files listed
+    """
+
+    digest = hashlib.sha256()
+    for part in [
+            CACHE_VERSION, sorted((logs or {}).items()),
+            tcase["res_root"], tcase_src_fpath(tcase)
+    ]:
+        digest.update(("%s\0" % part).encode("utf-8"))
+
+    aux_prefix = tcase["aux_root"] + os.sep
+
+    fpaths = [tcase_src_fpath(tcase)]
+    for root, _, fnames in os.walk(tcase["res_root"]):
+        if root == tcase["aux_root"] or root.startswith(aux_prefix):
+            fpaths.append(root)
+            fpaths += [
+                os.sep.join([root, fname])
+                for fname in heapq.nsmallest(AUX_CAP, fnames)
+            ]
+            continue
+
+        fpaths += [os.sep.join([root, fname]) for fname in fnames]
+
+    for fpath in sorted(fpaths):
+        try:
+            fstat = os.stat(fpath)
+        except OSError:
+            continue
+
+        digest.update(("%s\0%r\0%d\0" % (
+            fpath, fstat.st_mtime, fstat.st_size
+        )).encode("utf-8"))
+
+    return digest.hexdigest()
+
+
+def tcase_cache_fpath(cache_root, tcase):
+    """Returns the path to the cached fields of the given tcase"""
+
+    return os.sep.join([
+        cache_root,
+        "%s.json" % hashlib.sha1(tcase["ident"].encode("utf-8")).hexdigest()
+    ])
+
+
+def page_fpath(pages, ent):
+    """Returns the path to the page of the given tsuite or tcase"""
+
+    return os.sep.join([pages["root"], "%s.html" % ent["ident"]])
+
+
+def page_ctx(pages, fpath, tsuite_ident=None):
+    """Returns the 'page' passed to the template rendering the page 'fpath'"""
+
+    ctx = {
+        "base": os.path.dirname(fpath),
+        "css": pages["css"],
+        "index": pages["index"]
+    }
+    if tsuite_ident:
+        ctx["tsuite"] = os.sep.join([pages["root"], "%s.html" % tsuite_ident])
+
+    return ctx
+
+
+def tcase_page_key(tcase, key, pages):
+    """
+    Returns the key of the page of the given tcase, a digest of the key of
+    its fields, the tcase and the templates
+    """
+
+    digest = hashlib.sha256()
+    for part in [
+            key, pages["tmpl_key"],
+            json.dumps(tcase, sort_keys=True, default=str)
+    ]:
+        digest.update(("%s\0" % part).encode("utf-8"))
+
+    return digest.hexdigest()
+
+
+def tcase_page(tcase, fields, pages):
+    """Render the page of the given tcase with the given 'fields'"""
+
+    dset = dict(tcase)
+    dset.update(fields)
+    dset["hnames"] = extract_hook_names(tcase)
+
+    fpath = page_fpath(pages, tcase)
+    if not os.path.exists(os.path.dirname(fpath)):
+        os.makedirs(os.path.dirname(fpath))
+
+    dset_to_htmlfile(
+        dset, pages["tmpl_tcase"], fpath,
+        page=page_ctx(pages, fpath, tcase["ident"].split("/")[0])
+    )
+
+
+def tcase_fields_cached(task):
+    """
+    Returns the fields of the tcase, whether they were cached, and whether its
+    page was rendered, of the given task, a (tcase, cache_root, logs, pages)
+    tuple, processing the tcase when its fields are not in the cache, or are
+    stale; run by the workers of the pool
+
+    With 'pages', the page of the tcase is rendered, unless the page rendered
+    previously is of the same tcase, fields and templates, and the fields
+    shown only on the page are left out of those returned
+    """
+
+    tcase, cache_root, logs, pages = task
+
+    if cache_root is None:
+        fields = tcase_fields(tcase, logs)
+        if pages:
+            tcase_page(tcase, fields, pages)
+            fields = dict(
+                (k, v) for k, v in fields.items() if k not in PAGE_HEAVY
+            )
+        return fields, False, bool(pages)
+
+    key = tcase_cache_key(tcase, logs)
+    fpath = tcase_cache_fpath(cache_root, tcase)
+
+    record = None
+    try:
+        with open(fpath, "r") as cache_fd:
+            record = json.load(cache_fd)
+        if record["key"] != key:
+            record = None
+    except (IOError, OSError, ValueError, KeyError, TypeError):
+        record = None
+
+    cached = record is not None
+    if record is None:
+        record = {"key": key, "fields": tcase_fields(tcase, logs)}
+    fields = record["fields"]
+
+    stale = not cached
+    rendered = False
+    if pages:
+        page_key = tcase_page_key(tcase, key, pages)
+        if record.get("page") != page_key or \
+                not os.path.exists(page_fpath(pages, tcase)):
+            tcase_page(tcase, fields, pages)
+            record["page"] = page_key
+            stale = rendered = True
+
+        fields = dict(
+            (k, v) for k, v in fields.items() if k not in PAGE_HEAVY
+        )
+
+    if stale:
+        try:
+            with open("%s.tmp" % fpath, "w") as cache_fd:
+                json.dump(record, cache_fd)
+            os.rename("%s.tmp" % fpath, fpath)
+        except (IOError, OSError) as exc:
+            cij.warn("rprtr:cache: failed storing %r: %r" % (fpath, exc))
+
+    return fields, cached, rendered
+
+
+def process_tcase(tcase, fields=None):
+    """
+    Goes through the tcase and processes "run.log", or applies the given
+    'fields', produced by processing it elsewhere
+    """
+
+    tcase.update(fields or tcase_fields(tcase))
     tcase["hnames"] = extract_hook_names(tcase)
 
     return True
 
 
-def process_trun(trun):
+def process_target(target, logs=None):
+    """Goes through the target and processes the logs of its hooks"""
+
+    logs = logs or {}
+
+    target["log_content"] = runlogs_to_html(
+        target["res_root"],
+        logs.get("head", LOG_HEAD),
+        logs.get("tail", LOG_TAIL)
+    )
+    target["log_files"] = runlogs_listing(target["res_root"])
+    target["hnames"] = extract_hook_names(target)
+
+    return True
+
+
+def process_trun(trun, logs=None):
     """Goes through the trun and processes "run.log" """
 
-    trun["log_content"] = runlogs_to_html(trun["res_root"])
+    logs = logs or {}
+
+    trun["log_content"] = runlogs_to_html(
+        trun["res_root"],
+        logs.get("head", LOG_HEAD),
+        logs.get("tail", LOG_TAIL)
+    )
+    trun["log_files"] = runlogs_listing(trun["res_root"])
     trun["aux_list"] = aux_listing(trun["aux_root"])
     trun["hnames"] = extract_hook_names(trun)
 
     return True
 
 
-def postprocess(trun):
-    """Perform postprocessing of the given test run"""
+def postprocess(trun, jobs=None, cache_root=None, logs=None, pages=None):
+    """
+    Perform postprocessing of the given test run, the testcases are processed
+    by a pool of 'jobs' processes, defaulting to one per CPU, and their fields
+    cached in 'cache_root', when given, 'logs' holds the "head" and "tail"
+    limits of log excerpts, and 'pages', when given, describes the pages of a
+    paginated report, see pages_conf(), which the workers render
+    """
+
+    if cache_root and not os.path.exists(cache_root):
+        os.makedirs(cache_root)
 
     plog = []
-    plog.append(("trun", process_trun(trun)))
+    plog.append(("trun", process_trun(trun, logs)))
 
-    for tsuite in trun["testsuites"]:
-        plog.append(("tsuite", process_tsuite(tsuite)))
+    for target in trun.get("targets") or []:
+        plog.append(("target", process_target(target, logs)))
 
-        for tcase in tsuite["testcases"]:
-            plog.append(("tcase", process_tcase(tcase)))
+    for tsuite in trun["testsuites"]:
+        plog.append(("tsuite", process_tsuite(tsuite, logs)))
+
+    tcases = [tc for ts in trun["testsuites"] for tc in ts["testcases"]]
+    for tcase in tcases if pages else []:
+        tcase["page"] = page_fpath(pages, tcase)
+    tasks = [(tcase, cache_root, logs, pages) for tcase in tcases]
+
+    jobs = min(jobs or multiprocessing.cpu_count(), len(tasks))
+    if jobs > 1:
+        pool = multiprocessing.Pool(jobs)
+        try:
+            results = pool.map(tcase_fields_cached, tasks, chunksize=8)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = [tcase_fields_cached(task) for task in tasks]
+
+    for tcase, (fields, _, _) in zip(tcases, results):
+        plog.append(("tcase", process_tcase(tcase, fields)))
+
+    cij.emph("rprtr:postprocess { tcases: %d, cached: %d, pages: %d, "
+             "jobs: %d }" % (
+                 len(tcases), sum(cached for _, cached, _ in results),
+                 sum(rendered for _, _, rendered in results), jobs
+             ))
 
     for task, success in plog:
         if not success:
@@ -202,35 +801,133 @@ def postprocess(trun):
     return sum((success for task, success in plog))
 
 
+def stamp_to_datetime(stamp):
+    """Create a date object from timestamp"""
+
+    return datetime.datetime.fromtimestamp(int(stamp))
+
+
+def strftime(dtime, fmt):
+    """Create a date object from timestamp"""
+
+    return dtime.strftime(fmt)
+
+
+def tmpl_env(tmpl_dpath):
+    """
+    Returns the jinja environment of the templates in 'tmpl_dpath', shared by
+    all reports rendered by the process, thus a template is compiled once per
+    process, and, by the bytecode cache, once per change of the template
+    """
+
+    if tmpl_dpath not in TMPL_ENVS:
+        env = jinja2.Environment(
+            autoescape=True,
+            loader=jinja2.FileSystemLoader(tmpl_dpath),
+            bytecode_cache=jinja2.FileSystemBytecodeCache(TMPL_CACHE)
+        )
+        env.filters['stamp_to_datetime'] = stamp_to_datetime
+        env.filters['strftime'] = strftime
+        env.filters['relpath'] = os.path.relpath
+
+        TMPL_ENVS[tmpl_dpath] = env
+
+    return TMPL_ENVS[tmpl_dpath]
+
+
+def dset_to_tmpl(tmpl_fpath):
+    """Returns the template at 'tmpl_fpath' with the filters of the reports"""
+
+    return tmpl_env(os.path.dirname(tmpl_fpath)).get_template(
+        os.path.basename(tmpl_fpath)
+    )
+
+
 def dset_to_html(dset, tmpl_fpath):
     """
     @returns A HTML representation of the given 'dset' using the template at
     'tmpl_fpath'
     """
 
-    def stamp_to_datetime(stamp):
-        """Create a date object from timestamp"""
+    return dset_to_tmpl(tmpl_fpath).render(dset=dset)
 
-        return datetime.datetime.fromtimestamp(int(stamp))
 
-    def strftime(dtime, fmt):
-        """Create a date object from timestamp"""
+def dset_to_htmlfile(dset, tmpl_fpath, fpath, **kwargs):
+    """
+    Write the HTML representation of the given 'dset', using the template at
+    'tmpl_fpath', to 'fpath' as it is rendered, rather than rendering all of it
+    into memory first, 'kwargs' are passed to the template along with 'dset'
+    """
 
-        return dtime.strftime(fmt)
+    with open(fpath, "w") as html_file:
+        dset_to_tmpl(tmpl_fpath).stream(dset=dset, **kwargs).dump(html_file)
 
-    tmpl_dpath = os.path.dirname(tmpl_fpath)
-    tmpl_fname = os.path.basename(tmpl_fpath)
 
-    env = jinja2.Environment(
-        autoescape=True,
-        loader=jinja2.FileSystemLoader(tmpl_dpath)
-    )
-    env.filters['stamp_to_datetime'] = stamp_to_datetime
-    env.filters['strftime'] = strftime
+def pages_conf(args):
+    """
+    Returns the description of the pages of the paginated report of 'args',
+    the templates of its pages are those named as 'args.tmpl_name' suffixed
+    by "_index", "_tsuite" and "_tcase", @returns None when any is missing
+    """
+
+    tmpl_dpath = os.path.dirname(args.tmpl_fpath)
+    root = os.sep.join([args.output, CACHE_DNAME, PAGES_DNAME])
+
+    pages = {
+        "root": root,
+        "css": os.sep.join([root, "bootstrap.min.css"]),
+        "index": os.sep.join([args.output, "%s.html" % args.tmpl_name]),
+    }
+    for kind in ["index", "tsuite", "tcase"]:
+        tmpl_fpath = os.sep.join([
+            tmpl_dpath, "%s_%s.html" % (args.tmpl_name, kind)
+        ])
+        if not os.path.exists(tmpl_fpath):
+            cij.err("rprtr:pages: template: %r, does not exist" % tmpl_fpath)
+            return None
+
+        pages["tmpl_%s" % kind] = tmpl_fpath
+
+    tmpl_stats = []                         # Pages are stale when these change
+    for fname in sorted(os.listdir(tmpl_dpath)):
+        stat = os.stat(os.sep.join([tmpl_dpath, fname]))
+        tmpl_stats.append((fname, stat.st_mtime, stat.st_size))
+    pages["tmpl_key"] = repr(tmpl_stats)
+
+    return pages
+
 
-    tmpl = env.get_template(tmpl_fname)
+def pages_to_htmlfiles(trun, pages):
+    """
+    Write the pages of the testsuites and the index of the paginated report of
+    the given trun, postprocessed with 'pages', by which the workers rendered
+    the pages of the testcases
+    """
+
+    if not os.path.exists(pages["root"]):
+        os.makedirs(pages["root"])
+
+    css_fpath = os.sep.join([
+        os.path.dirname(pages["tmpl_index"]), os.path.basename(pages["css"])
+    ])
+    if os.path.exists(css_fpath):
+        shutil.copyfile(css_fpath, pages["css"])
+    else:
+        cij.warn("rprtr:pages: no stylesheet at %r" % css_fpath)
+
+    for tsuite in trun["testsuites"]:
+        tsuite["page"] = page_fpath(pages, tsuite)
 
-    return tmpl.render(dset=dset)
+    for tsuite in trun["testsuites"]:
+        dset_to_htmlfile(
+            tsuite, pages["tmpl_tsuite"], tsuite["page"],
+            page=page_ctx(pages, tsuite["page"])
+        )
+
+    dset_to_htmlfile(
+        trun, pages["tmpl_index"], pages["index"],
+        page=page_ctx(pages, pages["index"])
+    )
 
 
 def rehome(old, new, struct):
@@ -245,13 +942,15 @@ def rehome(old, new, struct):
         for item in struct:
             rehome(old, new, item)
     elif isinstance(struct, dict):
-        for key, val in struct.iteritems():
+        for key, val in struct.items():
             if isinstance(val, (dict, list)):
                 rehome(old, new, val)
             elif "conf" in key:
                 continue
             elif "orig" in key:
                 continue
+            elif not isinstance(val, str):
+                continue
             elif "root" in key or "path" in key:
                 struct[key] = struct[key].replace(old, new)
 
@@ -263,7 +962,34 @@ def main(args):
 
     rehome(trun["conf"]["OUTPUT"], args.output, trun)
 
-    postprocess(trun)
+    if getattr(args, "gzip_logs", None) is not None:
+        roots = [trun["res_root"]] + [
+            root for ts in trun["testsuites"]
+            for root in [ts["res_root"]] + [
+                tc["res_root"] for tc in ts["testcases"]
+            ]
+        ]
+        cij.emph("rprtr:gzip { logs: %d }" % sum(
+            runlogs_gzip(root, args.gzip_logs)
+            for root in roots if os.path.isdir(root)
+        ))
+
+    pages = None
+    if getattr(args, "pages", False):
+        pages = pages_conf(args)
+        if pages is None:
+            return 1
+
+    postprocess(
+        trun,
+        getattr(args, "jobs", None),
+        os.sep.join([args.output, CACHE_DNAME]),
+        {
+            "head": getattr(args, "log_head", LOG_HEAD),
+            "tail": getattr(args, "log_tail", LOG_TAIL)
+        },
+        pages
+    )
 
     cij.emph("main: reports are uses tmpl_fpath: %r" % args.tmpl_fpath)
     cij.emph("main: reports are here args.output: %r" % args.output)
@@ -271,8 +997,10 @@ def main(args):
     html_fpath = os.sep.join([args.output, "%s.html" % args.tmpl_name])
     cij.emph("html_fpath: %r" % html_fpath)
     try:                                    # Create and store HTML report
-        with open(html_fpath, 'w') as html_file:
-            html_file.write(dset_to_html(trun, args.tmpl_fpath))
+        if pages:
+            pages_to_htmlfiles(trun, pages)
+        else:
+            dset_to_htmlfile(trun, args.tmpl_fpath, html_fpath)
     except (IOError, OSError, ValueError) as exc:
         import traceback
         traceback.print_exc()
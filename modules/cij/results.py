@@ -0,0 +1,198 @@
+"""
+results.py  - Compact store of the testcase results of a run
+
+Functions:
+    results.fpath()             - Returns the path to the store of a run
+    results.trun_to_dbfile()    - Write the results of a trun to its store
+    results.aggregate()         - Returns pass-rates and durations across runs
+
+The store is a SQLite database, trun.db, next to the trun.yml, which remains
+the canonical and complete record of a run. It holds a 'trun' table with a
+single row describing the run and a 'tcases' table with a row per testcase:
+
+    ident, tsuite, status, rcode, wallc, stamp_begin, stamp_end, attempts,
+    cached, utime, stime, maxrss, inblock, oublock, nvcsw, nivcsw
+
+the rusage columns, but utime and stime, are NULL for testcases run by the
+bashd executor, see cij.bashd, and all are NULL for replayed testcases,
+
+and a 'targets' table with a row per target of a parallel run, the envs of
+the pool entered by the trun-hooks, see cij.runner.targets_setup():
+
+    ident, env, status, wallc, stamp_begin, stamp_end
+
+Aggregating the results of hundreds of runs thus reads a few kilobytes per
+run instead of parsing hundreds of trun.yml files, e.g.:
+
+    sqlite3 trun.db "SELECT ident, wallc FROM tcases WHERE status = 'FAIL'"
+"""
+from __future__ import print_function
+import sqlite3
+import os
+import cij
+
+RUSAGE = ["utime", "stime", "maxrss", "inblock", "oublock", "nvcsw", "nivcsw"]
+
+SCHEMA = """
+CREATE TABLE trun (
+    testplan TEXT, env TEXT, ver TEXT, status TEXT,
+    stamp_begin REAL, stamp_end REAL
+);
+CREATE TABLE tcases (
+    ident TEXT PRIMARY KEY, tsuite TEXT, status TEXT, rcode INTEGER,
+    wallc REAL, stamp_begin REAL, stamp_end REAL, attempts INTEGER,
+    cached INTEGER,
+    utime REAL, stime REAL, maxrss INTEGER, inblock INTEGER, oublock INTEGER,
+    nvcsw INTEGER, nivcsw INTEGER
+) WITHOUT ROWID;
+CREATE TABLE targets (
+    ident TEXT PRIMARY KEY, env TEXT, status TEXT, wallc REAL,
+    stamp_begin REAL, stamp_end REAL
+) WITHOUT ROWID;
+"""
+
+
+def fpath(output_path):
+    """Returns the path to the result store in 'output_path'"""
+
+    return os.sep.join([output_path, "trun.db"])
+
+
+def tcase_row(tsuite, tcase):
+    """Returns the row of the given tcase"""
+
+    stamp = tcase.get("stamp") or {}
+    rusage = tcase.get("rusage") or {}
+
+    return [
+        tcase["ident"], tsuite["ident"], tcase["status"], tcase.get("rcode"),
+        tcase.get("wallc"), stamp.get("begin"), stamp.get("end"),
+        tcase.get("attempts"), tcase.get("cached"),
+    ] + [rusage.get(key) for key in RUSAGE]
+
+
+def target_row(target):
+    """Returns the row of the given target"""
+
+    stamp = target.get("stamp") or {}
+
+    return [
+        target["ident"], target["env_fpath"], target["status"],
+        target.get("wallc"), stamp.get("begin"), stamp.get("end")
+    ]
+
+
+def trun_to_dbfile(trun, dbpath=None):
+    """
+    Write the results of the given trun to 'dbpath', defaulting to the store
+    in the trun output, @returns 0 on success
+
+    The store is written to a temporary file which replaces 'dbpath' when
+    complete, thus readers never see a partially written store
+    """
+
+    if dbpath is None:
+        dbpath = fpath(trun["conf"]["OUTPUT"])
+
+    tmp_fpath = "%s.tmp" % dbpath
+    if os.path.exists(tmp_fpath):
+        os.remove(tmp_fpath)
+
+    stamp = trun.get("stamp") or {}
+
+    try:
+        conn = sqlite3.connect(tmp_fpath)
+        try:
+            conn.executescript(SCHEMA)
+            conn.execute("INSERT INTO trun VALUES (?, ?, ?, ?, ?, ?)", [
+                trun["conf"].get("TESTPLAN_NAME"),
+                trun["conf"].get("ENV_NAME"),
+                trun.get("ver"),
+                trun.get("status"),
+                stamp.get("begin"),
+                stamp.get("end")
+            ])
+            conn.executemany(
+                "INSERT INTO tcases VALUES (%s)" % ", ".join(
+                    ["?"] * (9 + len(RUSAGE))
+                ),
+                (
+                    tcase_row(tsuite, tcase)
+                    for tsuite in trun["testsuites"]
+                    for tcase in tsuite["testcases"]
+                )
+            )
+            conn.executemany(
+                "INSERT INTO targets VALUES (?, ?, ?, ?, ?, ?)",
+                (target_row(target) for target in trun.get("targets") or [])
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+        os.rename(tmp_fpath, dbpath)
+    except (sqlite3.Error, OSError) as exc:
+        cij.err("cij.results: failed writing %r: %r" % (dbpath, exc))
+        return 1
+
+    return 0
+
+
+def aggregate(paths, ident_match=None):
+    """
+    Returns the results of the testcases across the runs at 'paths', output
+    directories or stores, optionally only idents containing 'ident_match':
+
+    {ident: {"runs": 3, "PASS": 2, "FAIL": 1, ..., "pass_rate": 0.67,
+             "wallc_mean": 12.3, "wallc_max": 12.8}}
+
+    Testcases which did not run, UNKN, are not counted, FLAKY testcases, which
+    passed when retried, count as passing
+
+    The rows of the stores are gathered, and aggregated, by SQLite in an
+    in-memory database, such that no row passes through Python
+    """
+
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE runs (ident TEXT, status TEXT, wallc REAL)")
+
+    for path in paths:
+        dbpath = fpath(path) if os.path.isdir(path) else path
+        if not os.path.exists(dbpath):
+            cij.warn("cij.results: no store at %r" % dbpath)
+            continue
+
+        conn.execute("ATTACH DATABASE ? AS run", [dbpath])
+        try:
+            conn.execute(
+                "INSERT INTO runs SELECT ident, status, wallc FROM run.tcases "
+                "WHERE status != 'UNKN' AND instr(ident, ?) > 0",
+                [ident_match or ""]
+            )
+            conn.commit()
+        except sqlite3.Error as exc:
+            cij.warn("cij.results: skipping %r: %r" % (dbpath, exc))
+        finally:
+            conn.execute("DETACH DATABASE run")
+
+    stats = {}
+    for row in conn.execute(
+            "SELECT ident, count(*), "
+            "sum(status = 'PASS'), sum(status = 'FAIL'), "
+            "sum(status = 'TIMEOUT'), sum(status = 'FLAKY'), "
+            "avg(wallc), max(wallc) "
+            "FROM runs GROUP BY ident"
+    ):
+        stats[row[0]] = {
+            "runs": row[1],
+            "PASS": row[2],
+            "FAIL": row[3],
+            "TIMEOUT": row[4],
+            "FLAKY": row[5],
+            "pass_rate": (row[2] + row[5]) / float(row[1]),
+            "wallc_mean": row[6],
+            "wallc_max": row[7]
+        }
+    conn.close()
+
+    return stats
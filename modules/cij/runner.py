@@ -3,13 +3,26 @@
 """
 from __future__ import print_function
 from subprocess import Popen, STDOUT
-from xml.dom import minidom
+from xml.sax.saxutils import escape, quoteattr
+import threading
 import shutil
+import gzip
+import signal
+import sys
+import re
 import copy
+import json
 import time
 import os
-import yaml
+import cij.history
+import cij.bashd
+import cij.cache
+import cij.events
+import cij.results
+import cij.ssh
+import cij.trace
 import cij.test
+import cij.yml
 import cij
 
 HOOK_PATTERNS = {
@@ -24,87 +37,325 @@ HOOK_PATTERNS = {
     ]
 }
 
-HOOK = {
-    "evars": {},
+class Evars(object):
+    """
+    Environment variables layered on those of a parent, lookups fall through
+    to the parent and writes go to this layer, thus a testcase shares, rather
+    than copies, the evars of its testsuite and trun
+    """
 
-    "name": None,
-    "fname": None,
-    "fpath": None,
-    "fpath_orig": None,
+    __slots__ = ("parent", "own")
 
-    "res_root": None,
-    "log_fpath": None,
-    "rcode": None,
-    "wallc": None,
-}
+    def __init__(self, parent=None, own=None):
+        self.parent = parent
+        self.own = dict(own or {})
 
-TESTSUITE = {
-    "ident": None,
-    "name": None,
-    "alias": None,
-    "hooks": {
-        "enter": [],
-        "exit": []
-    },
-    "evars": {},
+    def __getitem__(self, key):
+        if key in self.own:
+            return self.own[key]
+        if self.parent is not None:
+            return self.parent[key]
 
-    "fpath": None,
-    "fname": None,
-    "res_root": None,
-    "aux_root": None,
-    "aux_list": [],
+        raise KeyError(key)
 
-    "status": "UNKN",
-    "wallc": None,
+    def __setitem__(self, key, value):
+        self.own[key] = value
 
-    "testcases": [],
-    "hooks_pr_tcase": [],
-}
+    def __contains__(self, key):
+        if key in self.own:
+            return True
 
-TESTCASE = {
-    "ident": None,
-    "fpath": None,
-    "fname": None,
-    "name": None,
-    "res_root": None,
-    "aux_root": None,
-    "aux_list": [],
-    "log_fpath": None,
-
-    "hooks": None,
-    "evars": {},
-
-    "status": "UNKN",
-    "rcode": None,
-    "wallc": None,
-}
+        return self.parent is not None and key in self.parent
 
-TRUN = {
-    "ver": None,
-    "conf": None,
-    "evars": {},
-    "progress": {
-        "PASS": 0,
-        "FAIL": 0,
-        "UNKN": 0
-    },
-    "stamp": {
-        "begin": None,
-        "end": None
-    },
-    "hooks": {
-        "enter": [],
-        "exit": []
-    },
-    "res_root": None,
-    "aux_root": None,
-    "aux_list": [],
+    def __iter__(self):
+        return iter(self.keys())
 
-    "testsuites": [],
+    def __len__(self):
+        return len(self.keys())
 
-    "status": "UNKN",
-    "wallc": None,
-}
+    def __repr__(self):
+        return repr(self.to_dict())
+
+    def keys(self):
+        """Returns the keys of all layers, those of the parent first"""
+
+        if self.parent is None:
+            return list(self.own)
+
+        keys = list(self.parent.keys())
+
+        return keys + [key for key in self.own if key not in self.parent]
+
+    def items(self):
+        """Returns the (key, value) pairs of all layers"""
+
+        return [(key, self[key]) for key in self.keys()]
+
+    def get(self, key, default=None):
+        """Returns the value of 'key', or 'default' when not defined"""
+
+        return self[key] if key in self else default
+
+    def update(self, evars):
+        """Define the given evars in this layer"""
+
+        self.own.update(evars)
+
+    def to_dict(self):
+        """Returns all layers flattened into a dict"""
+
+        return struct_to_dict(self)
+
+
+class Record(object):
+    """
+    Base of the runner structs; a compact record with a mapping interface,
+    such that the runner, cij.trace etc. treat it as the dict it replaces,
+    and it is persisted as that dict, see to_dict()
+
+    The fields and their defaults are given by FIELDS, a callable default is
+    called to produce a fresh value for each record
+    """
+
+    __slots__ = ()
+    FIELDS = ()
+
+    def __init__(self):
+        for name, default in self.FIELDS:
+            setattr(self, name, default() if callable(default) else default)
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise KeyError(key)
+
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self.__slots__
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+    def keys(self):
+        """Returns the field names"""
+
+        return list(self.__slots__)
+
+    def items(self):
+        """Returns the (field name, value) pairs"""
+
+        return [(key, getattr(self, key)) for key in self.__slots__]
+
+    def get(self, key, default=None):
+        """Returns the value of field 'key', or 'default' when not a field"""
+
+        return getattr(self, key) if key in self.__slots__ else default
+
+    def to_dict(self):
+        """Returns the record, its evars and nested records, as dicts"""
+
+        return struct_to_dict(self)
+
+
+def struct_to_dict(struct):
+    """
+    Returns a copy of the given struct with records and evars converted to
+    dicts, nothing in the copy is shared such that it dumps without aliases
+    """
+
+    if isinstance(struct, (Record, Evars, dict)):
+        return dict((key, struct_to_dict(val)) for key, val in struct.items())
+
+    if isinstance(struct, list):
+        return [struct_to_dict(val) for val in struct]
+
+    return struct
+
+
+def hooks_empty():
+    """Returns the hooks struct without hooks"""
+
+    return {"enter": [], "exit": []}
+
+
+def stamp_empty():
+    """Returns the stamp struct without stamps"""
+
+    return {"begin": None, "end": None}
+
+
+class Hook(Record):
+    """A hook; a script run when entering or exiting a trun/tsuite/tcase"""
+
+    FIELDS = (
+        ("evars", Evars),
+
+        ("name", None),
+        ("fname", None),
+        ("fpath", None),
+        ("fpath_orig", None),
+
+        ("res_root", None),
+        ("log_fpath", None),
+        ("rcode", None),
+        ("wallc", None),
+        ("rusage", None),
+        ("stamp", None),
+
+        ("timeout", None),
+        ("timedout", False),
+    )
+    __slots__ = tuple(name for name, _ in FIELDS)
+
+
+class Testsuite(Record):
+    """A testsuite; its testcases and hooks"""
+
+    FIELDS = (
+        ("ident", None),
+        ("name", None),
+        ("alias", None),
+        ("hooks", hooks_empty),
+        ("evars", Evars),
+
+        ("fpath", None),
+        ("fname", None),
+        ("res_root", None),
+        ("aux_root", None),
+        ("aux_list", list),
+
+        ("status", "UNKN"),
+        ("wallc", None),
+        ("stamp", stamp_empty),
+        ("worker", None),
+
+        ("cache", False),
+        ("inputs", list),
+        ("timeout", None),
+        ("timeout_tcase", None),
+        ("retries", 0),
+        ("fail_fast", None),
+        ("aborted", False),
+
+        ("testcases", list),
+        ("hooks_pr_tcase", list),
+        ("timeout_pr_tcase", dict),
+    )
+    __slots__ = tuple(name for name, _ in FIELDS)
+
+
+class Testcase(Record):
+    """A testcase; the script and its hooks"""
+
+    FIELDS = (
+        ("ident", None),
+        ("fpath", None),
+        ("fpath_orig", None),
+        ("fname", None),
+        ("name", None),
+        ("res_root", None),
+        ("aux_root", None),
+        ("aux_list", list),
+        ("log_fpath", None),
+
+        ("hooks", None),
+        ("evars", Evars),
+
+        ("status", "UNKN"),
+        ("rcode", None),
+        ("wallc", None),
+        ("rusage", None),
+        ("stamp", None),
+
+        ("cached", None),   # None: not cacheable, False: miss, True: replayed
+        ("inputs", list),
+
+        ("timeout", None),
+        ("timedout", False),
+
+        ("retries", 0),
+        ("attempts", 0),
+        ("tries", list),    # Status and stamp of each attempt
+    )
+    __slots__ = tuple(name for name, _ in FIELDS)
+
+
+class Trun(Record):
+    """A test run; the testplan, its testsuites and hooks"""
+
+    FIELDS = (
+        ("ver", None),
+        ("conf", None),
+        ("evars", Evars),
+        ("progress", lambda: {
+            "PASS": 0, "FAIL": 0, "TIMEOUT": 0, "FLAKY": 0, "UNKN": 0
+        }),
+        ("stamp", stamp_empty),
+        ("hooks", hooks_empty),
+        ("res_root", None),
+        ("aux_root", None),
+        ("aux_list", list),
+
+        ("testsuites", list),
+        ("targets", list),
+
+        ("status", "UNKN"),
+        ("wallc", None),
+
+        ("timeout", None),
+        ("timeout_tcase", None),
+        ("retries", 0),
+        ("fail_fast", None),
+        ("aborted", False),
+    )
+    __slots__ = tuple(name for name, _ in FIELDS)
+
+
+class Target(Record):
+    """A target of a parallel run; an env of the pool and its trun-hooks"""
+
+    FIELDS = (
+        ("ident", None),
+        ("env_fpath", None),
+        ("hooks", hooks_empty),
+        ("evars", Evars),
+
+        ("res_root", None),
+        ("aux_root", None),
+
+        ("status", "UNKN"),
+        ("wallc", None),
+        ("stamp", stamp_empty),
+    )
+    __slots__ = tuple(name for name, _ in FIELDS)
+
+TRUN_LOCK = threading.Lock()    # Guards 'trun' progress and persistence
+JOURNAL_LOCK = threading.Lock() # Serializes appends to the run journal
+WORKER = threading.local()      # Per-thread worker context, see worker_run()
+BASHDS = []                     # All bashd processes, see bashd_get()
+SSH_CONTROLS = []               # Control-socket dirs, see ssh_control_start()
+DURATIONS = {}                  # Estimated tcase durations, see cij.history
+DEADLINES = {}                  # Ends of trun/tsuite budgets, see budget_left()
+MATERIALIZED = {}               # First copy of each file, see file_materialize()
+
+EXECUTORS = ["bash", "bashd"]
+
+JUNIT_ANSI_ESC = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
+JUNIT_XML_INVALID = re.compile(
+    u"[^\x09\x0a\x0d\x20-\ud7ff\ue000-\ufffd\U00010000-\U0010ffff]"
+)
 
 def yml_fpath(output_path):
     """Returns the path to the trun YAML-file"""
@@ -116,6 +367,350 @@ def junit_fpath(output_path):
 
     return os.sep.join([output_path, "trun.xml"])
 
+def journal_fpath(output_path):
+    """Returns the path to the run journal"""
+
+    return os.sep.join([output_path, "trun.journal"])
+
+def journal_setup(trun):
+    """
+    Create the run journal, the first event is the 'setup' of the trun itself
+    and the remaining events are the changes applied to it by the runner
+
+    Fails, by raising OSError, when the journal already exists
+    """
+
+    fpath = journal_fpath(trun["conf"]["OUTPUT"])
+
+    jfd = os.open(fpath, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+    with os.fdopen(jfd, "w") as jfile:
+        jfile.write(json.dumps({
+            "ev": "setup",
+            "data": struct_to_dict(trun)
+        }) + "\n")
+        jfile.flush()
+        os.fsync(jfile.fileno())
+
+def journal_append(trun, kind, key, data):
+    """
+    Append an event to the run journal, an event consists of the 'kind' and
+    'key' identifying the struct, and 'data', the fields which changed
+
+    The kinds and keys are:
+
+    trun    -- None
+    tsuite  -- tsuite["ident"]
+    tcase   -- tcase["ident"]
+    target  -- target["ident"]
+    script  -- script["log_fpath"], of a hook or testcase
+    """
+
+    line = json.dumps({"ev": kind, "key": key, "data": data}) + "\n"
+
+    with JOURNAL_LOCK:
+        with open(journal_fpath(trun["conf"]["OUTPUT"]), "a") as jfile:
+            jfile.write(line)
+            jfile.flush()
+            os.fsync(jfile.fileno())
+
+    cij.events.publish(kind, key, data)             # Live subscribers
+
+def trun_from_journal(fpath):
+    """
+    Returns trun rebuilt by replaying the journal at 'fpath', replay stops at
+    the first partially written event e.g. when the runner crashed mid-write
+    """
+
+    trun = None
+    index = {}
+
+    with open(fpath, "r") as jfile:
+        for line in jfile:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                cij.warn("rnr:journal: partial event, stopping replay")
+                break
+
+            if event["ev"] == "setup":
+                trun = event["data"]
+                index = journal_index(trun)
+                continue
+
+            struct = index.get((event["ev"], event["key"]))
+            if trun is None or struct is None:
+                continue
+
+            struct.update(event["data"])
+            if "targets" in event["data"]:      # Index the targets set up
+                index = journal_index(trun)
+
+    return trun
+
+def journal_trim(fpath):
+    """
+    Truncate the journal at 'fpath' after its last complete event, dropping
+    an event partially written e.g. when the runner crashed mid-write, such
+    that the events appended when resuming the run are replayed
+    """
+
+    size = 0
+    with open(fpath, "rb") as jfile:
+        for line in jfile:
+            try:
+                json.loads(line.decode("utf-8"))
+            except ValueError:
+                break
+            if not line.endswith(b"\n"):
+                break
+
+            size += len(line)
+
+    with open(fpath, "r+b") as jfile:
+        jfile.truncate(size)
+
+def journal_index(trun):
+    """Returns a mapping of journal (kind, key) to the structs of 'trun'"""
+
+    index = {("trun", None): trun}
+
+    hooks = trun["hooks"]["enter"] + trun["hooks"]["exit"]
+    for tsuite in trun["testsuites"]:
+        index[("tsuite", tsuite["ident"])] = tsuite
+        hooks += tsuite["hooks"]["enter"] + tsuite["hooks"]["exit"]
+
+        for tcase in tsuite["testcases"]:
+            index[("tcase", tcase["ident"])] = tcase
+            index[("script", tcase["log_fpath"])] = tcase
+            hooks += tcase["hooks"]["enter"] + tcase["hooks"]["exit"]
+
+    for target in trun.get("targets") or []:
+        index[("target", target["ident"])] = target
+        hooks += target["hooks"]["enter"] + target["hooks"]["exit"]
+
+    for hook in hooks:
+        index[("script", hook["log_fpath"])] = hook
+
+    return index
+
+def env_fpath(trun):
+    """Returns the env-fpath of the calling worker, defaults to the trun env"""
+
+    return getattr(WORKER, "env_fpath", trun["conf"]["ENV_FPATH"])
+
+def bashd_get(trun):
+    """
+    Returns the bashd process of the calling worker for the env of the worker,
+    it is started on first use and stopped by bashd_stop_all()
+    """
+
+    fpath = env_fpath(trun)
+
+    if not hasattr(WORKER, "bashds"):
+        WORKER.bashds = {}
+
+    if fpath not in WORKER.bashds:
+        proc = cij.bashd.start(fpath)
+        if proc is None:
+            return None
+
+        WORKER.bashds[fpath] = proc
+        with TRUN_LOCK:
+            BASHDS.append(proc)
+
+    return WORKER.bashds[fpath]
+
+def bashd_stop_all():
+    """Stop all bashd processes started by bashd_get()"""
+
+    with TRUN_LOCK:
+        while BASHDS:
+            cij.bashd.stop(BASHDS.pop())
+
+def ssh_control_start(trun):
+    """
+    Multiplex the SSH connections of the scripts of the given trun, thus
+    hooks and testcases share a connection per target instead of connecting
+    for every command
+    """
+
+    dpath = cij.ssh.control_start()
+    if dpath is None:
+        return
+
+    SSH_CONTROLS.append(dpath)
+    if trun["conf"]["VERBOSE"]:
+        cij.emph("rnr:ssh:control { dpath: %r }" % dpath)
+
+def ssh_control_stop_all():
+    """Stop the SSH connections multiplexed by ssh_control_start()"""
+
+    while SSH_CONTROLS:
+        cij.ssh.control_stop(SSH_CONTROLS.pop())
+
+def script_run_bash(trun, script, launch, log_fd, timeout):
+    """Execute a script in a fresh bash, loading CIJOE and the env"""
+
+    cmd = [
+        'bash', '-c',
+        'CIJ_ROOT=$(cij_root) && '
+        'source $CIJ_ROOT/modules/cijoe.sh && '
+        'source %s && '
+        'CIJ_TEST_RES_ROOT="%s" %s %s ' % (
+            env_fpath(trun),
+            script["res_root"],
+            launch,
+            script["fpath"]
+        )
+    ]
+    if trun["conf"]["VERBOSE"] > 1:
+        cij.emph("rnr:script:run { cmd: %r }" % " ".join(cmd))
+
+    evars = os.environ.copy()
+    evars.update({k: str(script["evars"][k]) for k in script["evars"]})
+
+    session = {}                # A process-group for the watchdog to kill
+    if timeout is not None and sys.version_info >= (3, 2):
+        session["start_new_session"] = True
+    elif timeout is not None:   # No preexec_fn, it is unsafe with threads
+        cmd = ["setsid"] + cmd
+
+    process = Popen(
+        cmd,
+        stdout=log_fd,
+        stderr=STDOUT,
+        cwd=script["res_root"],
+        env=evars,
+        **session
+    )
+
+    watchdog = script_watchdog(script, process.pid, timeout)
+    try:
+        _, status, rusage = os.wait4(process.pid, 0)
+    finally:
+        if watchdog:
+            watchdog.cancel()
+
+    process.returncode = -os.WTERMSIG(status) if os.WIFSIGNALED(status) \
+        else os.WEXITSTATUS(status)
+
+    script["rusage"] = dict(
+        (key, getattr(rusage, "ru_%s" % key)) for key in cij.results.RUSAGE
+    )
+
+    return process.returncode
+
+def script_run_bashd(trun, script, launch, timeout):
+    """Execute a script in a subshell of the pre-initialized bashd"""
+
+    proc = bashd_get(trun)
+    if proc is None:
+        return 1
+
+    req = cij.bashd.request(
+        env_fpath(trun),
+        script["res_root"],
+        script["log_fpath"],
+        script["evars"],
+        'CIJ_TEST_RES_ROOT="%s" %s %s' % (
+            script["res_root"],
+            launch,
+            script["fpath"]
+        )
+    )
+    if trun["conf"]["VERBOSE"] > 1:
+        cij.emph("rnr:script:run { req: %r }" % req)
+
+    watchdog = []
+    times = cij.bashd.times(proc)
+    try:
+        return cij.bashd.run(
+            proc,
+            req,
+            lambda pid: watchdog.append(script_watchdog(script, pid, timeout))
+        )
+    finally:
+        for dog in (dog for dog in watchdog if dog):
+            dog.cancel()
+
+        if times:                   # Partial rusage; CPU-time of subshell
+            utime, stime = cij.bashd.times(proc)
+            script["rusage"] = dict((key, None) for key in cij.results.RUSAGE)
+            script["rusage"]["utime"] = utime - times[0]
+            script["rusage"]["stime"] = stime - times[1]
+
+def script_timeout(script):
+    """
+    Returns the seconds the given script may run, its timeout, bounded by the
+    budgets of the trun and the tsuite when it is part of running a testcase,
+    None when unbounded, the hooks of the trun and tsuites are not bounded by
+    the budgets such that e.g. the lock is released
+    """
+
+    timeouts = [script.get("timeout")]
+    if getattr(WORKER, "tsuite", None) is not None:
+        timeouts.append(budget_left(WORKER.tsuite))
+
+    timeouts = [timeout for timeout in timeouts if timeout is not None]
+
+    return max(min(timeouts), 0) if timeouts else None
+
+def script_watchdog(script, pgid, timeout):
+    """
+    Returns a started watchdog killing the process-group 'pgid' when the
+    script exceeds 'timeout' seconds, None when the timeout is None
+    """
+
+    if timeout is None:
+        return None
+
+    def expire():
+        """Kill the process-group of the script"""
+
+        try:
+            os.killpg(pgid, signal.SIGKILL)
+            script["timedout"] = True
+        except OSError:                             # Exited meanwhile
+            pass
+
+    watchdog = threading.Timer(timeout, expire)
+    watchdog.daemon = True
+    watchdog.start()
+
+    return watchdog
+
+def script_cache_key(trun, script):
+    """
+    Returns the cache-key of the given script, that is, a hash of the script,
+    its hooks, the env, its evars and its inputs, None when the script is not
+    cacheable
+    """
+
+    if not trun["conf"].get("CACHE") or script.get("cached") is None:
+        return None
+
+    hooks = script.get("hooks") or {"enter": [], "exit": []}
+
+    return cij.cache.key(
+        [script["fpath_orig"]] +
+        [hook["fpath_orig"] for hook in hooks["enter"] + hooks["exit"]] +
+        [env_fpath(trun)],
+        script["evars"],
+        script.get("inputs")
+    )
+
+def script_replay(script, ckey, result):
+    """Replay the cached result of a script, @returns the cached rcode"""
+
+    with open(script["log_fpath"], "ab") as log_fd:
+        log_fd.write(("# cache: replaying key: %r\n" % ckey).encode("utf-8"))
+        with open(result["log_fpath"], "rb") as cached_fd:
+            shutil.copyfileobj(cached_fd, log_fd)
+
+    script["cached"] = True
+
+    return result["rcode"]
+
 def script_run(trun, script):
     """Execute a script or testcase"""
 
@@ -134,41 +729,61 @@ def script_run(trun, script):
         return 1
 
     launch = launchers[ext]
+    timeout = script_timeout(script)
+    script["timedout"] = False
+
+    ckey = script_cache_key(trun, script)
+    cached = None                       # A retry must run, not replay
+    if ckey and script.get("attempts", 0) <= 1:
+        cached = cij.cache.lookup(trun["conf"]["CACHE"], ckey)
 
     with open(script["log_fpath"], "a") as log_fd:
         log_fd.write("# script_fpath: %r\n" % script["fpath"])
         log_fd.flush()
+        offset = log_fd.tell()
 
         bgn = time.time()
-        cmd = [
-            'bash', '-c',
-            'CIJ_ROOT=$(cij_root) && '
-            'source $CIJ_ROOT/modules/cijoe.sh && '
-            'source %s && '
-            'CIJ_TEST_RES_ROOT="%s" %s %s ' % (
-                trun["conf"]["ENV_FPATH"],
-                script["res_root"],
-                launch,
-                script["fpath"]
+        if cached:
+            script["rcode"] = script_replay(script, ckey, cached)
+        elif trun["conf"].get("EXECUTOR") == "bashd":
+            script["rcode"] = script_run_bashd(trun, script, launch, timeout)
+        else:
+            script["rcode"] = script_run_bash(
+                trun, script, launch, log_fd, timeout
             )
-        ]
-        if trun["conf"]["VERBOSE"] > 1:
-            cij.emph("rnr:script:run { cmd: %r }" % " ".join(cmd))
-
-        evars = os.environ.copy()
-        evars.update({k: str(script["evars"][k]) for k in script["evars"]})
-
-        process = Popen(
-            cmd,
-            stdout=log_fd,
-            stderr=STDOUT,
-            cwd=script["res_root"],
-            env=evars
-        )
-        process.wait()
-
-        script["rcode"] = process.returncode
         script["wallc"] = time.time() - bgn
+        script["stamp"] = {"begin": bgn, "end": bgn + script["wallc"]}
+
+        if script.get("timedout"):
+            log_fd.write("# script_timeout: %r\n" % timeout)
+            cij.err("rnr:script:timeout { fname: %r, timeout: %r }" % (
+                script["fname"], timeout
+            ))
+
+    if ckey and not cached:
+        script["cached"] = False
+
+    if ckey and not cached and not script.get("timedout") and \
+            not script["rcode"]:            # Only passes are stored
+        with open(script["log_fpath"], "rb") as log_fd:
+            log_fd.seek(offset)
+            cij.cache.store(
+                trun["conf"]["CACHE"],
+                ckey,
+                script["rcode"],
+                script["wallc"],
+                log_fd.read()
+            )
+
+    data = {
+        "rcode": script["rcode"],
+        "wallc": script["wallc"],
+        "rusage": script.get("rusage"),
+        "stamp": script["stamp"]
+    }
+    if script.get("cached") is not None:
+        data["cached"] = script["cached"]
+    journal_append(trun, "script", script["log_fpath"], data)
 
     if trun["conf"]["VERBOSE"]:
         cij.emph("rnr:script:run { wallc: %02f }" % script["wallc"])
@@ -182,7 +797,7 @@ def script_run(trun, script):
 def hook_setup(parent, hook_fpath):
     """Setup hook"""
 
-    hook = copy.deepcopy(HOOK)
+    hook = Hook()
     hook["name"] = os.path.splitext(os.path.basename(hook_fpath))[0]
     hook["name"] = hook["name"].replace("_enter", "").replace("_exit", "")
     hook["res_root"] = parent["res_root"]
@@ -194,12 +809,47 @@ def hook_setup(parent, hook_fpath):
         "%s.log" % hook["fname"]
     ])
 
-    hook["evars"].update(copy.deepcopy(parent["evars"]))
-
-    shutil.copyfile(hook["fpath_orig"], hook["fpath"])
+    hook["evars"] = Evars(parent["evars"])
+    if isinstance(parent, Testcase):        # Others are bounded by budgets
+        hook["timeout"] = parent.get("timeout")
 
     return hook
 
+def file_materialize(src, dst):
+    """
+    Copy the file at 'src' to 'dst', unless it exists, further copies of the
+    same 'src' are hardlinked to the first copy, falling back to copying when
+    linking fails e.g. across filesystems
+    """
+
+    if os.path.exists(dst):
+        return
+
+    with TRUN_LOCK:
+        first = MATERIALIZED.setdefault(src, dst)
+
+    if first != dst:
+        try:
+            os.link(first, dst)
+            return
+        except (OSError, AttributeError):
+            pass
+
+    shutil.copyfile(src, dst)
+
+def dirs_materialize(ent):
+    """Create the res_root and aux_root of the given entity, unless they exist"""
+
+    for path in [ent["res_root"], ent["aux_root"]]:
+        if not os.path.exists(path):
+            os.makedirs(path)
+
+def hooks_materialize(hooks):
+    """Copy the given hooks into the res_root of their entity"""
+
+    for hook in hooks["enter"] + hooks["exit"]:
+        file_materialize(hook["fpath_orig"], hook["fpath"])
+
 def hooks_setup(trun, parent, hnames=None):
     """
     Setup test-hooks
@@ -241,19 +891,65 @@ def trun_to_file(trun, fpath=None):
         fpath = yml_fpath(trun["conf"]["OUTPUT"])
 
     with open(fpath, 'w') as yml_file:
-        data = yaml.dump(trun, explicit_start=True, default_flow_style=False)
-        yml_file.write(data)
+        cij.yml.dump(
+            struct_to_dict(trun),
+            yml_file,
+            explicit_start=True,
+            default_flow_style=False
+        )
 
-def trun_to_junitfile(trun, fpath=None):
-    """Generate jUNIT XML from testrun YML"""
+def junit_system_out(tcase, limit):
+    """
+    Returns the tail, at most 'limit' bytes, of the log of the given tcase
+    without ANSI escape-sequences and characters not allowed in XML, the log
+    is read from "run.log.gz" when compressed by the reporter
+    """
 
     try:
-        if fpath is None:
-            fpath = junit_fpath(trun["conf"]["OUTPUT"])
+        gz_fpath = "%s.gz" % tcase["log_fpath"]
+        if not os.path.exists(tcase["log_fpath"]) and os.path.exists(gz_fpath):
+            size = 0
+            content = b""
+            with gzip.open(gz_fpath, "rb") as log_fd:      # Stream to the end
+                for chunk in iter(lambda: log_fd.read(1 << 20), b""):
+                    size += len(chunk)
+                    content = (content + chunk)[-limit:]
+            content = content.decode("utf-8", "replace")
+        else:
+            with open(tcase["log_fpath"], "rb") as log_fd:
+                log_fd.seek(0, os.SEEK_END)
+                size = log_fd.tell()
+                log_fd.seek(max(size - limit, 0))
+                content = log_fd.read().decode("utf-8", "replace")
+    except (IOError, OSError, EOFError, KeyError, TypeError):
+        return None
+
+    if size > limit:                                # Start at a whole line
+        content = content[content.find("\n") + 1:]
+
+    content = JUNIT_ANSI_ESC.sub("", content)
+    content = JUNIT_XML_INVALID.sub("", content)
+    if size > limit:
+        content = "[truncated to last %d of %d bytes]\n%s" % (
+            limit, size, content
+        )
+
+    return content
 
-        doc = minidom.Document()
+def junit_attrs(attrs):
+    """Returns the given list of (key, value) as quoted XML attributes"""
 
-        doc_testsuites = doc.createElement('testsuites')
+    return " ".join("%s=%s" % (key, quoteattr(val)) for key, val in attrs)
+
+def trun_to_junitfile(trun, fpath=None, system_out=None):
+    """
+    Generate jUNIT XML from testrun YML, the XML is written one testcase at a
+    time, failed testcases embed the last 'system_out' bytes of their log
+    """
+
+    try:
+        if fpath is None:
+            fpath = junit_fpath(trun["conf"]["OUTPUT"])
 
         duration = 0
         stamp = trun.get("stamp", None)
@@ -269,60 +965,79 @@ def trun_to_junitfile(trun, fpath=None):
             if stamp_end > stamp_begin:
                 duration = stamp_end - stamp_begin
 
-        doc_testsuites.setAttribute("duration", str(duration))
-
-        doc.appendChild(doc_testsuites)
-
-        for ts_id, tsuite in enumerate(trun.get("testsuites", [])):
-
-            doc_tsuite = doc.createElement("testsuite")
-            doc_tsuite.setAttribute("name", tsuite.get("name", "UNNAMED"))
-            doc_tsuite.setAttribute("package", tsuite.get("ident", "UNDEFINED"))
-            doc_tsuite.setAttribute(
-                "tests",
-                str(len(tsuite.get("testcases", [])))
-            )
-
-            nfailures = 0
-            wallc_total = 0.0
-
-            for tcase in tsuite["testcases"]:
-                wallc = tcase.get("wallc", None)
-                if not wallc:
-                    wallc = 0.0
-
-                wallc_total += wallc
-
-                doc_tcase = doc.createElement("testcase")
-                doc_tcase.setAttribute(
-                    "name", str(tcase.get("name", "UNNAMED"))
-                )
-                doc_tcase.setAttribute(
-                    "classname", str(tcase.get("ident", "UNDEFINED"))
-                )
-                doc_tcase.setAttribute("time", "%0.3f" % wallc)
-
-                rcode = tcase.get("rcode", None)
-                if rcode != 0:
-                    nfailures += 1
-
-                    doc_failure = doc.createElement("failure")
-                    doc_failure.setAttribute(
-                        "message",
-                        "not executed" if rcode is None else "test failed"
-                    )
-
-                    doc_tcase.appendChild(doc_failure)
-
-                doc_tsuite.appendChild(doc_tcase)
-
-            doc_tsuite.setAttribute("failures", str(nfailures))
-            doc_tsuite.setAttribute("time", "%0.3f" % wallc_total)
-
-            doc_testsuites.appendChild(doc_tsuite)
-
-        with open(fpath, "w") as f:
-            f.write(doc.toprettyxml(indent="  "))
+        with open(fpath, "w") as junit:
+            junit.write('<?xml version="1.0" ?>\n')
+            junit.write('<testsuites %s>\n' % junit_attrs([
+                ("duration", str(duration))
+            ]))
+
+            for tsuite in trun.get("testsuites", []):
+                tcases = tsuite.get("testcases", [])
+
+                junit.write('  <testsuite %s>\n' % junit_attrs([
+                    ("name", tsuite.get("name", "UNNAMED")),
+                    ("package", tsuite.get("ident", "UNDEFINED")),
+                    ("tests", str(len(tcases))),
+                    ("failures", str(sum(
+                        tcase.get("rcode", None) != 0 for tcase in tcases
+                    ))),
+                    ("time", "%0.3f" % sum(
+                        tcase.get("wallc", None) or 0.0 for tcase in tcases
+                    ))
+                ]))
+
+                for tcase in tcases:
+                    attrs = junit_attrs([
+                        ("name", str(tcase.get("name", "UNNAMED"))),
+                        ("classname", str(tcase.get("ident", "UNDEFINED"))),
+                        ("time", "%0.3f" % (tcase.get("wallc", None) or 0.0))
+                    ])
+
+                    rcode = tcase.get("rcode", None)
+                    if rcode == 0 and tcase.get("status") == "FLAKY":
+                        junit.write('    <testcase %s>\n' % attrs)
+                        junit.write('      <flakyFailure %s/>\n' % junit_attrs([
+                            ("message", "passed on attempt %d" % (
+                                tcase.get("attempts", 0)
+                            ))
+                        ]))
+                        junit.write('    </testcase>\n')
+                        continue
+
+                    if rcode == 0:
+                        junit.write('    <testcase %s/>\n' % attrs)
+                        continue
+
+                    message = "test failed"
+                    if rcode is None:
+                        message = "not executed"
+                    if rcode is None and trun.get("aborted"):
+                        message = "not executed, trun aborted by fail_fast"
+                    if rcode is None and tsuite.get("aborted"):
+                        message = "not executed, testsuite aborted by fail_fast"
+                    if tcase.get("status") == "TIMEOUT":
+                        message = "timeout after %.1fs" % (
+                            tcase.get("wallc") or 0
+                        )
+
+                    junit.write('    <testcase %s>\n' % attrs)
+                    junit.write('      <failure %s/>\n' % junit_attrs([
+                        ("message", message)
+                    ]))
+
+                    content = None
+                    if system_out and rcode is not None:
+                        content = junit_system_out(tcase, system_out)
+                    if content:
+                        junit.write('      <system-out>%s</system-out>\n' % (
+                            escape(content)
+                        ))
+
+                    junit.write('    </testcase>\n')
+
+                junit.write('  </testsuite>\n')
+
+            junit.write('</testsuites>\n')
 
     except Exception as ex:
         cij.err("Failed persisting testrun as jUNIT XML, ex(%r)" % ex)
@@ -332,10 +1047,23 @@ def trun_to_junitfile(trun, fpath=None):
 
 
 def trun_from_file(fpath):
-    """Returns trun from the given fpath"""
+    """
+    Returns trun from the given fpath, when it does not exist, e.g. during or
+    after an interrupted run, then the trun is rebuilt from the run journal
+    """
+
+    if not os.path.exists(fpath):
+        return trun_from_journal(journal_fpath(os.path.dirname(fpath)))
 
     with open(fpath, 'r') as yml_file:
-        return yaml.safe_load(yml_file)
+        return cij.yml.load(yml_file)
+
+
+def trun_exists(output_path):
+    """Returns True when a trun.yml or a run journal exists in output_path"""
+
+    return os.path.exists(yml_fpath(output_path)) or \
+        os.path.exists(journal_fpath(output_path))
 
 
 def trun_emph(trun):
@@ -351,6 +1079,7 @@ def trun_emph(trun):
         cij.emph("rnr:INFO {")
         cij.emph("  OUTPUT: %r" % trun["conf"]["OUTPUT"])
         cij.emph("  yml_fpath: %r" % yml_fpath(trun["conf"]["OUTPUT"]))
+        cij.emph("  journal_fpath: %r" % journal_fpath(trun["conf"]["OUTPUT"]))
         cij.emph("}")
 
 
@@ -360,7 +1089,7 @@ def tcase_setup(trun, parent, tcase_fname):
     """
     #pylint: disable=locally-disabled, unused-argument
 
-    case = copy.deepcopy(TESTCASE)
+    case = Testcase()
 
     case["fname"] = tcase_fname
     case["fpath_orig"] = os.sep.join([trun["conf"]["TESTCASES"], case["fname"]])
@@ -378,14 +1107,18 @@ def tcase_setup(trun, parent, tcase_fname):
 
     case["fpath"] = os.sep.join([case["res_root"], case["fname"]])
 
-    case["evars"].update(copy.deepcopy(parent["evars"]))
+    case["evars"] = Evars(parent["evars"])
+
+    if parent.get("cache"):
+        case["cached"] = False
+        case["inputs"] = list(parent["inputs"])
 
-    # Initalize
-    os.makedirs(case["res_root"])                       # Create DIRS
-    os.makedirs(case["aux_root"])
-    shutil.copyfile(case["fpath_orig"], case["fpath"])  # Copy testcase
+    case["timeout"] = parent.get("timeout_pr_tcase", {}).get(
+        case["fname"], parent.get("timeout_tcase")
+    )
+    case["retries"] = parent.get("retries", 0)
 
-    # Initialize hooks
+    # Initialize hooks, dirs and copies are deferred to tcase_enter
     case["hooks"] = hooks_setup(trun, case, parent.get("hooks_pr_tcase"))
 
     return case
@@ -415,6 +1148,9 @@ def tsuite_enter(trun, tsuite):
     if trun["conf"]["VERBOSE"]:
         cij.emph("rnr:tsuite:enter { name: %r }" % tsuite["name"])
 
+    dirs_materialize(tsuite)
+    hooks_materialize(tsuite["hooks"])
+
     rcode = 0
     for hook in tsuite["hooks"]["enter"]:     # ENTER-hooks
         rcode = script_run(trun, hook)
@@ -426,13 +1162,32 @@ def tsuite_enter(trun, tsuite):
 
     return rcode
 
+def inputs_setup(trun, paths):
+    """
+    Returns the given input paths of a cached testsuite, with environment
+    variables expanded and relative to the testplan, None when one is missing
+    """
+
+    tplan_dpath = os.path.dirname(trun["conf"]["TESTPLAN_FPATH"])
+
+    resolved = []
+    for path in paths:
+        path = os.path.join(tplan_dpath, os.path.expandvars(path))
+        if not os.path.exists(path):
+            cij.err("rnr:inputs_setup: path: %r does not exist" % path)
+            return None
+
+        resolved.append(os.path.normpath(path))
+
+    return resolved
+
 def tsuite_setup(trun, declr, enum):
     """
-    Creates and initialized a TESTSUITE struct and site-effects such as creating
-    output directories and forwarding initialization of testcases
+    Creates and initialized a TESTSUITE struct and forwards initialization of
+    testcases, output directories are created when entering the testsuite
     """
 
-    suite = copy.deepcopy(TESTSUITE)  # Setup the test-suite
+    suite = Testsuite()               # Setup the test-suite
 
     suite["name"] = declr.get("name")
     if suite["name"] is None:
@@ -440,23 +1195,28 @@ def tsuite_setup(trun, declr, enum):
         return None
 
     suite["alias"] = declr.get("alias")
+    suite["cache"] = bool(declr.get("cache", False))
+    suite["inputs"] = inputs_setup(trun, declr.get("inputs", []))
+    if suite["inputs"] is None:
+        cij.err("rnr:tsuite_setup: invalid inputs of: %r" % suite["name"])
+        return None
+    suite["timeout"] = declr.get("timeout")
+    suite["timeout_tcase"] = declr.get("timeout_tcase", trun["timeout_tcase"])
+    suite["retries"] = declr.get("retries", trun["retries"])
+    suite["fail_fast"] = declr.get("fail_fast")
     suite["ident"] = "%s_%d" % (suite["name"], enum)
 
     suite["res_root"] = os.sep.join([trun["conf"]["OUTPUT"], suite["ident"]])
     suite["aux_root"] = os.sep.join([suite["res_root"], "_aux"])
 
-    suite["evars"].update(copy.deepcopy(trun["evars"]))
-    suite["evars"].update(copy.deepcopy(declr.get("evars", {})))
-
-    # Initialize
-    os.makedirs(suite["res_root"])
-    os.makedirs(suite["aux_root"])
+    suite["evars"] = Evars(trun["evars"], declr.get("evars"))
 
-    # Setup testsuite-hooks
+    # Setup testsuite-hooks, dirs and copies are deferred to tsuite_enter
     suite["hooks"] = hooks_setup(trun, suite, declr.get("hooks"))
 
     # Forward from declaration
     suite["hooks_pr_tcase"] = declr.get("hooks_pr_tcase", [])
+    suite["timeout_pr_tcase"] = declr.get("timeout_pr_tcase", {})
 
     suite["fname"] = "%s.suite" % suite["name"]
     suite["fpath"] = os.sep.join([trun["conf"]["TESTSUITES"], suite["fname"]])
@@ -502,6 +1262,8 @@ def tcase_exit(trun, tsuite, tcase):
     rcode = 0
     for hook in reversed(tcase["hooks"]["exit"]):    # tcase EXIT-hooks
         rcode = script_run(trun, hook)
+        if hook["timedout"]:
+            tcase["timedout"] = True
         if rcode:
             break
 
@@ -524,9 +1286,15 @@ def tcase_enter(trun, tsuite, tcase):
         cij.emph("rnr:tcase:enter { fname: %r }" % tcase["fname"])
         cij.emph("rnr:tcase:enter { log_fpath: %r }" % tcase["log_fpath"])
 
+    dirs_materialize(tcase)
+    file_materialize(tcase["fpath_orig"], tcase["fpath"])
+    hooks_materialize(tcase["hooks"])
+
     rcode = 0
     for hook in tcase["hooks"]["enter"]:    # tcase ENTER-hooks
         rcode = script_run(trun, hook)
+        if hook["timedout"]:
+            tcase["timedout"] = True
         if rcode:
             break
 
@@ -547,6 +1315,8 @@ def trun_exit(trun):
         if rcode:
             break
 
+    ssh_control_stop_all()
+
     if trun["conf"]["VERBOSE"]:
         cij.emph("rnr:trun::exit { rcode: %r }" % rcode, rcode)
 
@@ -559,7 +1329,15 @@ def trun_enter(trun):
     if trun["conf"]["VERBOSE"]:
         cij.emph("rnr:trun::enter")
 
-    trun["stamp"]["begin"] = int(time.time())     # Record start timestamp
+    if trun["stamp"]["begin"] is None:              # Record start timestamp
+        trun["stamp"]["begin"] = int(time.time())
+    journal_append(trun, "trun", None, {"stamp": trun["stamp"]})
+
+    if trun.get("timeout"):                         # Budget of this run
+        DEADLINES[("trun", None)] = time.time() + trun["timeout"]
+
+    hooks_materialize(trun["hooks"])
+    ssh_control_start(trun)
 
     rcode = 0
     for hook in trun["hooks"]["enter"]:     # ENTER-hooks
@@ -578,25 +1356,31 @@ def trun_setup(conf):
     Setup the testrunner data-structure, embedding the parsed environment
     variables and command-line arguments and continues with setup for testplans,
     testsuites, and testcases
+
+    @returns the trun, None on error
     """
 
     declr = None
     try:
         with open(conf["TESTPLAN_FPATH"]) as declr_fd:
-            declr = yaml.safe_load(declr_fd)
+            declr = cij.yml.load(declr_fd)
     except AttributeError as exc:
         cij.err("rnr: %r" % exc)
 
     if not declr:
         return None
 
-    trun = copy.deepcopy(TRUN)
+    trun = Trun()
     trun["ver"] = cij.VERSION
 
     trun["conf"] = copy.deepcopy(conf)
     trun["res_root"] = conf["OUTPUT"]
     trun["aux_root"] = os.sep.join([trun["res_root"], "_aux"])
-    trun["evars"].update(copy.deepcopy(declr.get("evars", {})))
+    trun["evars"].update(declr.get("evars", {}))
+    trun["timeout"] = declr.get("timeout")
+    trun["timeout_tcase"] = declr.get("timeout_tcase")
+    trun["retries"] = declr.get("retries", 0)
+    trun["fail_fast"] = declr.get("fail_fast")
 
     os.makedirs(trun["aux_root"])
 
@@ -609,12 +1393,14 @@ def trun_setup(conf):
 
     # Setup top-level hooks
     trun["hooks"] = hooks_setup(trun, trun, hook_names)
+    if trun["hooks"] is None:
+        return None
 
     for enum, declr in enumerate(declr["testsuites"]):  # Setup testsuites
         tsuite = tsuite_setup(trun, declr, enum)
         if tsuite is None:
-            cij.err("main::FAILED: setting up tsuite: %r" % tsuite)
-            return 1
+            cij.err("main::FAILED: setting up tsuite: %r" % declr.get("name"))
+            return None
 
         trun["testsuites"].append(tsuite)
         trun["progress"]["UNKN"] += len(tsuite["testcases"])
@@ -622,58 +1408,664 @@ def trun_setup(conf):
     return trun
 
 
-def main(conf):
-    """CIJ Test Runner main entry point"""
+def tcase_skipped(trun, tcase):
+    """Returns True when the given tcase is not selected for running"""
+
+    tcase_match = trun["conf"].get("TESTCASE_MATCH", None)
+    if tcase_match and tcase_match not in tcase["name"]:
+        return True
+
+    selection = trun["conf"].get("TESTCASE_SELECTION", None)
+
+    return selection is not None and tcase["ident"] not in selection
+
+
+def tcase_estimate(tcase):
+    """
+    Returns the estimated duration of the given tcase, when it has no history
+    the average of those which have, zero when there is no history at all
+    """
+
+    return cij.history.estimate(DURATIONS, tcase) or 0.0
+
+
+def tsuite_estimate(trun, tsuite):
+    """Returns the estimated duration of the pending tcases in 'tsuite'"""
+
+    return sum(
+        tcase_estimate(tc) for tc in tsuite["testcases"]
+        if tcase_pending(trun, tc)
+    )
+
+
+def trun_eta(trun):
+    """
+    Returns the estimated time, in seconds, to complete the pending tcases,
+    None when there is no history to estimate from
+    """
+
+    if not DURATIONS:
+        return None
+
+    pending = sum(tsuite_estimate(trun, ts) for ts in trun["testsuites"])
+
+    return pending / max(trun["conf"].get("JOBS") or 1, 1)
+
+
+def trun_select_budget(trun, budget):
+    """
+    Returns the idents of the tcases to run within the given time budget, in
+    seconds; tcases are selected in plan order, skipping those that do not fit
+    """
+
+    selection = []
+    spent = 0.0
+    unknown = 0
+
+    for tsuite in trun["testsuites"]:
+        for tcase in tsuite["testcases"]:
+            if tcase_skipped(trun, tcase):
+                continue
+
+            if tcase["ident"] not in DURATIONS and \
+                    tcase["fname"] not in DURATIONS:
+                unknown += 1
+
+            wallc = tcase_estimate(tcase)
+            if spent + wallc > budget:
+                continue
+
+            spent += wallc
+            selection.append(tcase["ident"])
+
+    if unknown:
+        cij.warn("rnr:budget { tcases: %d }, no history, estimated as the "
+                 "average of those with history" % unknown)
+
+    cij.emph("rnr:budget { budget: %r, estimate: %0.2f, tcases: %d }" % (
+        budget, spent, len(selection)
+    ))
+
+    return selection
+
+
+def trun_select_shard(trun, shard, nshards):
+    """
+    Returns the idents of the tcases in shard 'shard', of 'nshards', numbered
+    from 1; the tcases are split by assigning the longest first to the least
+    loaded shard, each tcase weighing its estimated duration, or one when
+    there is no history, ties go by plan order such that the split is the same
+    on every node
+    """
+
+    tcases = []
+    for tsuite in trun["testsuites"]:
+        for tcase in tsuite["testcases"]:
+            if tcase_skipped(trun, tcase):
+                continue
+
+            weight = cij.history.estimate(DURATIONS, tcase)
+            if weight is None:
+                weight = 1.0
+
+            tcases.append((-weight, len(tcases), tcase))
+
+    loads = [0.0] * nshards
+    shards = [[] for _ in range(nshards)]
+    for weight, _, tcase in sorted(tcases, key=lambda tc: tc[:2]):
+        least = loads.index(min(loads))
+        loads[least] -= weight
+        shards[least].append(tcase["ident"])
+
+    selection = shards[shard - 1]
+
+    cij.emph("rnr:shard { shard: %d/%d, estimate: %0.2f, tcases: %d }" % (
+        shard, nshards, loads[shard - 1], len(selection)
+    ))
+
+    return selection
+
+
+def tcase_pending(trun, tcase):
+    """Returns True when the given tcase is selected and has not completed"""
+
+    return tcase["status"] == "UNKN" and not tcase_skipped(trun, tcase)
+
+
+def tsuite_run(trun, tsuite):
+    """
+    Run the given testsuite; its enter-hooks, testcases and exit-hooks
+
+    Testcases that have completed, e.g. in a resumed run, are not run again,
+    and a testsuite with completed testcases but none pending is not entered,
+    nor is a testsuite with none of its testcases selected, e.g. by another
+    shard, it is left as UNKN
+
+    @returns 0 when everything succeeds, the number of errors otherwise
+    """
+
+    ts_err = sum(
+        tc["status"] in ["FAIL", "TIMEOUT"] for tc in tsuite["testcases"]
+    )
+
+    pending = [tc for tc in tsuite["testcases"] if tcase_pending(trun, tc)]
+    completed = [tc for tc in tsuite["testcases"] if tc["status"] != "UNKN"]
+    if completed and not pending:                   # Completed previously
+        if tsuite["status"] == "UNKN":
+            tsuite_status(trun, tsuite, ts_err)
+
+        return ts_err or int(tsuite["status"] == "FAIL")
+
+    if tsuite["testcases"] and not pending:         # None selected
+        return 0
+
+    tsuite["stamp"]["begin"] = time.time()
+    tsuite["worker"] = getattr(WORKER, "wid", None)
+    if tsuite.get("timeout"):                       # Budget of the tsuite
+        DEADLINES[("tsuite", tsuite["ident"])] = \
+            tsuite["stamp"]["begin"] + tsuite["timeout"]
+    cij.events.publish("tsuite_start", tsuite["ident"], {
+        "worker": tsuite["worker"]
+    })
+
+    ts_ent_err = tsuite_enter(trun, tsuite)
+    for tcase in (tc for tc in tsuite["testcases"] if not ts_ent_err):
+
+        if not tcase_pending(trun, tcase):     # Completed or not selected
+            continue
+
+        if trun.get("aborted") or tsuite.get("aborted"):    # fail_fast
+            break
+
+        if budget_spent(tsuite):                    # timeout of trun/tsuite
+            cij.warn("rnr:timeout: budget spent { tsuite: %r }" % (
+                tsuite["ident"]
+            ))
+            ts_err += 1
+            break
+
+        WORKER.tsuite = tsuite              # Bounds the tcase by the budgets
+        tc_err = tcase_run(trun, tsuite, tcase)
+        del WORKER.tsuite
+
+        ts_err += tc_err                            # Accumulate errors
+
+        with TRUN_LOCK:
+            trun["progress"]["UNKN"] -= 1
+            trun["progress"][tcase["status"]] += 1  # Update progress
+
+            journal_append(trun, "tcase", tcase["ident"], {
+                "status": tcase["status"],
+                "attempts": tcase["attempts"],
+                "tries": tcase["tries"]
+            })
+            journal_append(trun, "trun", None, {
+                "progress": trun["progress"]
+            })
+
+            fail_fast(trun, tsuite)
+
+            eta = trun_eta(trun)
+            cij.events.publish("progress", None, {
+                "progress": trun["progress"],
+                "eta": eta
+            })
+            if eta is not None:
+                cij.emph("rnr:progress %r { eta: %02d:%02d:%02d }" % (
+                    trun["progress"], eta // 3600, eta % 3600 // 60, eta % 60
+                ))
+
+    if not ts_ent_err:
+        ts_err += tsuite_exit(trun, tsuite)
+
+    ts_err += ts_ent_err                            # Accumulate errors
+
+    tsuite["stamp"]["end"] = time.time()
+    tsuite_status(trun, tsuite, ts_err)
+
+    return ts_err
+
+
+def tcase_run(trun, tsuite, tcase):
+    """
+    Run the given testcase; its enter-hooks, script and exit-hooks, and set its
+    status, a failing testcase is run again up to tcase["retries"] times,
+    unless the budget is spent, and is FLAKY when a retry passes, it is
+    TIMEOUT when it, or one of its hooks, timed out
+
+    @returns 0 when the testcase passes, the number of errors otherwise
+    """
+
+    while True:
+        tcase["attempts"] += 1
+        tcase["timedout"] = False
+        cij.events.publish("tcase_start", tcase["ident"], {
+            "attempt": tcase["attempts"]
+        })
+
+        bgn = time.time()
+        tc_err = tcase_enter(trun, tsuite, tcase)
+        if not tc_err:
+            tc_err += script_run(trun, tcase)
+            tc_err += tcase_exit(trun, tsuite, tcase)
+
+        tcase["tries"].append({
+            "status": "TIMEOUT" if tcase["timedout"] else (
+                "FAIL" if tc_err else "PASS"
+            ),
+            "stamp": {"begin": bgn, "end": time.time()}
+        })
+
+        if not tc_err or tcase["attempts"] > tcase.get("retries", 0):
+            break
+
+        if budget_spent(tsuite):                    # Retry would be killed
+            break
+
+        cij.warn("rnr:tcase:retry { ident: %r, attempt: %d }" % (
+            tcase["ident"], tcase["attempts"] + 1
+        ))
+
+    tcase["status"] = "FAIL" if tc_err else "PASS"
+    if tcase["timedout"]:
+        tcase["status"] = "TIMEOUT"
+    elif not tc_err and tcase["attempts"] > 1:
+        tcase["status"] = "FLAKY"
+
+    return tc_err
+
+
+def budget_left(tsuite=None):
+    """
+    Returns the seconds left of the budgets, the 'timeout' of the trun and of
+    the given tsuite, counted from entering them, whichever ends first, None
+    when neither has a budget
+    """
+
+    ends = [DEADLINES[key] for key in [
+        ("trun", None), ("tsuite", tsuite["ident"] if tsuite else None)
+    ] if key in DEADLINES]
+
+    return min(ends) - time.time() if ends else None
+
+
+def budget_spent(tsuite=None):
+    """Returns True when the budget of the trun or the given tsuite is spent"""
+
+    left = budget_left(tsuite)
+
+    return left is not None and left <= 0
+
+
+def fail_fast(trun, tsuite):
+    """
+    Abort the trun, or the tsuite, when its number of failed testcases has
+    reached its 'fail_fast' limit, the caller must hold TRUN_LOCK
+    """
+
+    limit = trun.get("fail_fast")
+    failures = trun["progress"]["FAIL"] + trun["progress"]["TIMEOUT"]
+    if limit and failures >= limit and not trun.get("aborted"):
+        trun["aborted"] = True
+        journal_append(trun, "trun", None, {"aborted": True})
+        cij.warn("rnr:fail_fast: aborting trun { failures: %d }" % failures)
+
+    limit = tsuite.get("fail_fast")
+    failures = sum(
+        tc["status"] in ["FAIL", "TIMEOUT"] for tc in tsuite["testcases"]
+    )
+    if limit and failures >= limit and not tsuite.get("aborted"):
+        tsuite["aborted"] = True
+        cij.warn("rnr:fail_fast: aborting tsuite { ident: %r }" % (
+            tsuite["ident"]
+        ))
+
+
+def tsuite_status(trun, tsuite, ts_err):
+    """Set and journal the status of the given tsuite from its error count"""
+
+    tsuite["status"] = "FAIL" if ts_err else "PASS"
+    journal_append(trun, "tsuite", tsuite["ident"], {
+        "status": tsuite["status"],
+        "stamp": tsuite["stamp"],
+        "worker": tsuite["worker"],
+        "aborted": tsuite.get("aborted", False)
+    })
+
+    cij.emph("rnr:tsuite %r" % tsuite["status"], tsuite["status"] != "PASS")
+
+
+def targets_setup(trun, env_fpaths):
+    """
+    Creates and initializes a TARGET struct for each of the given env-files,
+    except for the env of the trun itself, as the trun-hooks serve that one
+
+    The trun-hooks are copied to each target such that e.g. the lock-hook
+    guards each target individually
+    """
+
+    targets = []
+
+    for enum, fpath in enumerate(env_fpaths):
+        if fpath == trun["conf"]["ENV_FPATH"]:
+            continue
+
+        target = Target()
+
+        target["env_fpath"] = fpath
+        target["ident"] = "target_%d_%s" % (
+            enum,
+            os.path.splitext(os.path.basename(fpath))[0]
+        )
+        target["res_root"] = os.sep.join([trun["aux_root"], target["ident"]])
+        target["aux_root"] = os.sep.join([target["res_root"], "_aux"])
+
+        target["evars"] = Evars(trun["evars"])
+
+        for med in ["enter", "exit"]:
+            for hook in trun["hooks"][med]:
+                target["hooks"][med].append(
+                    hook_setup(target, hook["fpath_orig"])
+                )
+
+        targets.append(target)
+
+    return targets
+
+
+def target_enter(trun, target):
+    """Triggers when entering the given target, runs the trun-enter-hooks"""
+
+    if trun["conf"]["VERBOSE"]:
+        cij.emph("rnr:target:enter { ident: %r }" % target["ident"])
+
+    target["stamp"]["begin"] = time.time()
+
+    WORKER.env_fpath = target["env_fpath"]
+
+    dirs_materialize(target)
+    hooks_materialize(target["hooks"])
+
+    rcode = 0
+    for hook in target["hooks"]["enter"]:
+        rcode = script_run(trun, hook)
+        if rcode:
+            break
+
+    del WORKER.env_fpath
+
+    if rcode:
+        target["status"] = "FAIL"
+        target_stop(trun, target)
+
+    if trun["conf"]["VERBOSE"]:
+        cij.emph("rnr:target:enter { rcode: %r } " % rcode, rcode)
+
+    return rcode
+
+
+def target_exit(trun, target):
+    """Triggers when exiting the given target, runs the trun-exit-hooks"""
+
+    if trun["conf"]["VERBOSE"]:
+        cij.emph("rnr:target:exit { ident: %r }" % target["ident"])
+
+    WORKER.env_fpath = target["env_fpath"]
+
+    rcode = 0
+    for hook in reversed(target["hooks"]["exit"]):
+        rcode = script_run(trun, hook)
+        if rcode:
+            break
+
+    del WORKER.env_fpath
+
+    target["status"] = "FAIL" if rcode else "PASS"
+    target_stop(trun, target)
+
+    if trun["conf"]["VERBOSE"]:
+        cij.emph("rnr:target:exit { rcode: %r } " % rcode, rcode)
+
+    return rcode
+
+
+def target_stop(trun, target):
+    """Stamps the end of the given target and journals its status"""
+
+    target["stamp"]["end"] = time.time()
+    target["wallc"] = target["stamp"]["end"] - target["stamp"]["begin"]
+
+    journal_append(trun, "target", target["ident"], {
+        "status": target["status"],
+        "wallc": target["wallc"],
+        "stamp": target["stamp"]
+    })
+
+
+def worker_run(trun, wid, fpath, tsuites, errors):
+    """
+    Worker 'wid' bound to the env at 'fpath', pops and runs testsuites from the
+    shared 'tsuites' list until it is empty, error-counts go into 'errors'
+    """
+
+    WORKER.wid = wid
+    WORKER.env_fpath = fpath
+
+    while True:
+        with TRUN_LOCK:
+            if tsuites and budget_spent():          # timeout of the trun
+                cij.warn("rnr:timeout: budget spent { trun }")
+                errors.append(1)
+                del tsuites[:]
+                break
+            if not tsuites or trun.get("aborted"):
+                break
+            tsuite = tsuites.pop(0)
+
+        if trun["conf"]["VERBOSE"]:
+            cij.emph("rnr:worker { env_fpath: %r, tsuite: %r }" % (
+                fpath, tsuite["ident"]
+            ))
+
+        ts_err = tsuite_run(trun, tsuite)
+
+        with TRUN_LOCK:
+            errors.append(ts_err)
+
+
+def trun_run_parallel(trun):
+    """
+    Dispatch the testsuites of the given trun to a pool of workers, the env
+    pool is assigned round-robin to 'JOBS' workers
+
+    The testsuites are modified in-place, thus the trun is persisted in the
+    same form as when running serially
+
+    @returns 0 when everything succeeds, the number of errors otherwise
+    """
+
+    pool = trun["conf"].get("ENV_POOL_FPATHS") or [trun["conf"]["ENV_FPATH"]]
+    jobs = trun["conf"].get("JOBS") or len(pool)
+
+    worker_envs = [pool[wid % len(pool)] for wid in range(jobs)]
+
+    target_envs = []
+    for fpath in worker_envs:
+        if fpath not in target_envs:
+            target_envs.append(fpath)
+
+    err = 0
+
+    trun["targets"] = targets_setup(trun, target_envs)
+    journal_append(trun, "trun", None, {
+        "targets": struct_to_dict(trun["targets"])
+    })
+
+    targets = []
+    for target in trun["targets"]:
+        if target_enter(trun, target):
+            cij.err("rnr:target:enter FAILED { ident: %r }" % target["ident"])
+            err += 1
+            continue
+
+        targets.append(target)
+
+    entered = [trun["conf"]["ENV_FPATH"]] + [t["env_fpath"] for t in targets]
+
+    tsuites = sorted(                           # Longest first
+        trun["testsuites"],
+        key=lambda ts: tsuite_estimate(trun, ts),
+        reverse=True
+    )
+    errors = []
+    workers = []
+    for wid, fpath in enumerate(worker_envs):
+        if fpath not in entered:
+            continue
+
+        worker = threading.Thread(
+            target=worker_run,
+            args=(trun, wid, fpath, tsuites, errors)
+        )
+        worker.daemon = True
+        worker.start()
+        workers.append(worker)
+
+    for worker in workers:
+        while worker.is_alive():        # Join with timeout to allow Ctrl+C
+            worker.join(0.5)
+
+    for target in reversed(targets):
+        err += target_exit(trun, target)
+
+    return err + sum(errors)
+
+
+def trun_resume(conf):
+    """
+    Load the trun of an interrupted run, in conf["OUTPUT"], for resumption
+
+    The trun.yml is removed, as the journal is continued, from its last
+    complete event, and trun.yml is materialized again when the run ends, the
+    progress is recounted from the status of the testcases
+    """
 
     fpath = yml_fpath(conf["OUTPUT"])
-    if os.path.exists(fpath):   # YAML exists, we exit, it might be RUNNING!
-        cij.err("main:FAILED { fpath: %r }, exists" % fpath)
-        return 1
 
-    trun = trun_setup(conf)         # Construct 'trun' from 'conf'
+    trun = trun_from_file(fpath)
     if not trun:
+        cij.err("rnr:trun_resume: no trun in OUTPUT: %r" % conf["OUTPUT"])
+        return None
+
+    selection = trun["conf"].get("TESTCASE_SELECTION")
+    trun["conf"] = copy.deepcopy(conf)
+    trun["conf"]["TESTCASE_SELECTION"] = selection
+
+    if os.path.exists(journal_fpath(conf["OUTPUT"])):
+        journal_trim(journal_fpath(conf["OUTPUT"]))
+    else:
+        journal_setup(trun)
+
+    if os.path.exists(fpath):
+        os.remove(fpath)
+
+    trun["progress"] = dict((key, 0) for key in Trun()["progress"])
+    for tsuite in trun["testsuites"]:
+        tsuite["aborted"] = False
+        for tcase in tsuite["testcases"]:
+            trun["progress"][tcase["status"]] += 1
+
+    trun["status"] = "UNKN"
+    trun["aborted"] = False
+    journal_append(trun, "trun", None, {
+        "conf": trun["conf"],
+        "progress": trun["progress"],
+        "status": trun["status"],
+        "aborted": trun["aborted"]
+    })
+
+    return trun
+
+
+def main(conf):
+    """CIJ Test Runner main entry point"""
+
+    DURATIONS.clear()               # Load estimates of tcase durations
+    DURATIONS.update(cij.history.durations_load(
+        (conf.get("HISTORY") or []) + [
+            fpath for fpath in [conf.get("HISTORY_STORE")]
+            if fpath and os.path.exists(fpath)
+        ]
+    ))
+    if conf.get("TIME_BUDGET") and not conf.get("RESUME") and not DURATIONS:
+        cij.err("main:FAILED { TIME_BUDGET: %r }, no history to estimate "
+                "from, see --history" % conf["TIME_BUDGET"])
         return 1
 
-    trun_to_file(trun)              # Persist trun
-    trun_to_junitfile(trun)         # Persist as jUNIT XML
-    trun_emph(trun)                 # Print trun before run
+    if conf.get("RESUME"):
+        trun = trun_resume(conf)    # Load 'trun' of an interrupted run
+        if not trun:
+            return 1
+    else:
+        if trun_exists(conf["OUTPUT"]):     # We exit, it might be RUNNING!
+            cij.err("main:FAILED { OUTPUT: %r }, has trun" % conf["OUTPUT"])
+            return 1
 
-    tr_err = 0
-    tr_ent_err = trun_enter(trun)
-    for tsuite in (ts for ts in trun["testsuites"] if not tr_ent_err):
+        trun = trun_setup(conf)     # Construct 'trun' from 'conf'
+        if not trun:
+            return 1
 
-        ts_err = 0
-        ts_ent_err = tsuite_enter(trun, tsuite)
-        for tcase in (tc for tc in tsuite["testcases"] if not ts_ent_err):
+    if conf.get("EVENTS") and cij.events.start(conf["EVENTS"]):
+        cij.err("main:FAILED { EVENTS: %r }" % conf["EVENTS"])
+        return 1
 
-            tc_err = 0
+    if not conf.get("RESUME"):
+        try:
+            journal_setup(trun)     # Persist trun, changes are journaled
+        except OSError as exc:
+            cij.err("main:FAILED { journal: %r }" % exc)
+            cij.events.stop()
+            return 1
 
-            tcase_match = conf.get("TESTCASE_MATCH", None)
-            if not (tcase_match and tcase_match not in tcase["name"]):
-                tc_err = tcase_enter(trun, tsuite, tcase)
-                if not tc_err:
-                    tc_err += script_run(trun, tcase)
-                    tc_err += tcase_exit(trun, tsuite, tcase)
+    DEADLINES.clear()
 
-                tcase["status"] = "FAIL" if tc_err else "PASS"
-                trun["progress"]["UNKN"] -= 1
+    if conf.get("CACHE_CLEAR") and conf.get("CACHE"):
+        cij.cache.clear(conf["CACHE"])
 
-            trun["progress"][tcase["status"]] += 1  # Update progress
+    if conf.get("SHARD") and not conf.get("RESUME"):
+        trun["conf"]["TESTCASE_SELECTION"] = trun_select_shard(
+            trun, conf["SHARD"][0], conf["SHARD"][1]
+        )
+        journal_append(trun, "trun", None, {"conf": trun["conf"]})
 
-            ts_err += tc_err                        # Accumulate errors
+    if conf.get("TIME_BUDGET") and not conf.get("RESUME"):
+        trun["conf"]["TESTCASE_SELECTION"] = trun_select_budget(
+            trun, conf["TIME_BUDGET"]
+        )
+        journal_append(trun, "trun", None, {"conf": trun["conf"]})
 
-            trun_to_file(trun)                      # Persist trun
-            trun_to_junitfile(trun)                 # Persist as jUNIT XML
+    trun_emph(trun)                 # Print trun before run
 
-        if not ts_ent_err:
-            ts_err += tsuite_exit(trun, tsuite)
+    cij.events.publish("trun_start", None, {
+        "progress": trun["progress"],
+        "eta": trun_eta(trun)
+    })
 
-        ts_err += ts_ent_err                        # Accumulate errors
-        tr_err += ts_err
+    tr_err = 0
+    tr_ent_err = trun_enter(trun)
+    if not tr_ent_err and (conf.get("JOBS") or 1) > 1:
+        tr_err += trun_run_parallel(trun)
+    elif not tr_ent_err:
+        for tsuite in trun["testsuites"]:
+            if trun.get("aborted"):                     # fail_fast
+                break
 
-        tsuite["status"] = "FAIL" if ts_err else "PASS"
+            if budget_spent():                          # timeout of the trun
+                cij.warn("rnr:timeout: budget spent { trun }")
+                tr_err += 1
+                break
 
-        cij.emph("rnr:tsuite %r" % tsuite["status"], tsuite["status"] != "PASS")
+            tr_err += tsuite_run(trun, tsuite)
 
     if not tr_ent_err:
         trun_exit(trun)
@@ -682,10 +2074,29 @@ def main(conf):
     trun["status"] = "FAIL" if tr_err else "PASS"
 
     trun["stamp"]["end"] = int(time.time()) + 1         # END STAMP
-    trun_to_file(trun)                                  # PERSIST
-    trun_to_junitfile(trun)                             # Persist as jUNIT XML
+    journal_append(trun, "trun", None, {
+        "status": trun["status"],
+        "stamp": trun["stamp"]
+    })
+
+    bashd_stop_all()
+    ssh_control_stop_all()                  # When entering the trun failed
+    cij.events.stop()
+
+    trun_to_file(trun)                                  # Materialize trun
+    trun_to_junitfile(                                  # Persist as jUNIT XML
+        trun,
+        system_out=conf.get("JUNIT_SYSTEM_OUT")
+    )
+    cij.results.trun_to_dbfile(trun)                    # Compact results
+
+    if conf.get("TRACE"):
+        cij.trace.trun_to_tracefile(trun, conf["TRACE"])
+
+    if conf.get("HISTORY_STORE"):
+        cij.history.store_update(conf["HISTORY_STORE"], trun)
 
     cij.emph("rnr:main:progress %r" % trun["progress"])
     cij.emph("rnr:main:trun %r" % trun["status"], trun["status"] != "PASS")
 
-    return trun["progress"]["FAIL"]
+    return trun["progress"]["FAIL"] + trun["progress"]["TIMEOUT"]
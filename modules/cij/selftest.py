@@ -0,0 +1,271 @@
+"""
+    Helpers for testcases verifying the runner itself
+
+    The testcases run cij_runner, and cij_merge, on the testplans and
+    testcases in $CIJ_TESTFILES/selftest and inspect their output, the
+    trun.yml, the journal, the events published and the record of which
+    fixture testcases ran, kept in the file at SELFTEST_RUNS, and run
+    cij_reporter on the output
+"""
+import subprocess
+import threading
+import socket
+import shutil
+import json
+import re
+import stat
+import time
+import sys
+import os
+import cij.yml
+import cij
+
+CONNECT_TIMEOUT = 30.0
+POSTPROCESSED = re.compile(r"rprtr:postprocess \{ ([^}]*) \}")
+
+
+def fixtures():
+    """@returns path to the selftest fixtures"""
+
+    return os.sep.join([cij.ENV.get("CIJ_TESTFILES"), "selftest"])
+
+
+def runner(args, runs_fpath=None, cwd=None, log_fpath=None):
+    """
+    Runs cij_runner with the given 'args', with the fixture testcases,
+    testplans and testsuites, in the working directory 'cwd', writing its
+    output to 'log_fpath', when given
+
+    @returns rcode of the runner
+    """
+
+    fxt_root = fixtures()
+
+    env = dict(os.environ)
+    env["CIJ_TESTCASES"] = os.sep.join([fxt_root, "testcases"])
+    env["CIJ_TESTPLANS"] = os.sep.join([fxt_root, "testplans"])
+    env["CIJ_TESTSUITES"] = os.sep.join([fxt_root, "testsuites"])
+    env["CIJ_HOOKS"] = os.sep.join([fxt_root, "hooks"])
+    if runs_fpath:
+        env["SELFTEST_RUNS"] = runs_fpath
+
+    cmd = [
+        sys.executable,
+        os.sep.join([cij.ENV.get("CIJ_ROOT"), "bin", "cij_runner"])
+    ] + args
+
+    cij.emph("cij.selftest.runner: %r" % " ".join(cmd))
+
+    if log_fpath is None:
+        return subprocess.call(cmd, env=env, cwd=cwd)
+
+    with open(log_fpath, "w") as log_fd:
+        return subprocess.call(
+            cmd, env=env, cwd=cwd, stdout=log_fd, stderr=subprocess.STDOUT
+        )
+
+
+def run(res_root, plan, args=None, runs_fpath=None):
+    """
+    Runs cij_runner on the fixture testplan 'plan' with the fixture env,
+    storing output in 'res_root', which is removed first
+
+    @returns rcode of the runner and the trun.yml as a dict, None when the
+    runner did not write it
+    """
+
+    fxt_root = fixtures()
+
+    if os.path.exists(res_root):
+        shutil.rmtree(res_root)
+
+    rcode = runner([
+        os.sep.join([fxt_root, "testplans", plan]),
+        os.sep.join([fxt_root, "env.sh"]),
+        "--output", res_root
+    ] + (args if args else []), runs_fpath)
+
+    return rcode, trun_load(res_root)
+
+
+def resume(res_root, runs_fpath=None):
+    """
+    Runs cij_runner resuming the interrupted run in 'res_root'
+
+    @returns rcode of the runner and the trun.yml as a dict, None when the
+    runner did not write it
+    """
+
+    rcode = runner(["--resume", res_root], runs_fpath)
+
+    return rcode, trun_load(res_root)
+
+
+def merge(res_root, shard_roots):
+    """
+    Runs cij_merge on the outputs of the shards in 'shard_roots', storing the
+    merged output in 'res_root', which is removed first
+
+    @returns rcode of cij_merge and the merged trun.yml as a dict, None when
+    it did not write it
+    """
+
+    if os.path.exists(res_root):
+        shutil.rmtree(res_root)
+
+    cmd = [
+        sys.executable,
+        os.sep.join([cij.ENV.get("CIJ_ROOT"), "bin", "cij_merge"]),
+        res_root
+    ] + shard_roots
+
+    cij.emph("cij.selftest.merge: %r" % " ".join(cmd))
+    rcode = subprocess.call(cmd)
+
+    return rcode, trun_load(res_root)
+
+
+def reporter(args, log_fpath=None):
+    """
+    Runs cij_reporter with the given 'args', writing its output to
+    'log_fpath', when given
+
+    @returns rcode of the reporter
+    """
+
+    cmd = [
+        sys.executable,
+        os.sep.join([cij.ENV.get("CIJ_ROOT"), "bin", "cij_reporter"])
+    ] + args
+
+    cij.emph("cij.selftest.reporter: %r" % " ".join(cmd))
+
+    if log_fpath is None:
+        return subprocess.call(cmd)
+
+    with open(log_fpath, "w") as log_fd:
+        return subprocess.call(cmd, stdout=log_fd, stderr=subprocess.STDOUT)
+
+
+def trun_load(res_root):
+    """@returns the trun.yml in 'res_root' as a dict, None when missing"""
+
+    fpath = os.sep.join([res_root, "trun.yml"])
+    if not os.path.exists(fpath):
+        return None
+
+    with open(fpath) as yml_fd:
+        return cij.yml.load(yml_fd)
+
+
+def tcases(trun, tsuite_name=None):
+    """
+    @returns list of the testcases of all testsuites in 'trun', or of those
+    named 'tsuite_name'
+    """
+
+    return [case for tsuite in trun["testsuites"] for case in
+            tsuite["testcases"] if tsuite_name in [None, tsuite["name"]]]
+
+
+def tcase(trun, fname, tsuite_name=None):
+    """
+    @returns the first testcase with filename 'fname' in 'trun', or in the
+    testsuites named 'tsuite_name'
+    """
+
+    return [
+        case for case in tcases(trun, tsuite_name) if case["fname"] == fname
+    ][0]
+
+
+def subscribe(path, events):
+    """
+    Starts collecting the events published by a run at 'path', a named pipe,
+    or the socket of the run, which is connected to once the run creates it;
+    the events are appended to 'events', lines which are not a JSON object,
+    e.g. truncated, are appended as None
+
+    @returns the collecting thread, it ends when the run stops publishing
+    """
+
+    def collect():
+        """Read events until the run closes the pipe or socket"""
+
+        if os.path.exists(path) and stat.S_ISFIFO(os.stat(path).st_mode):
+            stream = open(path, "rb")
+        else:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            deadline = time.time() + CONNECT_TIMEOUT
+            while True:
+                try:
+                    sock.connect(path)
+                    break
+                except socket.error:
+                    if time.time() > deadline:
+                        cij.err("cij.selftest.subscribe: no socket: %r" % path)
+                        sock.close()
+                        return
+
+                    time.sleep(0.01)
+
+            stream = sock.makefile("rb")
+            sock.close()
+
+        try:
+            for line in stream:
+                try:
+                    events.append(json.loads(line.decode("utf-8")))
+                except ValueError:
+                    events.append(None)
+        finally:
+            stream.close()
+
+    collector = threading.Thread(target=collect)
+    collector.daemon = True
+    collector.start()
+
+    return collector
+
+
+def runs(runs_fpath):
+    """@returns list of fixture testcase names, one per run of them"""
+
+    if not os.path.exists(runs_fpath):
+        return []
+
+    with open(runs_fpath) as runs_fd:
+        return runs_fd.read().split()
+
+
+def postprocessed(log_fpath):
+    """
+    @returns the counts, as a dict, of the last postprocessing of a report
+    logged by cij_reporter in 'log_fpath', None when not logged
+    """
+
+    counts = None
+    with open(log_fpath) as log_fd:
+        for line in log_fd:
+            match = POSTPROCESSED.search(line)
+            if match:
+                counts = dict(
+                    (key, int(val)) for key, val in (
+                        pair.split(": ") for pair in match.group(1).split(", ")
+                    )
+                )
+
+    return counts
+
+
+def expect(descr, value, expected):
+    """@returns True when 'value' equals 'expected', logging a mismatch"""
+
+    if value == expected:
+        cij.good("cij.selftest: %s: %r" % (descr, value))
+        return True
+
+    cij.err("cij.selftest: %s: got: %r, expected: %r" % (
+        descr, value, expected
+    ))
+    return False
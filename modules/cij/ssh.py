@@ -8,6 +8,9 @@ Functions:
     ssh.pull()      - Pull file from TARGET by SSH
     ssh.wait()      - Wait for TARGET get ready until timeout
     ssh.reboot()    - Reboot TARGET and wait for TARGET get ready
+    ssh.control_start() - Start multiplexing the SSH connections of a trun
+    ssh.control_stop()  - Stop the connections multiplexed by control_start()
+    ssh.control_exit()  - Stop the multiplexed connection to TARGET
 
 Require:
     SSH_KEY         - SSH key of TARGET
@@ -16,8 +19,20 @@ Require:
     SSH_HOST        - Name or IP of TARGET
     SSH_CMD_TIME    - Measure time of SSH command
     SSH_CMD_TIMEOUT - Timeout for SSH command
+
+Optional:
+    SSH_CONTROL_PATH    - Path to the control socket of a connection, set by
+                          the runner, see control_start()
+    SSH_CONTROL_PERSIST - Seconds an idle multiplexed connection is kept open
+
+When SSH_CONTROL_PATH is set, commands, pushes and pulls to the same TARGET
+share a single connection, the first of them opens it as an OpenSSH
+ControlMaster, and the rest skip the handshake
 """
+import tempfile
+import shutil
 import time
+import os
 import cij.util
 import cij
 
@@ -26,7 +41,9 @@ REQUIRED = ["USER", "HOST"]
 EXPORTED = []
 
 DEFAULTS = {"PORT": "22", "CMD_TIME": "1"}
-OPTIONAL = ["CMD_TIMEOUT", "KEY"]
+OPTIONAL = ["CMD_TIMEOUT", "KEY", "CONTROL_PATH", "CONTROL_PERSIST"]
+
+CONTROL_PERSIST = "600"
 
 
 def env():
@@ -51,6 +68,91 @@ def env():
     return 0
 
 
+def control_args():
+    """
+    Returns the ssh options multiplexing connections over the control socket
+    at SSH_CONTROL_PATH, no options when it is not set
+    """
+
+    if not cij.ENV.get("SSH_CONTROL_PATH"):
+        return []
+
+    return [
+        "-o", "ControlMaster=auto",
+        "-o", "ControlPath=%s" % cij.ENV.get("SSH_CONTROL_PATH"),
+        "-o", "ControlPersist=%s" % cij.ENV.get(
+            "SSH_CONTROL_PERSIST", CONTROL_PERSIST
+        )
+    ]
+
+
+def control_start():
+    """
+    Start multiplexing the SSH connections of the scripts of a trun, that is,
+    create a directory for their control sockets and export SSH_CONTROL_PATH,
+    a socket per TARGET, to the scripts
+
+    @returns the path to the directory, None when SSH_CONTROL_PATH is set
+    """
+
+    if "SSH_CONTROL_PATH" in cij.ENV:
+        return None
+
+    dpath = tempfile.mkdtemp(prefix="cij_ssh_")     # Short, sockets are <108
+    cij.ENV["SSH_CONTROL_PATH"] = os.sep.join([dpath, "%C"])
+
+    return dpath
+
+
+def control_stop(dpath):
+    """
+    Stop the multiplexed connections of the control sockets in 'dpath', of a
+    control_start(), and remove it, @returns the number of connections stopped
+    """
+
+    count = 0
+    for fname in os.listdir(dpath):
+        rcode, _, _ = cij.util.execute([
+            "ssh", "-o", "ControlPath=%s" % os.sep.join([dpath, fname]),
+            "-O", "exit", "cij"
+        ], shell=False, echo=False)
+        count += not rcode
+
+    shutil.rmtree(dpath, ignore_errors=True)
+    if cij.ENV.get("SSH_CONTROL_PATH") == os.sep.join([dpath, "%C"]):
+        del cij.ENV["SSH_CONTROL_PATH"]
+
+    return count
+
+
+def control_exit():
+    """
+    Stop the multiplexed connection to TARGET, when there is one, such that
+    the next command connects anew, e.g. as TARGET reboots
+    """
+
+    if env():
+        cij.err("cij.ssh.control_exit: Invalid SSH environment")
+        return 1
+
+    if not cij.ENV.get("SSH_CONTROL_PATH"):
+        return 0
+
+    args = control_args()
+
+    if cij.ENV.get("SSH_PORT"):
+        args.append("-p")
+        args.append(cij.ENV.get("SSH_PORT"))
+
+    args.append("-O")
+    args.append("exit")
+    args.append("@".join([cij.ENV.get("SSH_USER"), cij.ENV.get("SSH_HOST")]))
+
+    cij.util.execute(["ssh"] + args, shell=False, echo=False)
+
+    return 0
+
+
 def command(cmd, shell=True, echo=True, suffix=None):
     """SSH: Run the given command over SSH as defined in environment"""
 
@@ -79,6 +181,8 @@ def command(cmd, shell=True, echo=True, suffix=None):
         args.append("-p")
         args.append(cij.ENV.get("SSH_PORT"))
 
+    args += control_args()
+
     args.append("@".join([cij.ENV.get("SSH_USER"), cij.ENV.get("SSH_HOST")]))
 
     wrapped = prefix + args + ["'%s'" % " ".join(cmd)]
@@ -105,6 +209,8 @@ def push(src, dst, folder=False):
         args.append("-P")
         args.append(cij.ENV.get("SSH_PORT"))
 
+    args += control_args()
+
     if folder:
         args.append("-r")
 
@@ -131,6 +237,8 @@ def pull(src, dst, folder=False):
         args.append("-P")
         args.append(cij.ENV.get("SSH_PORT"))
 
+    args += control_args()
+
     if folder:
         args.append("-r")
 
@@ -193,6 +301,7 @@ def reboot(timeout=300, extra=""):
         cij.ENV["SSH_CMD_TIMEOUT"] = "3"
         cij.info("cij.ssh.reboot: Target: %s" % cij.ENV.get("SSH_HOST"))
         command(["reboot %s" % extra], shell=True, echo=False)
+        control_exit()                  # The connection dies with the target
 
         while True:
             time_current = time.time()
@@ -3,12 +3,12 @@
 """
 import sys
 import os
-import yaml
 import cij.board
 import cij.block
 import cij.lnvm
 import cij.util
 import cij.ssh
+import cij.yml
 import cij
 
 
@@ -133,8 +133,8 @@ def command_to_struct(cmd):
 
             lines.append(line)
 
-        struct = yaml.safe_load("\n".join(lines))
-    except (yaml.YAMLError) as exc:
+        struct = cij.yml.load("\n".join(lines))
+    except (cij.yml.YAMLError) as exc:
         cij.err("could not parse stdout as yaml, exc: %r" % exc)
 
     return rcode, stdout, stderr, struct
@@ -0,0 +1,184 @@
+"""
+trace.py    - Timeline of a test run in the Chrome trace event format
+
+Functions:
+    trace.trun_to_trace()       - Returns the trace events of a trun
+    trace.trun_to_tracefile()   - Write the trace of a trun to file
+
+The trace is derived from the stamps of the trun, its testsuites, targets and
+scripts, it opens in Perfetto (ui.perfetto.dev) and chrome://tracing. Each
+worker of a parallel run has its own track, the trun-hooks, those of the
+targets, and a serial run are on the 'main' track. A retried testcase has a
+span per attempt.
+"""
+import json
+import cij
+
+PID = 1
+
+
+def span(name, cat, tid, begin, end, args=None):
+    """Returns a complete-event, begin and end are given in seconds"""
+
+    return {
+        "name": name,
+        "cat": cat,
+        "ph": "X",
+        "pid": PID,
+        "tid": tid,
+        "ts": begin * 1000000.0,
+        "dur": max(end - begin, 0) * 1000000.0,
+        "args": args or {}
+    }
+
+
+def scripts_span(name, cat, tid, scripts, args=None):
+    """Returns a span covering the given scripts, None when none of them ran"""
+
+    stamps = [script["stamp"] for script in scripts if script.get("stamp")]
+    if not stamps:
+        return None
+
+    return span(
+        name,
+        cat,
+        tid,
+        min(stamp["begin"] for stamp in stamps),
+        max(stamp["end"] for stamp in stamps),
+        args
+    )
+
+
+def script_span(script, cat, tid):
+    """Returns a span of the given script, None when it did not run"""
+
+    args = {"rcode": script["rcode"]}
+    if script.get("rusage"):
+        args.update(script["rusage"])
+
+    return scripts_span(script["fname"], cat, tid, [script], args)
+
+
+def hooks_spans(name, cat, tid, hooks):
+    """Returns a span covering the given hooks followed by a span per hook"""
+
+    return [scripts_span(name, cat, tid, hooks)] + [
+        script_span(hook, "hook", tid) for hook in hooks
+    ]
+
+
+def trun_to_trace(trun):
+    """Returns the list of trace events of the given trun"""
+
+    events = []
+    tracks = {0: "main"}
+
+    stamp = trun.get("stamp") or {}
+    if stamp.get("begin") and stamp.get("end"):
+        events.append(span(
+            "trun", "trun", 0, stamp["begin"], stamp["end"],
+            {"status": trun["status"], "progress": trun["progress"]}
+        ))
+
+    events += hooks_spans("trun:enter", "trun", 0, trun["hooks"]["enter"])
+
+    for target in trun.get("targets") or []:
+        tstamp = target.get("stamp") or {}
+        if tstamp.get("begin") and tstamp.get("end"):
+            events.append(span(
+                target["ident"], "target", 0, tstamp["begin"], tstamp["end"],
+                {"status": target["status"], "env": target["env_fpath"]}
+            ))
+
+        events += hooks_spans(
+            "%s:enter" % target["ident"], "target", 0,
+            target["hooks"]["enter"]
+        )
+        events += hooks_spans(
+            "%s:exit" % target["ident"], "target", 0, target["hooks"]["exit"]
+        )
+
+    for tsuite in trun["testsuites"]:
+        tid = 0
+        if tsuite.get("worker") is not None:
+            tid = tsuite["worker"] + 1
+            tracks[tid] = "worker %d" % tsuite["worker"]
+
+        tstamp = tsuite.get("stamp") or {}
+        if tstamp.get("begin") and tstamp.get("end"):
+            events.append(span(
+                tsuite["ident"], "tsuite", tid,
+                tstamp["begin"], tstamp["end"],
+                {"status": tsuite["status"]}
+            ))
+
+        events += hooks_spans(
+            "tsuite:enter", "tsuite", tid, tsuite["hooks"]["enter"]
+        )
+
+        for tcase in tsuite["testcases"]:
+            scripts = tcase["hooks"]["enter"] + [tcase] + \
+                tcase["hooks"]["exit"]
+
+            tries = tcase.get("tries") or []
+            if tries:
+                events.append(span(
+                    tcase["ident"], "tcase", tid,
+                    tries[0]["stamp"]["begin"], tries[-1]["stamp"]["end"],
+                    {"status": tcase["status"], "attempts": len(tries)}
+                ))
+            else:
+                events.append(scripts_span(
+                    tcase["ident"], "tcase", tid, scripts,
+                    {"status": tcase["status"]}
+                ))
+
+            events += [
+                span(
+                    "%s #%d" % (tcase["ident"], num), "attempt", tid,
+                    attempt["stamp"]["begin"], attempt["stamp"]["end"],
+                    {"status": attempt["status"]}
+                ) for num, attempt in enumerate(tries, 1) if len(tries) > 1
+            ]
+            events += [
+                script_span(script, "script" if script is tcase else "hook", tid)
+                for script in scripts
+            ]
+
+        events += hooks_spans(
+            "tsuite:exit", "tsuite", tid, tsuite["hooks"]["exit"]
+        )
+
+    events += hooks_spans("trun:exit", "trun", 0, trun["hooks"]["exit"])
+
+    events.append({
+        "name": "process_name", "ph": "M", "pid": PID, "tid": 0,
+        "args": {"name": "cijoe: %s" % trun["conf"].get("TESTPLAN_NAME")}
+    })
+    for tid in sorted(tracks):
+        events.append({
+            "name": "thread_name", "ph": "M", "pid": PID, "tid": tid,
+            "args": {"name": tracks[tid]}
+        })
+        events.append({
+            "name": "thread_sort_index", "ph": "M", "pid": PID, "tid": tid,
+            "args": {"sort_index": tid}
+        })
+
+    return [event for event in events if event]
+
+
+def trun_to_tracefile(trun, fpath):
+    """Write the trace of the given trun to 'fpath', @returns 0 on success"""
+
+    try:
+        with open(fpath, "w") as trace_fd:
+            json.dump(
+                {"traceEvents": trun_to_trace(trun), "displayTimeUnit": "ms"},
+                trace_fd
+            )
+    except (IOError, OSError) as exc:
+        cij.err("cij.trace: failed writing trace: %r" % exc)
+        return 1
+
+    return 0
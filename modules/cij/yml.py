@@ -0,0 +1,39 @@
+"""
+yml.py      - YAML loading and dumping for testplans, truns and stores
+
+Functions:
+    yml.load()      - Returns the struct parsed from a YAML stream or string
+    yml.dump()      - Returns, or writes to a stream, the YAML of a struct
+
+The libyaml based CSafeLoader and CDumper are used when PyYAML is built with
+libyaml, they are an order of magnitude faster than the pure-Python Loader and
+Dumper, which are used otherwise. The parsed structs are the same either way,
+the dumped YAML loads to the same struct, however, its layout, e.g. the
+folding of long scalars and the quoting of strings, can differ between the two,
+so do not compare dumped YAML textually.
+"""
+import yaml
+
+try:
+    from yaml import CSafeLoader as Loader, CDumper as Dumper
+    LIBYAML = True
+except ImportError:
+    from yaml import SafeLoader as Loader, Dumper
+    LIBYAML = False
+
+YAMLError = yaml.YAMLError
+
+
+def load(stream):
+    """Returns the struct parsed from 'stream', a file or a string"""
+
+    return yaml.load(stream, Loader=Loader)
+
+
+def dump(struct, stream=None, **kwargs):
+    """
+    Returns the YAML of 'struct' as a string, or writes it to 'stream' when
+    given, the kwargs are those of yaml.dump()
+    """
+
+    return yaml.dump(struct, stream, Dumper=Dumper, **kwargs)
@@ -37,13 +37,23 @@ lock::exit_qemu() {
   return 0
 }
 
+lock::path() {
+  if [[ -v QEMU_HOST && -n "$QEMU_HOST" ]]; then
+    echo "$QEMU_HOST:$QEMU_GUESTS/$QEMU_GUEST_NAME/CIJOE_LOCK"
+    return 0
+  fi
+
+  echo "/tmp/CIJOE_LOCK_${SSH_HOST}_${SSH_PORT:-22}"
+}
+
 lock::enter() {
   if [[ -v QEMU_HOST && -n "$QEMU_HOST" ]]; then
     lock::enter_qemu;
     return $?;
   fi
 
-  local lock_file="/tmp/CIJOE_LOCK"
+  local lock_file
+  lock_file=$(lock::path)
 
   if [[ -f "$lock_file" ]]; then
     cij::err "lock::enter_localhost: failed: lock_file: '$lock_file' exists"
@@ -64,7 +74,8 @@ lock::exit() {
     return $?;
   fi
 
-  local lock_file="/tmp/CIJOE_LOCK"
+  local lock_file
+  lock_file=$(lock::path)
 
   if ! rm "$lock_file"; then
     cij::err "lock::exit_localhost: failed releasing lock_file: '$lock_file'"
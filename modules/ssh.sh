@@ -7,6 +7,7 @@
 # ssh::env       - Sets default vars for ssh wrapping
 # ssh::cmd <CMD> - Execute <CMD> using optional "SSH_CMD_TIMEOUT"
 # ssh::shell     - Get the regular shell using current environment
+# ssh::control_exit - Stop the multiplexed connection to SSH_HOST
 #
 # REQUIRED variables:
 #
@@ -31,6 +32,12 @@
 # SSH_CMD_QUIET         - When 1, do the following
 #                         * SSH_CMD_TIME=0
 #                         * SSH_CMD_ECHO=0
+# SSH_CONTROL_PATH      - Path to the control socket of the connection, when
+#                         set, commands, pushes and pulls share a connection,
+#                         the runner sets it for the duration of a test run,
+#                         set it empty in the env to disable multiplexing
+# SSH_CONTROL_PERSIST   - Seconds an idle multiplexed connection is kept open
+#                         DEFAULT=600
 
 ssh::env() {
   if [[ -v SSH_KEY && -n "$SSH_KEY" && ! -f "$SSH_KEY" ]]; then
@@ -50,6 +57,7 @@ ssh::env() {
   : "${SSH_CMD_ECHO:=1}"
   : "${SSH_CMD_TIME:=1}"
   : "${SSH_CMD_TIMEOUT:=0}"
+  : "${SSH_CONTROL_PERSIST:=600}"
 
   if [[ -v SSH_CMD_QUIET && $SSH_CMD_QUIET -eq 1 ]]; then
     SSH_CMD_ECHO=0
@@ -90,6 +98,10 @@ ssh::cmd() {
     _args="$_args -o UserKnownHostsFile=/dev/null"
     _args="$_args -o StrictHostKeyChecking=no"
   fi
+  if [[ -v SSH_CONTROL_PATH && -n "$SSH_CONTROL_PATH" ]]; then  # MUX
+    _args="$_args -o ControlMaster=auto -o ControlPath=$SSH_CONTROL_PATH"
+    _args="$_args -o ControlPersist=$SSH_CONTROL_PERSIST"
+  fi
   if [[ -v SSH_EXTRA_ARGS ]]; then                              # Extras
     _args="$_args $SSH_EXTRA_ARGS"
   fi
@@ -132,6 +144,10 @@ ssh::shell() {
     _args="$_args -o UserKnownHostsFile=/dev/null"
     _args="$_args -o StrictHostKeyChecking=no"
   fi
+  if [[ -v SSH_CONTROL_PATH && -n "$SSH_CONTROL_PATH" ]]; then  # MUX
+    _args="$_args -o ControlMaster=auto -o ControlPath=$SSH_CONTROL_PATH"
+    _args="$_args -o ControlPersist=$SSH_CONTROL_PERSIST"
+  fi
   _args="$_args $SSH_USER@$SSH_HOST"                            # USER and HOST
 
   if [[ -v SSH_EXTRA_ARGS ]]; then
@@ -176,6 +192,10 @@ ssh::push() {
     _args="$_args -o UserKnownHostsFile=/dev/null"
     _args="$_args -o StrictHostKeyChecking=no"
   fi
+  if [[ -v SSH_CONTROL_PATH && -n "$SSH_CONTROL_PATH" ]]; then  # MUX
+    _args="$_args -o ControlMaster=auto -o ControlPath=$SSH_CONTROL_PATH"
+    _args="$_args -o ControlPersist=$SSH_CONTROL_PERSIST"
+  fi
 
   _cmd="scp $_args $_src ${SSH_USER}@${SSH_HOST}:$_dst"
   if [[ -v SSH_CMD_ECHO && $SSH_CMD_ECHO -eq 1 ]]; then         # Print CMD
@@ -215,12 +235,32 @@ ssh::pull() {
     _args="$_args -o UserKnownHostsFile=/dev/null"
     _args="$_args -o StrictHostKeyChecking=no"
   fi
+  if [[ -v SSH_CONTROL_PATH && -n "$SSH_CONTROL_PATH" ]]; then  # MUX
+    _args="$_args -o ControlMaster=auto -o ControlPath=$SSH_CONTROL_PATH"
+    _args="$_args -o ControlPersist=$SSH_CONTROL_PERSIST"
+  fi
 
   _cmd="scp $_args ${SSH_USER}@${SSH_HOST}:$_src $_dst"
 
   eval "$_cmd"
 }
 
+ssh::control_exit() {
+  if ! ssh::env; then
+    cij::err "ssh::control_exit: invalid environment"
+    return 1
+  fi
+
+  if [[ ! -v SSH_CONTROL_PATH || -z "$SSH_CONTROL_PATH" ]]; then
+    return 0
+  fi
+
+  $SSH_BIN -o ControlPath="$SSH_CONTROL_PATH" -p "$SSH_PORT" -O exit \
+    "$SSH_USER@$SSH_HOST" 2> /dev/null
+
+  return 0
+}
+
 ssh::check() {
   if ! ssh::env; then
     cij::err "ssh::check: invalid environment"
@@ -265,6 +305,7 @@ ssh::reboot() {
 
   cij::emph "ssh::reboot: Reboot TARGET($CIJ_TEST_HOST)..."
   ssh::cmd 'reboot'
+  ssh::control_exit     # The connection dies with the target
 
   while :
   do
@@ -36,7 +36,8 @@ setup(
 
         ("share/cijoe/hooks", glob.glob("hooks/*")),
         ("share/cijoe/modules", glob.glob("modules/*.sh")),
-        ("share/cijoe/templates", glob.glob("templates/*html")),
+        ("share/cijoe/templates", glob.glob("templates/*html") +
+                                  glob.glob("templates/*css")),
 
         ("share/cijoe/envs", glob.glob("envs/*")),
 
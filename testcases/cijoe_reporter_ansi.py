@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+"""
+    Verify converting the ANSI color sequences of logs to HTML
+
+    The colors, e.g. those of cij::emph, cij::good and cij::err, become spans,
+    other escape sequences are removed and characters special to HTML are
+    escaped. The HTML must be the same however the text is split into chunks,
+    also when a sequence is cut by the end of a chunk, and the report must
+    have the colored lines of a log as spans, without escape characters
+"""
+import os
+import cij.selftest
+import cij.reporter
+import cij.test
+import cij
+cij.test.enter()
+
+TEXT = "".join([
+    "\x1b[0;36m# emph\x1b[0m\n",
+    "\x1b[0;32m# good\x1b[0m\n",
+    "\x1b[0;33m# warn\x1b[0m\n",
+    "\x1b[0;31m# err <a> & <b>\x1b[0m\n",
+    "\x1b[1;96mbold bright\x1b[m plain\x1b[2K cleared\n",
+    "\x1b[0;35munterminated"
+])
+HTML = "".join([
+    '<span class="ansi36"># emph</span>\n',
+    '<span class="ansi32"># good</span>\n',
+    '<span class="ansi33"># warn</span>\n',
+    '<span class="ansi31"># err &lt;a&gt; &amp; &lt;b&gt;</span>\n',
+    '<span class="ansi1 ansi36">bold bright</span> plain cleared\n',
+    '<span class="ansi35">unterminated</span>'
+])
+
+def chunked(text, size):
+    """@returns the HTML of 'text' converted in chunks of 'size' characters"""
+
+    return "".join(cij.reporter.ansi_to_html(
+        text[idx:idx + size] for idx in range(0, len(text), size)
+    ))
+
+def main():
+    """
+    @returns cij.test.PASS on success and cij.test.FAIL otherwise
+    """
+
+    aux_root = os.sep.join([cij.ENV.get("CIJ_TEST_RES_ROOT"), "_aux"])
+    res_root = os.sep.join([aux_root, "trun"])
+
+    checks = [
+        cij.selftest.expect("whole", chunked(TEXT, len(TEXT)), HTML),
+        cij.selftest.expect(
+            "chunked, mismatching chunk sizes", [
+                size for size in range(1, len(TEXT))
+                if chunked(TEXT, size) != HTML
+            ], []
+        ),
+        cij.selftest.expect("no text", chunked("", 1), "")
+    ]
+
+    _, trun = cij.selftest.run(res_root, "logs.plan")
+    if trun is None:
+        cij.err("cijoe_reporter_ansi: no trun.yml")
+        return cij.test.FAIL
+
+    rcode = cij.selftest.reporter([res_root])
+    with open(os.sep.join([res_root, "report.html"])) as html_fd:
+        html = html_fd.read()
+
+    checks += [
+        cij.selftest.expect("report, rcode", rcode, 0),
+        cij.selftest.expect(
+            "report, colored lines", [
+                '<span class="ansi31">st_noisy.sh: line: %d\x01</span>' %
+                num in html for num in range(1, 101)
+            ], [True] * 100
+        ),
+        cij.selftest.expect("report, escapes", "\x1b" in html, False)
+    ]
+
+    return cij.test.PASS if all(checks) else cij.test.FAIL
+
+if __name__ == "__main__":
+    cij.test.texit(rcode=main())
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+"""
+    Verify the listing of auxiliary files in reports
+
+    The listing of a tree must hold the name, relative to the root of the
+    tree, the path, size and mtime of at most the given number of files per
+    directory, by name, and an entry counting the files not listed of each
+    directory with more, the same with and without os.scandir(). A report
+    must count all files produced by a testcase and list no more than the
+    cap of them
+"""
+import shutil
+import os
+import cij.selftest
+import cij.reporter
+import cij.test
+import cij
+cij.test.enter()
+
+CAP = 3
+
+def tree(root):
+    """Create a tree of files in 'root' and @returns its expected listing"""
+
+    if os.path.exists(root):
+        shutil.rmtree(root)
+    os.makedirs(os.sep.join([root, "sub", "deep"]))
+
+    names = ["a.txt"] + ["sub/f%d" % num for num in range(7)] + [
+        "sub/deep/x.bin"
+    ]
+    for num, name in enumerate(names):
+        with open(os.sep.join([root, name]), "w") as aux_fd:
+            aux_fd.write("x" * num)
+    os.symlink(os.sep.join([root, "nowhere"]), os.sep.join([root, "dangling"]))
+
+    listing = []
+    for name in ["a.txt", "dangling", "sub/f0", "sub/f1", "sub/f2"]:
+        fpath = os.sep.join([root, name])
+        fstat = os.stat(fpath) if os.path.exists(fpath) else None
+        listing.append({
+            "name": name,
+            "fpath": fpath,
+            "size": fstat.st_size if fstat else None,
+            "mtime": fstat.st_mtime if fstat else None,
+            "more": 0
+        })
+    listing.append({
+        "name": "sub/", "fpath": os.sep.join([root, "sub"]),
+        "size": None, "mtime": None, "more": 4
+    })
+    fpath = os.sep.join([root, "sub", "deep", "x.bin"])
+    listing.append({
+        "name": "sub/deep/x.bin", "fpath": fpath,
+        "size": os.stat(fpath).st_size, "mtime": os.stat(fpath).st_mtime,
+        "more": 0
+    })
+
+    return listing
+
+def main():
+    """
+    @returns cij.test.PASS on success and cij.test.FAIL otherwise
+    """
+
+    aux_root = os.sep.join([cij.ENV.get("CIJ_TEST_RES_ROOT"), "_aux"])
+    res_root = os.sep.join([aux_root, "trun"])
+    tree_root = os.sep.join([aux_root, "tree"])
+
+    expected = tree(tree_root)
+
+    checks = [
+        cij.selftest.expect(
+            "listing", cij.reporter.aux_listing(tree_root, CAP), expected
+        )
+    ]
+
+    scandir = getattr(os, "scandir", None)
+    if scandir:
+        del os.scandir
+        try:
+            listing = cij.reporter.aux_listing(tree_root, CAP)
+        finally:
+            os.scandir = scandir
+
+        checks.append(cij.selftest.expect(
+            "listing, without os.scandir", listing, expected
+        ))
+
+    _, trun = cij.selftest.run(res_root, "aux.plan")
+    if trun is None:
+        cij.err("cijoe_reporter_aux: no trun.yml")
+        return cij.test.FAIL
+
+    rcode = cij.selftest.reporter([res_root])
+    with open(os.sep.join([res_root, "report.html"])) as html_fd:
+        html = html_fd.read()
+
+    more = 150 - cij.reporter.AUX_CAP
+    checks += [
+        cij.selftest.expect("report, rcode", rcode, 0),
+        cij.selftest.expect(
+            "report, count", "A total of <b>150</b> auxilary files" in html,
+            True
+        ),
+        cij.selftest.expect(
+            "report, more", "many/: %d more files" % more in html, True
+        ),
+        cij.selftest.expect(
+            "report, listed", html.count("st_aux.sh/_aux/many/file_"),
+            cij.reporter.AUX_CAP
+        )
+    ]
+
+    return cij.test.PASS if all(checks) else cij.test.FAIL
+
+if __name__ == "__main__":
+    cij.test.texit(rcode=main())
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+"""
+    Verify processing testcases in a pool and caching what is processed
+
+    The report produced by a pool of processes must equal that produced by a
+    single process. Regenerating the report must take every testcase from the
+    cache, but those with changed files, which must be processed again, as
+    must all of them when the log limits change
+"""
+import filecmp
+import shutil
+import os
+import cij.selftest
+import cij.reporter
+import cij.test
+import cij
+cij.test.enter()
+
+MARKER = "cijoe_reporter_cache: appended"
+
+def report(res_root, log_fpath, args):
+    """@returns the rcode and the postprocessing counts of a report"""
+
+    rcode = cij.selftest.reporter([res_root] + args, log_fpath)
+
+    return rcode, cij.selftest.postprocessed(log_fpath)
+
+def main():
+    """
+    @returns cij.test.PASS on success and cij.test.FAIL otherwise
+    """
+
+    aux_root = os.sep.join([cij.ENV.get("CIJ_TEST_RES_ROOT"), "_aux"])
+    res_root = os.sep.join([aux_root, "trun"])
+    log_fpath = os.sep.join([aux_root, "reporter.log"])
+    html_fpath = os.sep.join([res_root, "report.html"])
+    serial_fpath = os.sep.join([aux_root, "serial.html"])
+
+    _, trun = cij.selftest.run(res_root, "retry.plan")
+    if trun is None:
+        cij.err("cijoe_reporter_cache: no trun.yml")
+        return cij.test.FAIL
+
+    checks = [
+        cij.selftest.expect(
+            "serial", report(res_root, log_fpath, ["--jobs", "1"]),
+            (0, {"tcases": 3, "cached": 0, "pages": 0, "jobs": 1})
+        )
+    ]
+    shutil.copyfile(html_fpath, serial_fpath)
+    shutil.rmtree(os.sep.join([res_root, cij.reporter.CACHE_DNAME]))
+
+    checks += [
+        cij.selftest.expect(
+            "pool", report(res_root, log_fpath, ["--jobs", "2"]),
+            (0, {"tcases": 3, "cached": 0, "pages": 0, "jobs": 2})
+        ),
+        cij.selftest.expect(
+            "pool, same report",
+            filecmp.cmp(serial_fpath, html_fpath, False), True
+        ),
+        cij.selftest.expect(
+            "unchanged", report(res_root, log_fpath, ["--jobs", "2"]),
+            (0, {"tcases": 3, "cached": 3, "pages": 0, "jobs": 2})
+        ),
+        cij.selftest.expect(
+            "unchanged, same report",
+            filecmp.cmp(serial_fpath, html_fpath, False), True
+        )
+    ]
+
+    tcase = cij.selftest.tcase(trun, "st_pass.sh")
+    with open(tcase["log_fpath"], "a") as log_fd:
+        log_fd.write("%s\n" % MARKER)
+
+    checks.append(cij.selftest.expect(
+        "changed", report(res_root, log_fpath, ["--jobs", "2"]),
+        (0, {"tcases": 3, "cached": 2, "pages": 0, "jobs": 2})
+    ))
+    with open(html_fpath) as html_fd:
+        checks.append(cij.selftest.expect(
+            "changed, in report", MARKER in html_fd.read(), True
+        ))
+
+    checks.append(cij.selftest.expect(
+        "log limits", report(
+            res_root, log_fpath, ["--jobs", "2", "--log-head", "1024"]
+        ), (0, {"tcases": 3, "cached": 0, "pages": 0, "jobs": 2})
+    ))
+
+    return cij.test.PASS if all(checks) else cij.test.FAIL
+
+if __name__ == "__main__":
+    cij.test.texit(rcode=main())
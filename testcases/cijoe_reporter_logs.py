@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+"""
+    Verify the bounded excerpts of logs in reports, and compressing logs
+
+    An excerpt holds the whole lines within the first and last bytes of a log
+    and the number of bytes skipped in between, a log within the limits is
+    included in full, and a compressed log gives the same excerpt. A report
+    links to the full logs, and, when compressing the logs of the run, links
+    to and shows excerpts of the compressed logs
+"""
+import shutil
+import gzip
+import re
+import os
+import cij.selftest
+import cij.reporter
+import cij.test
+import cij
+cij.test.enter()
+
+NLINES = 1000
+LIMIT = 1024
+
+def excerpt_html(html_fpath, log_fpath):
+    """@returns the excerpt of the log at 'log_fpath' in the given report"""
+
+    with open(html_fpath) as html_fd:
+        html = html_fd.read()
+
+    match = re.search(
+        r"# BEGIN: run-log from log_fpath: %s\n(.*?)# END: run-log" %
+        re.escape(log_fpath), html, re.DOTALL
+    )
+
+    return match.group(1) if match else None
+
+def excerpts(aux_root):
+    """@returns list of check results of excerpts of a synthetic log"""
+
+    lines = ["line: %04d\n" % num for num in range(NLINES)]
+    fpath = os.sep.join([aux_root, "synthetic.log"])
+    with open(fpath, "w") as log_fd:
+        log_fd.write("".join(lines))
+    with open(fpath, "rb") as log_fd, \
+            gzip.open("%s.gz" % fpath, "wb") as gz_fd:
+        shutil.copyfileobj(log_fd, gz_fd)
+
+    size = len("".join(lines))
+    nhead = LIMIT // len(lines[0])
+    skipped = size - 2 * nhead * len(lines[0])
+
+    content, content_size = cij.reporter.runlog_excerpt(fpath, LIMIT, LIMIT)
+    gz_content, gz_size = cij.reporter.runlog_excerpt(
+        "%s.gz" % fpath, LIMIT, LIMIT
+    )
+
+    return [
+        cij.selftest.expect(
+            "excerpt", (content, content_size), (
+                "".join(lines[:nhead]) +
+                "\n# ... %d bytes of the log skipped, see the full log: "
+                "%s ...\n\n" % (skipped, fpath) + "".join(lines[-nhead:]),
+                size
+            )
+        ),
+        cij.selftest.expect(
+            "excerpt, compressed", (gz_content, gz_size),
+            (content.replace(fpath, "%s.gz" % fpath), size)
+        ),
+        cij.selftest.expect(
+            "excerpt, within limits",
+            cij.reporter.runlog_excerpt(fpath, size // 2, size - size // 2),
+            ("".join(lines), size)
+        )
+    ]
+
+def main():
+    """
+    @returns cij.test.PASS on success and cij.test.FAIL otherwise
+    """
+
+    aux_root = os.sep.join([cij.ENV.get("CIJ_TEST_RES_ROOT"), "_aux"])
+    res_root = os.sep.join([aux_root, "trun"])
+    html_fpath = os.sep.join([res_root, "report.html"])
+
+    _, trun = cij.selftest.run(res_root, "logs.plan")
+    if trun is None:
+        cij.err("cijoe_reporter_logs: no trun.yml")
+        return cij.test.FAIL
+
+    checks = excerpts(aux_root)
+
+    tcase = cij.selftest.tcase(trun, "st_noisy.sh")
+    log_fpath = tcase["log_fpath"]
+    href = '<a href="%s">' % os.path.relpath(log_fpath, res_root)
+    limits = ["--log-head", str(LIMIT), "--log-tail", str(LIMIT)]
+
+    rcode = cij.selftest.reporter([res_root] + limits)
+    excerpt = excerpt_html(html_fpath, log_fpath)
+    with open(html_fpath) as html_fd:
+        html = html_fd.read()
+
+    checks += [
+        cij.selftest.expect("report, rcode", rcode, 0),
+        cij.selftest.expect(
+            "report, excerpt", "bytes of the log skipped" in (excerpt or ""),
+            True
+        ),
+        cij.selftest.expect("report, link", href in html, True)
+    ]
+
+    rcode = cij.selftest.reporter(
+        [res_root, "--gzip-logs", str(LIMIT)] + limits
+    )
+    gz_excerpt = excerpt_html(html_fpath, "%s.gz" % log_fpath)
+    with open(html_fpath) as html_fd:
+        html = html_fd.read()
+
+    checks += [
+        cij.selftest.expect("gzip, rcode", rcode, 0),
+        cij.selftest.expect(
+            "gzip, logs", [
+                os.path.exists(log_fpath), os.path.exists("%s.gz" % log_fpath)
+            ], [False, True]
+        ),
+        cij.selftest.expect(
+            "gzip, excerpt", gz_excerpt,
+            excerpt.replace(log_fpath, "%s.gz" % log_fpath)
+            if excerpt else None
+        ),
+        cij.selftest.expect(
+            "gzip, link", href.replace('">', '.gz">') in html, True
+        )
+    ]
+
+    return cij.test.PASS if all(checks) else cij.test.FAIL
+
+if __name__ == "__main__":
+    cij.test.texit(rcode=main())
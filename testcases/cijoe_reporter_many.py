@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+"""
+    Verify producing reports of many outputs in one process, and the shared
+    and cached templates
+
+    The report of an output produced along with others, by --many, must equal
+    that produced alone, an output without a run must fail without stopping
+    the reports of the others. A template is compiled once per process and
+    its bytecode stored in the cache
+"""
+import filecmp
+import shutil
+import glob
+import os
+import cij.selftest
+import cij.reporter
+import cij.test
+import cij
+cij.test.enter()
+
+PLANS = ["retry.plan", "logs.plan"]
+
+def main():
+    """
+    @returns cij.test.PASS on success and cij.test.FAIL otherwise
+    """
+
+    aux_root = os.sep.join([cij.ENV.get("CIJ_TEST_RES_ROOT"), "_aux"])
+    missing = os.sep.join([aux_root, "missing"])
+    alone_fpath = os.sep.join([aux_root, "alone.html"])
+
+    res_roots = []
+    for plan in PLANS:
+        res_roots.append(os.sep.join([aux_root, plan]))
+        _, trun = cij.selftest.run(res_roots[-1], plan)
+        if trun is None:
+            cij.err("cijoe_reporter_many: no trun.yml of: %s" % plan)
+            return cij.test.FAIL
+
+    html_fpaths = [os.sep.join([root, "report.html"]) for root in res_roots]
+
+    checks = [
+        cij.selftest.expect(
+            "alone, rcode", cij.selftest.reporter([res_roots[0]]), 0
+        )
+    ]
+    shutil.copyfile(html_fpaths[0], alone_fpath)
+    os.remove(html_fpaths[0])
+
+    checks += [
+        cij.selftest.expect(
+            "many, rcode", cij.selftest.reporter(["--many"] + res_roots), 0
+        ),
+        cij.selftest.expect(
+            "many, reports", [os.path.exists(fpath) for fpath in html_fpaths],
+            [True] * len(res_roots)
+        ),
+        cij.selftest.expect(
+            "many, same report as alone",
+            filecmp.cmp(alone_fpath, html_fpaths[0], False), True
+        )
+    ]
+
+    os.remove(html_fpaths[1])
+    checks += [
+        cij.selftest.expect(
+            "many, missing output, rcode",
+            cij.selftest.reporter(["--many", missing, res_roots[1]]), 1
+        ),
+        cij.selftest.expect(
+            "many, missing output, others reported",
+            os.path.exists(html_fpaths[1]), True
+        ),
+        cij.selftest.expect(
+            "many and output, rcode",
+            cij.selftest.reporter([res_roots[0], "--many", res_roots[1]]), 2
+        )
+    ]
+
+    cij.reporter.TMPL_CACHE = os.sep.join([aux_root, "jinja"])
+    if os.path.exists(cij.reporter.TMPL_CACHE):
+        shutil.rmtree(cij.reporter.TMPL_CACHE)
+    os.makedirs(cij.reporter.TMPL_CACHE)
+
+    tmpl_fpath = os.sep.join([cij.ENV.get("CIJ_TEMPLATES"), "report.html"])
+    tmpl = cij.reporter.dset_to_tmpl(tmpl_fpath)
+
+    checks += [
+        cij.selftest.expect(
+            "template, compiled once",
+            cij.reporter.dset_to_tmpl(tmpl_fpath) is tmpl, True
+        ),
+        cij.selftest.expect(
+            "template, bytecode cached", len(glob.glob(os.sep.join([
+                cij.reporter.TMPL_CACHE, "__jinja2_*.cache"
+            ]))) > 0, True
+        )
+    ]
+
+    return cij.test.PASS if all(checks) else cij.test.FAIL
+
+if __name__ == "__main__":
+    cij.test.texit(rcode=main())
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+"""
+    Verify the paginated report, cij_reporter --pages
+
+    The index page must link to a page per testsuite and testcase, all links
+    of the pages must resolve, and the logs of a testcase must be on its page
+    only. Regenerating the report must render only the pages of testcases
+    which changed, or whose page is missing
+"""
+import re
+import os
+import cij.selftest
+import cij.reporter
+import cij.test
+import cij
+cij.test.enter()
+
+HREF = re.compile(r'href="([^"#]+)"')
+
+def links(fpath):
+    """@returns the local links of the page at 'fpath' which do not resolve"""
+
+    with open(fpath) as page_fd:
+        hrefs = HREF.findall(page_fd.read())
+
+    return [
+        href for href in hrefs if "://" not in href and not os.path.exists(
+            os.path.join(os.path.dirname(fpath), href)
+        )
+    ]
+
+def report(res_root, log_fpath):
+    """@returns the rcode and the postprocessing counts of a report"""
+
+    rcode = cij.selftest.reporter(
+        [res_root, "--pages", "--jobs", "1"], log_fpath
+    )
+
+    return rcode, cij.selftest.postprocessed(log_fpath)
+
+def main():
+    """
+    @returns cij.test.PASS on success and cij.test.FAIL otherwise
+    """
+
+    aux_root = os.sep.join([cij.ENV.get("CIJ_TEST_RES_ROOT"), "_aux"])
+    res_root = os.sep.join([aux_root, "trun"])
+    log_fpath = os.sep.join([aux_root, "reporter.log"])
+    index_fpath = os.sep.join([res_root, "report.html"])
+    pages_root = os.sep.join([
+        res_root, cij.reporter.CACHE_DNAME, cij.reporter.PAGES_DNAME
+    ])
+
+    _, trun = cij.selftest.run(res_root, "shard.plan")
+    if trun is None:
+        cij.err("cijoe_reporter_pages: no trun.yml")
+        return cij.test.FAIL
+
+    tcases = cij.selftest.tcases(trun)
+    pages = [
+        os.sep.join([pages_root, "%s.html" % ent["ident"]])
+        for ent in trun["testsuites"] + tcases
+    ]
+
+    checks = [
+        cij.selftest.expect(
+            "first", report(res_root, log_fpath),
+            (0, {"tcases": 5, "cached": 0, "pages": 5, "jobs": 1})
+        ),
+        cij.selftest.expect(
+            "pages", [os.path.exists(fpath) for fpath in pages],
+            [True] * len(pages)
+        ),
+        cij.selftest.expect(
+            "links unresolved",
+            dict((fpath, links(fpath)) for fpath in [index_fpath] + pages),
+            dict((fpath, []) for fpath in [index_fpath] + pages)
+        )
+    ]
+
+    with open(index_fpath) as index_fd:
+        index = index_fd.read()
+    with open(pages[len(trun["testsuites"])]) as page_fd:
+        page = page_fd.read()
+
+    checks += [
+        cij.selftest.expect(
+            "index, links pages", [
+                os.path.relpath(fpath, res_root) in index for fpath in pages
+            ], [True] * len(pages)
+        ),
+        cij.selftest.expect(
+            "index, tcase logs",
+            any(tc["log_fpath"] in index for tc in tcases), False
+        ),
+        cij.selftest.expect(
+            "tcase page, log", tcases[0]["log_fpath"] in page, True
+        ),
+        cij.selftest.expect(
+            "unchanged", report(res_root, log_fpath),
+            (0, {"tcases": 5, "cached": 5, "pages": 0, "jobs": 1})
+        )
+    ]
+
+    with open(tcases[0]["log_fpath"], "a") as log_fd:
+        log_fd.write("cijoe_reporter_pages: appended\n")
+    os.remove(pages[-1])
+
+    checks.append(cij.selftest.expect(
+        "changed and removed", report(res_root, log_fpath),
+        (0, {"tcases": 5, "cached": 4, "pages": 2, "jobs": 1})
+    ))
+
+    return cij.test.PASS if all(checks) else cij.test.FAIL
+
+if __name__ == "__main__":
+    cij.test.texit(rcode=main())
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+"""
+    Verify that the bashd executor runs testcases as the bash executor does
+
+    The fixture testplans are run with each executor, the status, rcode and
+    attempts of every testcase, and the testcases run, must be the same. A
+    testcase changing its environment, working directory or defining
+    functions must not affect the testcases following it, which must see the
+    env and the evars of the testplan
+"""
+import os
+import cij.selftest
+import cij.test
+import cij
+cij.test.enter()
+
+EXPECTED = {
+    "executor.plan": [
+        ("st_pass.sh", "PASS", 0, 1),
+        ("st_fail.sh", "FAIL", 1, 1),
+        ("st_leak.sh", "FAIL", 3, 1),
+        ("st_isolated.sh", "PASS", 0, 1)
+    ]
+}
+
+def results(aux_root, plan, executor):
+    """@returns the (fname, status, rcode, attempts) of the tcases and runs"""
+
+    runs_fpath = os.sep.join([aux_root, "runs_%s_%s" % (plan, executor)])
+    if os.path.exists(runs_fpath):
+        os.remove(runs_fpath)
+
+    _, trun = cij.selftest.run(
+        os.sep.join([aux_root, "%s_%s" % (plan, executor)]), plan,
+        ["--executor", executor], runs_fpath
+    )
+    if trun is None:
+        cij.err("cijoe_runner_bashd: no trun.yml of: %s, %s" % (
+            plan, executor
+        ))
+        return None, None
+
+    return [
+        (tc["fname"], tc["status"], tc["rcode"], tc["attempts"])
+        for tc in cij.selftest.tcases(trun)
+    ], cij.selftest.runs(runs_fpath)
+
+def main():
+    """
+    @returns cij.test.PASS on success and cij.test.FAIL otherwise
+    """
+
+    aux_root = os.sep.join([cij.ENV.get("CIJ_TEST_RES_ROOT"), "_aux"])
+
+    checks = []
+    for plan in ["executor.plan", "retry.plan", "resume.plan"]:
+        tcases, runs = results(aux_root, plan, "bash")
+        bashd_tcases, bashd_runs = results(aux_root, plan, "bashd")
+
+        checks += [
+            cij.selftest.expect(
+                "%s, bashd tcases" % plan, bashd_tcases, tcases
+            ),
+            cij.selftest.expect("%s, bashd runs" % plan, bashd_runs, runs)
+        ]
+
+        if plan in EXPECTED:
+            checks.append(cij.selftest.expect(
+                "%s, bash tcases" % plan, tcases, EXPECTED[plan]
+            ))
+
+    return cij.test.PASS if all(checks) else cij.test.FAIL
+
+if __name__ == "__main__":
+    cij.test.texit(rcode=main())
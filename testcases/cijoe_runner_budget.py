@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+"""
+    Verify selection of testcases by a time budget and the estimated time to
+    completion
+
+    Without history, a time budget must be refused rather than select every
+    testcase. With a history, the testcases which fit in the budget are
+    selected in plan order, and the estimated time to complete the pending
+    testcases, published with the progress, must count down to zero
+"""
+import os
+import cij.selftest
+import cij.test
+import cij.yml
+import cij
+cij.test.enter()
+
+HISTORY = {
+    "first_0/st_pass.sh": [10.0],
+    "first_0/st_fail.sh": [30.0],
+    "second_1/st_pass.sh": [9.0, 10.0, 11.0],
+    "second_1/st_fail.sh": [30.0],
+    "third_2/st_pass.sh": [5.0]
+}
+
+def main():
+    """
+    @returns cij.test.PASS on success and cij.test.FAIL otherwise
+    """
+
+    aux_root = os.sep.join([cij.ENV.get("CIJ_TEST_RES_ROOT"), "_aux"])
+    runs_fpath = os.sep.join([aux_root, "runs"])
+    store_fpath = os.sep.join([aux_root, "history.yml"])
+    fifo_fpath = os.sep.join([aux_root, "events.fifo"])
+
+    checks = []
+
+    rcode, trun = cij.selftest.run(
+        os.sep.join([aux_root, "nohistory"]), "shard.plan",
+        ["--time-budget", "25"], runs_fpath
+    )
+    checks += [
+        cij.selftest.expect("no history, refused", (rcode, trun), (1, None)),
+        cij.selftest.expect(
+            "no history, runs", cij.selftest.runs(runs_fpath), []
+        )
+    ]
+
+    with open(store_fpath, "w") as store_fd:
+        cij.yml.dump(HISTORY, store_fd)
+
+    if os.path.exists(fifo_fpath):
+        os.remove(fifo_fpath)
+    os.mkfifo(fifo_fpath)
+
+    events = []
+    collector = cij.selftest.subscribe(fifo_fpath, events)
+
+    _, trun = cij.selftest.run(
+        os.sep.join([aux_root, "history"]), "shard.plan", [
+            "--time-budget", "25", "--history", store_fpath,
+            "--events", fifo_fpath
+        ], runs_fpath
+    )
+    collector.join(cij.selftest.CONNECT_TIMEOUT)
+    if trun is None:
+        cij.err("cijoe_runner_budget: no trun.yml of the run with history")
+        return cij.test.FAIL
+
+    checks += [
+        cij.selftest.expect(
+            "history, runs", cij.selftest.runs(runs_fpath),
+            ["st_pass.sh"] * 3
+        ),
+        cij.selftest.expect(
+            "history, tcases",
+            [tc["status"] for tc in cij.selftest.tcases(trun)],
+            ["PASS", "UNKN", "PASS", "UNKN", "PASS"]
+        ),
+        cij.selftest.expect(
+            "history, eta of start",
+            [ev["data"]["eta"] for ev in events if ev["ev"] == "trun_start"],
+            [25.0]
+        ),
+        cij.selftest.expect(
+            "history, eta of progress",
+            [ev["data"]["eta"] for ev in events if ev["ev"] == "progress"],
+            [15.0, 5.0, 0.0]
+        )
+    ]
+
+    return cij.test.PASS if all(checks) else cij.test.FAIL
+
+if __name__ == "__main__":
+    cij.test.texit(rcode=main())
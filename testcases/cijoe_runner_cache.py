@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+"""
+    Verify the result cache of testsuites declaring 'cache: true'
+
+    Passes are replayed until the testcase or one of the 'inputs' of its
+    testsuite changes, changing an input runs all testcases of the testsuite,
+    failures are never stored and thus always run
+"""
+import os
+import cij.selftest
+import cij.test
+import cij
+cij.test.enter()
+
+def main():
+    """
+    @returns cij.test.PASS on success and cij.test.FAIL otherwise
+    """
+
+    aux_root = os.sep.join([cij.ENV.get("CIJ_TEST_RES_ROOT"), "_aux"])
+    cache = os.sep.join([aux_root, "cache"])
+    runs_fpath = os.sep.join([aux_root, "runs"])
+    input_fpath = os.sep.join([aux_root, "input"])
+
+    cij.ENV["SELFTEST_INPUT"] = input_fpath
+
+    checks = []
+    for rnum, (content, expected) in enumerate([
+            ("pass", {
+                "st_pass.sh": ("PASS", False),
+                "st_input.sh": ("PASS", False),
+                "st_fail.sh": ("FAIL", False),
+                "runs": ["st_pass.sh", "st_input.sh", "st_fail.sh"]
+            }),
+            ("pass", {
+                "st_pass.sh": ("PASS", True),
+                "st_input.sh": ("PASS", True),
+                "st_fail.sh": ("FAIL", False),
+                "runs": ["st_fail.sh"]
+            }),
+            ("fail", {
+                "st_pass.sh": ("PASS", False),
+                "st_input.sh": ("FAIL", False),
+                "st_fail.sh": ("FAIL", False),
+                "runs": ["st_pass.sh", "st_input.sh", "st_fail.sh"]
+            }),
+            ("fail", {
+                "st_pass.sh": ("PASS", True),
+                "st_input.sh": ("FAIL", False),
+                "st_fail.sh": ("FAIL", False),
+                "runs": ["st_input.sh", "st_fail.sh"]
+            })
+    ]):
+        with open(input_fpath, "w") as input_fd:
+            input_fd.write(content)
+
+        if os.path.exists(runs_fpath):
+            os.remove(runs_fpath)
+
+        _, trun = cij.selftest.run(
+            os.sep.join([aux_root, "trun_%d" % rnum]), "cache.plan",
+            ["--cache", cache], runs_fpath
+        )
+        if trun is None:
+            cij.err("cijoe_runner_cache: no trun.yml of run: %d" % rnum)
+            return cij.test.FAIL
+
+        for name in ["st_pass.sh", "st_input.sh", "st_fail.sh"]:
+            tcase = cij.selftest.tcase(trun, name)
+            checks.append(cij.selftest.expect(
+                "run: %d, %s (status, cached)" % (rnum, name),
+                (tcase["status"], tcase["cached"]), expected[name]
+            ))
+
+        checks.append(cij.selftest.expect(
+            "run: %d, runs" % rnum,
+            cij.selftest.runs(runs_fpath), expected["runs"]
+        ))
+
+    return cij.test.PASS if all(checks) else cij.test.FAIL
+
+if __name__ == "__main__":
+    cij.test.texit(rcode=main())
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+"""
+    Verify the live events published by a run on a Unix socket
+
+    Subscribers connecting during the run must receive whole JSON lines only,
+    the progress of the testcases run after they connected, and the status
+    of the trun as the last event, after which the socket is removed
+"""
+import os
+import cij.selftest
+import cij.test
+import cij
+cij.test.enter()
+
+NSUBSCRIBERS = 2
+
+def main():
+    """
+    @returns cij.test.PASS on success and cij.test.FAIL otherwise
+    """
+
+    aux_root = os.sep.join([cij.ENV.get("CIJ_TEST_RES_ROOT"), "_aux"])
+    sock_fpath = os.sep.join([aux_root, "events.sock"])
+
+    if os.path.exists(sock_fpath):
+        os.remove(sock_fpath)
+
+    subscriptions = []
+    for _ in range(NSUBSCRIBERS):
+        events = []
+        subscriptions.append(
+            (cij.selftest.subscribe(sock_fpath, events), events)
+        )
+
+    _, trun = cij.selftest.run(
+        os.sep.join([aux_root, "trun"]), "parallel.plan",
+        ["--events", sock_fpath]
+    )
+    if trun is None:
+        cij.err("cijoe_runner_events: no trun.yml")
+        return cij.test.FAIL
+
+    checks = [
+        cij.selftest.expect(
+            "socket removed", os.path.exists(sock_fpath), False
+        )
+    ]
+    for num, (collector, events) in enumerate(subscriptions):
+        collector.join(cij.selftest.CONNECT_TIMEOUT)
+
+        tcases = [
+            ev for ev in events if ev and ev["ev"] == "tcase" and
+            ev["key"] == "fourth_3/st_target.sh"
+        ]
+        progress = [ev for ev in events if ev and ev["ev"] == "progress"]
+
+        checks += [
+            cij.selftest.expect(
+                "subscriber: %d, whole lines" % num, None in events, False
+            ),
+            cij.selftest.expect(
+                "subscriber: %d, last tcase" % num,
+                [ev["data"]["status"] for ev in tcases], ["PASS"]
+            ),
+            cij.selftest.expect(
+                "subscriber: %d, last progress" % num,
+                progress[-1]["data"]["progress"] if progress else None,
+                trun["progress"]
+            ),
+            cij.selftest.expect(
+                "subscriber: %d, last event" % num,
+                (events[-1]["ev"], events[-1]["data"].get("status"))
+                if events and events[-1] else None, ("trun", "PASS")
+            )
+        ]
+
+    return cij.test.PASS if all(checks) else cij.test.FAIL
+
+if __name__ == "__main__":
+    cij.test.texit(rcode=main())
@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+"""
+    Verify the index of runs of cij_history and the trends reported from it
+
+    Runs are ingested once, by the digest of their trun.yml, from their
+    trun.db when they have one and their trun.yml otherwise. The trends must
+    flag a testcase whose recent durations regressed, give the last passing
+    and first failing run of a testcase failing in the latest run, and the
+    rate of runs in which a testcase was flaky. The runs, but the first,
+    are derived from the first run, with the statuses and durations below
+"""
+import subprocess
+import sqlite3
+import sys
+import os
+import cij.selftest
+import cij.history
+import cij.test
+import cij.yml
+import cij
+cij.test.enter()
+
+NRUNS = 8
+RECENT = 3
+
+def status(ident, num):
+    """@returns the status of the tcase 'ident' in the derived run 'num'"""
+
+    if ident.endswith("st_fail.sh"):
+        return "PASS" if num < 6 else "FAIL"
+
+    return "PASS"
+
+def wallc(ident, num):
+    """@returns the wallc of the tcase 'ident' in the derived run 'num'"""
+
+    if ident.endswith("st_pass.sh"):
+        return 1.0 if num < NRUNS - RECENT else 2.0
+
+    return 1.0
+
+def derive(trun, res_root, num):
+    """Write the trun.yml of run 'num' derived from the given 'trun'"""
+
+    if not os.path.exists(res_root):
+        os.makedirs(res_root)
+
+    trun["conf"]["OUTPUT"] = res_root
+    trun["stamp"]["begin"] += 100.0
+    trun["stamp"]["end"] += 100.0
+    for tcase in cij.selftest.tcases(trun):
+        tcase["status"] = status(tcase["ident"], num)
+        tcase["rcode"] = int(tcase["status"] == "FAIL")
+        tcase["wallc"] = wallc(tcase["ident"], num)
+
+    with open(cij.runner.yml_fpath(res_root), "w") as yml_fd:
+        cij.yml.dump(trun, yml_fd, explicit_start=True)
+
+def history(args):
+    """@returns the rcode of cij_history with the given args"""
+
+    cmd = [
+        sys.executable,
+        os.sep.join([cij.ENV.get("CIJ_ROOT"), "bin", "cij_history"])
+    ] + args
+
+    cij.emph("cijoe_runner_history: %r" % " ".join(cmd))
+    return subprocess.call(cmd)
+
+def main():
+    """
+    @returns cij.test.PASS on success and cij.test.FAIL otherwise
+    """
+
+    aux_root = os.sep.join([cij.ENV.get("CIJ_TEST_RES_ROOT"), "_aux"])
+    index_fpath = os.sep.join([aux_root, "index.db"])
+    report_fpath = os.sep.join([aux_root, "history.html"])
+
+    res_roots = [os.sep.join([aux_root, "trun_0"])]
+    _, trun = cij.selftest.run(res_roots[0], "retry.plan")
+    if trun is None:
+        cij.err("cijoe_runner_history: no trun.yml")
+        return cij.test.FAIL
+
+    expected = sorted(
+        (tc["ident"], tc["status"]) for tc in cij.selftest.tcases(trun)
+    )
+    for num in range(1, NRUNS):
+        res_roots.append(os.sep.join([aux_root, "trun_%d" % num]))
+        derive(trun, res_roots[-1], num)
+
+    for fpath in [index_fpath, report_fpath]:
+        if os.path.exists(fpath):
+            os.remove(fpath)
+
+    checks = [
+        cij.selftest.expect(
+            "ingest, rcode", history([index_fpath] + res_roots[:-1]), 0
+        ),
+        cij.selftest.expect(
+            "ingest again, rcode", history(
+                [index_fpath] + res_roots + ["--report", report_fpath]
+            ), 0
+        ),
+        cij.selftest.expect("report", os.path.exists(report_fpath), True)
+    ]
+
+    conn = sqlite3.connect(index_fpath)
+    try:
+        checks += [
+            cij.selftest.expect(
+                "index, runs", [row[0] for row in conn.execute(
+                    "SELECT path FROM runs ORDER BY id"
+                )], res_roots
+            ),
+            cij.selftest.expect(
+                "index, tcases of first run", sorted(conn.execute(
+                    "SELECT ident, status FROM tcases WHERE run = 1"
+                )), expected
+            )
+        ]
+
+        trends = dict(
+            (trend["ident"], trend) for trend in cij.history.index_trends(
+                conn, "retry", NRUNS, RECENT
+            )["tcases"]
+        )
+    finally:
+        conn.close()
+
+    checks += [
+        cij.selftest.expect(
+            "trend, regressed", sorted(
+                (ident, trend["ratio"]) for ident, trend in trends.items()
+                if trend["regressed"]
+            ), [("retry_0/st_pass.sh", 2.0)]
+        ),
+        cij.selftest.expect(
+            "trend, bisect", dict(
+                (ident, (trend["good"] or {}).get("path"))
+                for ident, trend in trends.items() if trend["bad"]
+            ), {"retry_0/st_fail.sh": res_roots[5]}
+        ),
+        cij.selftest.expect(
+            "trend, first failing",
+            trends["retry_0/st_fail.sh"]["bad"]["path"], res_roots[6]
+        ),
+        cij.selftest.expect(
+            "trend, flaky rate",
+            trends["retry_0/st_flaky.sh"]["flaky_rate"], 1.0 / NRUNS
+        )
+    ]
+
+    return cij.test.PASS if all(checks) else cij.test.FAIL
+
+if __name__ == "__main__":
+    cij.test.texit(rcode=main())
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+"""
+    Verify the run journal and replaying it
+
+    The journal of a completed run must replay to its trun.yml. Replaying a
+    prefix of it, as left by an interrupted run, must give the testcases
+    completed in that prefix, and a torn last event, as left by a runner
+    crashing mid-write, must be ignored, and trimmed before the journal is
+    continued
+
+    A testplan failing setup must fail the run cleanly, without a journal
+"""
+import os
+import cij.selftest
+import cij.runner
+import cij.test
+import cij
+cij.test.enter()
+
+def statuses(trun):
+    """@returns list of the (ident, status) of the testcases of 'trun'"""
+
+    return [(tc["ident"], tc["status"]) for tc in cij.selftest.tcases(trun)]
+
+def replay(fpath, data):
+    """@returns the trun replayed from a journal at 'fpath' holding 'data'"""
+
+    with open(fpath, "wb") as jfile:
+        jfile.write(data)
+
+    return cij.runner.trun_from_journal(fpath)
+
+def main():
+    """
+    @returns cij.test.PASS on success and cij.test.FAIL otherwise
+    """
+
+    aux_root = os.sep.join([cij.ENV.get("CIJ_TEST_RES_ROOT"), "_aux"])
+    res_root = os.sep.join([aux_root, "trun"])
+    jpath = os.sep.join([aux_root, "replay.journal"])
+
+    broken_root = os.sep.join([aux_root, "broken"])
+    log_fpath = os.sep.join([aux_root, "broken.log"])
+    rcode = cij.selftest.runner([
+        os.sep.join([cij.selftest.fixtures(), "testplans", "broken.plan"]),
+        os.sep.join([cij.selftest.fixtures(), "env.sh"]),
+        "--output", broken_root
+    ], log_fpath=log_fpath)
+    with open(log_fpath) as log_fd:
+        crashed = "Traceback" in log_fd.read()
+
+    checks = [
+        cij.selftest.expect("broken, (rcode, crashed)", (rcode, crashed), (
+            1, False
+        )),
+        cij.selftest.expect(
+            "broken, no trun", cij.runner.trun_exists(broken_root), False
+        )
+    ]
+
+    _, trun = cij.selftest.run(res_root, "resume.plan")
+    if trun is None:
+        cij.err("cijoe_runner_journal: no trun.yml of the run")
+        return cij.test.FAIL
+
+    with open(cij.runner.journal_fpath(res_root), "rb") as jfile:
+        lines = jfile.readlines()
+
+    checks.append(cij.selftest.expect(
+        "replay, complete",
+        statuses(replay(jpath, b"".join(lines))), statuses(trun)
+    ))
+
+    final = dict(statuses(trun))
+    monotonic, ignored, trimmed = True, True, True
+    for nlines in range(1, len(lines)):
+        prefix = b"".join(lines[:nlines])
+        replayed = statuses(replay(jpath, prefix))
+        monotonic &= all(
+            status in ["UNKN", final[ident]] for ident, status in replayed
+        )
+
+        torn = lines[nlines][:len(lines[nlines]) // 2]
+        ignored &= statuses(replay(jpath, prefix + torn)) == replayed
+
+        cij.runner.journal_trim(jpath)
+        with open(jpath, "rb") as jfile:
+            trimmed &= jfile.read() == prefix
+
+    checks += [
+        cij.selftest.expect("replay, prefixes", monotonic, True),
+        cij.selftest.expect("replay, torn event ignored", ignored, True),
+        cij.selftest.expect("trim, torn event trimmed", trimmed, True)
+    ]
+    checks.append(cij.selftest.expect(
+        "replay, setup only",
+        [status for _, status in statuses(replay(jpath, lines[0]))],
+        ["UNKN"] * len(final)
+    ))
+
+    return cij.test.PASS if all(checks) else cij.test.FAIL
+
+if __name__ == "__main__":
+    cij.test.texit(rcode=main())
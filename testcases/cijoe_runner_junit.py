@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+"""
+    Verify the jUNIT XML of a run and the embedded logs of failed testcases
+
+    The XML must be well-formed, passed testcases have no children, a flaky
+    testcase has a flakyFailure and a failed testcase a failure, with the
+    last N bytes of its log, starting at a whole line, in its <system-out>
+    when asked for, without ANSI escape-sequences and characters not allowed
+    in XML, also when the log is compressed, as done by the reporter
+"""
+import xml.etree.ElementTree as ET
+import subprocess
+import shutil
+import gzip
+import sys
+import os
+import cij.selftest
+import cij.runner
+import cij.test
+import cij
+cij.test.enter()
+
+LIMIT = 300
+
+def junit_load(res_root):
+    """@returns {classname: {tag: text}} of the jUNIT XML, None when invalid"""
+
+    try:
+        root = ET.parse(cij.runner.junit_fpath(res_root)).getroot()
+    except (IOError, OSError, ET.ParseError) as exc:
+        cij.err("cijoe_runner_junit: invalid jUNIT XML: %r" % exc)
+        return None
+
+    return dict(
+        (elem.get("classname"), dict(
+            (child.tag, child.text or child.get("message"))
+            for child in elem
+        )) for elem in root.iter("testcase")
+    )
+
+def system_out(log_fpath):
+    """@returns the expected <system-out> of the fixture st_noisy.sh"""
+
+    size = os.path.getsize(log_fpath)
+    with open(log_fpath, "rb") as log_fd:
+        log_fd.seek(size - LIMIT)
+        lines = log_fd.read().decode("utf-8").split("\n")[1:]
+
+    return "[truncated to last %d of %d bytes]\n%s" % (LIMIT, size, "\n".join(
+        line.replace("\033[0;31m", "").replace("\033[0m", "").replace(
+            "\001", ""
+        ) for line in lines
+    ))
+
+def trun_to_junit(res_root, args):
+    """@returns the rcode of cij_trun_to_junit on 'res_root'"""
+
+    cmd = [
+        sys.executable,
+        os.sep.join([cij.ENV.get("CIJ_ROOT"), "bin", "cij_trun_to_junit"]),
+        res_root
+    ] + args
+
+    cij.emph("cijoe_runner_junit: %r" % " ".join(cmd))
+    return subprocess.call(cmd)
+
+def main():
+    """
+    @returns cij.test.PASS on success and cij.test.FAIL otherwise
+    """
+
+    aux_root = os.sep.join([cij.ENV.get("CIJ_TEST_RES_ROOT"), "_aux"])
+    res_root = os.sep.join([aux_root, "trun"])
+
+    _, trun = cij.selftest.run(
+        res_root, "junit.plan", ["--junit-system-out", str(LIMIT)]
+    )
+    junit = junit_load(res_root) if trun else None
+    if junit is None:
+        cij.err("cijoe_runner_junit: no trun.yml or jUNIT XML")
+        return cij.test.FAIL
+
+    noisy = cij.selftest.tcase(trun, "st_noisy.sh")
+    expected = system_out(noisy["log_fpath"])
+
+    checks = [
+        cij.selftest.expect("runner, passed", junit["junit_0/st_pass.sh"], {}),
+        cij.selftest.expect(
+            "runner, flaky", junit["junit_0/st_flaky.sh"],
+            {"flakyFailure": "passed on attempt 2"}
+        ),
+        cij.selftest.expect(
+            "runner, failed", junit["junit_0/st_noisy.sh"],
+            {"failure": "test failed", "system-out": expected}
+        )
+    ]
+
+    trun_to_junit(res_root, [])
+    junit = junit_load(res_root) or {}
+    checks.append(cij.selftest.expect(
+        "no system-out", junit.get("junit_0/st_noisy.sh"),
+        {"failure": "test failed"}
+    ))
+
+    with open(noisy["log_fpath"], "rb") as log_fd, \
+            gzip.open("%s.gz" % noisy["log_fpath"], "wb") as gz_fd:
+        shutil.copyfileobj(log_fd, gz_fd)
+    os.remove(noisy["log_fpath"])
+
+    trun_to_junit(res_root, ["--system-out", str(LIMIT)])
+    junit = junit_load(res_root) or {}
+    checks.append(cij.selftest.expect(
+        "compressed log", junit.get("junit_0/st_noisy.sh"),
+        {"failure": "test failed", "system-out": expected}
+    ))
+
+    return cij.test.PASS if all(checks) else cij.test.FAIL
+
+if __name__ == "__main__":
+    cij.test.texit(rcode=main())
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+"""
+    Verify that result directories and script copies are made for the
+    testcases run only
+
+    Testcases, and testsuites, not selected by --testcase-match must leave
+    nothing in the output, the copies of the testcases and hooks which run
+    must have the content of the originals, repeated copies hardlinked to the
+    first copy of the same script
+"""
+import filecmp
+import os
+import cij.selftest
+import cij.test
+import cij
+cij.test.enter()
+
+def inodes(fpaths):
+    """@returns the list of distinct inodes of the given files"""
+
+    return sorted(set(os.stat(fpath).st_ino for fpath in fpaths))
+
+def main():
+    """
+    @returns cij.test.PASS on success and cij.test.FAIL otherwise
+    """
+
+    aux_root = os.sep.join([cij.ENV.get("CIJ_TEST_RES_ROOT"), "_aux"])
+    runs_fpath = os.sep.join([aux_root, "runs"])
+    if os.path.exists(runs_fpath):
+        os.remove(runs_fpath)
+
+    _, trun = cij.selftest.run(
+        os.sep.join([aux_root, "trun"]), "materialize.plan",
+        ["--testcase-match", "st_pass"], runs_fpath
+    )
+    if trun is None:
+        cij.err("cijoe_runner_materialize: no trun.yml")
+        return cij.test.FAIL
+
+    tcases = cij.selftest.tcases(trun)
+    ran = [tc for tc in tcases if tc["status"] != "UNKN"]
+    hooks = [hook for tc in ran for hook in tc["hooks"]["enter"]]
+
+    checks = [
+        cij.selftest.expect(
+            "runs", cij.selftest.runs(runs_fpath),
+            ["st_noop_enter.sh", "st_pass.sh"] * 2
+        ),
+        cij.selftest.expect(
+            "tcases, ran", [tc["ident"] for tc in ran],
+            ["first_0/st_pass.sh", "second_1/st_pass.sh"]
+        ),
+        cij.selftest.expect(
+            "tcases, not run, res_root",
+            [os.path.exists(tc["res_root"]) for tc in tcases
+             if tc not in ran], [False] * 3
+        ),
+        cij.selftest.expect(
+            "tsuites, res_root",
+            [os.path.exists(ts["res_root"]) for ts in trun["testsuites"]],
+            [True, True, False]
+        ),
+        cij.selftest.expect(
+            "tcases, copies",
+            [filecmp.cmp(tc["fpath_orig"], tc["fpath"], False) for tc in ran],
+            [True] * len(ran)
+        ),
+        cij.selftest.expect(
+            "hooks, copies",
+            [filecmp.cmp(hook["fpath_orig"], hook["fpath"], False)
+             for hook in hooks], [True] * len(hooks)
+        ),
+        cij.selftest.expect(
+            "tcases, hardlinked",
+            len(inodes([tc["fpath"] for tc in ran])), 1
+        ),
+        cij.selftest.expect(
+            "hooks, hardlinked",
+            len(inodes([hook["fpath"] for hook in hooks])), 1
+        )
+    ]
+
+    return cij.test.PASS if all(checks) else cij.test.FAIL
+
+if __name__ == "__main__":
+    cij.test.texit(rcode=main())
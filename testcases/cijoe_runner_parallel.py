@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+"""
+    Verify parallel runs of testsuites on a pool of envs
+
+    The testsuites are dispatched to a worker per env, each testcase must run
+    with the env of its worker, and the hooks of the target of the additional
+    env must take and release its lock. When the lock of that target is taken
+    already, entering it must fail, leaving the lock in place, and the
+    testsuites must run on the remaining target
+"""
+import os
+import cij.selftest
+import cij.test
+import cij
+cij.test.enter()
+
+PORTS = ["22", "2222"]     # SSH_PORT of env.sh and of env_pool.sh
+
+def lock_fpath(port):
+    """@returns path to the lock of the fixture target with the given port"""
+
+    return "/tmp/CIJOE_LOCK_127.0.0.1_%s" % port
+
+def port(tcase):
+    """@returns the SSH_PORT logged by the st_target.sh testcase"""
+
+    with open(tcase["log_fpath"]) as log_fd:
+        for line in log_fd:
+            if line.startswith("st_target.sh: SSH_PORT: "):
+                return line.split()[-1]
+
+    return None
+
+def pooled(aux_root, locked):
+    """@returns list of check results of a run on the pool of fixture envs"""
+
+    descr = "locked" if locked else "pool"
+    runs_fpath = os.sep.join([aux_root, "runs_%s" % descr])
+
+    if locked:
+        open(lock_fpath(PORTS[1]), "a").close()
+
+    try:
+        _, trun = cij.selftest.run(
+            os.sep.join([aux_root, descr]), "parallel.plan", [
+                "--env-pool",
+                os.sep.join([cij.selftest.fixtures(), "env_pool.sh"])
+            ], runs_fpath
+        )
+        lock_left = os.path.exists(lock_fpath(PORTS[1]))
+    finally:
+        if locked and os.path.exists(lock_fpath(PORTS[1])):
+            os.remove(lock_fpath(PORTS[1]))
+
+    if trun is None:
+        cij.err("cijoe_runner_parallel: no trun.yml of run: %s" % descr)
+        return [False]
+
+    target = trun["targets"][0]
+    tsuites = trun["testsuites"]
+
+    checks = [
+        cij.selftest.expect(
+            "%s, runs" % descr, cij.selftest.runs(runs_fpath),
+            ["st_target.sh"] * len(tsuites)
+        ),
+        cij.selftest.expect(
+            "%s, tsuites" % descr, [ts["status"] for ts in tsuites],
+            ["PASS"] * len(tsuites)
+        ),
+        cij.selftest.expect(
+            "%s, ports of workers" % descr,
+            [port(ts["testcases"][0]) for ts in tsuites],
+            [PORTS[ts["worker"] % len(PORTS)] for ts in tsuites]
+        ),
+        cij.selftest.expect(
+            "%s, lock of target left" % descr, lock_left, locked
+        ),
+        cij.selftest.expect(
+            "%s, lock of env left" % descr,
+            os.path.exists(lock_fpath(PORTS[0])), False
+        )
+    ]
+
+    if locked:
+        checks += [
+            cij.selftest.expect("locked, target", target["status"], "FAIL"),
+            cij.selftest.expect(
+                "locked, target hooks",
+                [hook["rcode"] for hook in target["hooks"]["enter"] +
+                 target["hooks"]["exit"]], [1, None]
+            ),
+            cij.selftest.expect("locked, trun", trun["status"], "FAIL")
+        ]
+    else:
+        checks += [
+            cij.selftest.expect("pool, target", target["status"], "PASS"),
+            cij.selftest.expect(
+                "pool, target hooks",
+                [hook["rcode"] for hook in target["hooks"]["enter"] +
+                 target["hooks"]["exit"]], [0, 0]
+            ),
+            cij.selftest.expect(
+                "pool, ports used",
+                sorted(set(port(tc) for tc in cij.selftest.tcases(trun))),
+                PORTS
+            ),
+            cij.selftest.expect("pool, trun", trun["status"], "PASS")
+        ]
+
+    return checks
+
+def main():
+    """
+    @returns cij.test.PASS on success and cij.test.FAIL otherwise
+    """
+
+    aux_root = os.sep.join([cij.ENV.get("CIJ_TEST_RES_ROOT"), "_aux"])
+
+    checks = pooled(aux_root, False) + pooled(aux_root, True)
+
+    return cij.test.PASS if all(checks) else cij.test.FAIL
+
+if __name__ == "__main__":
+    cij.test.texit(rcode=main())
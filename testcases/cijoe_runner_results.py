@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+"""
+    Verify the result store, trun.db, of a run and aggregating across runs
+
+    The store must have a row per testcase with the results recorded in
+    trun.yml, and a row of the trun. Aggregating the stores of several runs,
+    given as output directories or paths to stores, must count the statuses
+    and the pass-rate, FLAKY counting as passing, of each testcase. A store
+    missing from an output is written from its trun.yml by cij_results --write
+"""
+import subprocess
+import sqlite3
+import sys
+import os
+import cij.selftest
+import cij.results
+import cij.test
+import cij
+cij.test.enter()
+
+COLUMNS = ["ident", "status", "rcode", "wallc", "attempts"]
+
+def rows(res_root, table, columns):
+    """
+    @returns the 'columns' of the rows of the 'table' of the store in
+    'res_root' ordered by the first column
+    """
+
+    conn = sqlite3.connect(cij.results.fpath(res_root))
+    try:
+        return [list(row) for row in conn.execute(
+            "SELECT %s FROM %s ORDER BY %s" % (
+                ", ".join(columns), table, columns[0]
+            )
+        )]
+    finally:
+        conn.close()
+
+def main():
+    """
+    @returns cij.test.PASS on success and cij.test.FAIL otherwise
+    """
+
+    aux_root = os.sep.join([cij.ENV.get("CIJ_TEST_RES_ROOT"), "_aux"])
+
+    res_roots = []
+    truns = []
+    for num in range(2):
+        res_root = os.sep.join([aux_root, "trun_%d" % num])
+        _, trun = cij.selftest.run(res_root, "retry.plan")
+        if trun is None:
+            cij.err("cijoe_runner_results: no trun.yml of run: %d" % num)
+            return cij.test.FAIL
+
+        res_roots.append(res_root)
+        truns.append(trun)
+
+    tcases = sorted(cij.selftest.tcases(truns[0]), key=lambda tc: tc["ident"])
+
+    checks = [
+        cij.selftest.expect(
+            "store, tcases", rows(res_roots[0], "tcases", COLUMNS),
+            [[tc[col] for col in COLUMNS] for tc in tcases]
+        ),
+        cij.selftest.expect(
+            "store, stamps", rows(
+                res_roots[0], "tcases", ["ident", "stamp_begin", "stamp_end"]
+            ),
+            [[tc["ident"], tc["stamp"]["begin"], tc["stamp"]["end"]]
+             for tc in tcases]
+        ),
+        cij.selftest.expect(
+            "store, trun", rows(res_roots[0], "trun", ["testplan", "status"]),
+            [[truns[0]["conf"]["TESTPLAN_NAME"], truns[0]["status"]]]
+        )
+    ]
+
+    stats = cij.results.aggregate([
+        res_roots[0], cij.results.fpath(res_roots[1]),
+        os.sep.join([aux_root, "missing"])
+    ])
+    checks.append(cij.selftest.expect(
+        "aggregate", dict(
+            (ident, (stat["runs"], stat["PASS"], stat["FAIL"],
+                     stat["FLAKY"], stat["pass_rate"]))
+            for ident, stat in stats.items()
+        ), {
+            "retry_0/st_pass.sh": (2, 2, 0, 0, 1.0),
+            "retry_0/st_flaky.sh": (2, 0, 0, 2, 1.0),
+            "retry_0/st_fail.sh": (2, 0, 2, 0, 0.0)
+        }
+    ))
+    checks.append(cij.selftest.expect(
+        "aggregate, match",
+        sorted(cij.results.aggregate(res_roots, "flaky")),
+        ["retry_0/st_flaky.sh"]
+    ))
+
+    expected = rows(res_roots[1], "tcases", COLUMNS)
+    os.remove(cij.results.fpath(res_roots[1]))
+
+    cmd = [
+        sys.executable,
+        os.sep.join([cij.ENV.get("CIJ_ROOT"), "bin", "cij_results"]),
+        "--write", res_roots[1]
+    ]
+    cij.emph("cijoe_runner_results: %r" % " ".join(cmd))
+    rcode = subprocess.call(cmd)
+
+    checks += [
+        cij.selftest.expect("write, rcode", rcode, 0),
+        cij.selftest.expect(
+            "write, tcases", rows(res_roots[1], "tcases", COLUMNS)
+            if os.path.exists(cij.results.fpath(res_roots[1])) else None,
+            expected
+        )
+    ]
+
+    return cij.test.PASS if all(checks) else cij.test.FAIL
+
+if __name__ == "__main__":
+    cij.test.texit(rcode=main())
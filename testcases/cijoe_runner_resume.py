@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+"""
+    Verify resumption of an interrupted run
+
+    The run is interrupted, by truncating its journal after the first
+    testcase completed and appending a partially written event, as when the
+    runner crashes mid-write, and removing its trun.yml. Resuming it must run
+    only the testcases which did not complete, materialize the trun.yml again
+    and leave a journal from which the completed run is replayed
+
+    A parallel run using the bashd executor, started with paths relative to
+    its working directory, is interrupted right after its setup and resumed
+    from another working directory, it must resume with the same setup
+"""
+import os
+import shutil
+import cij.selftest
+import cij.runner
+import cij.test
+import cij
+cij.test.enter()
+
+EXPECTED = [
+    ("first_0/st_pass.sh", "PASS"),
+    ("first_0/st_fail.sh", "FAIL"),
+    ("second_1/st_pass.sh", "PASS")
+]
+
+def interrupt(res_root, ident=None):
+    """
+    Truncate the journal after the tcase event of 'ident', or after the setup
+    of the trun when None, and drop trun.yml
+    """
+
+    fpath = cij.runner.journal_fpath(res_root)
+
+    with open(fpath) as jfile:
+        lines = jfile.readlines()
+
+    nlines = 1
+    if ident:
+        marker = '"ev": "tcase", "key": "%s"' % ident
+        nlines = [n for n, line in enumerate(lines) if marker in line][0] + 1
+
+    with open(fpath, "w") as jfile:
+        jfile.write("".join(lines[:nlines]))
+        jfile.write('{"ev": "tcase", "key": "first_0/st_f')
+
+    os.remove(cij.runner.yml_fpath(res_root))
+
+def statuses(trun):
+    """@returns list of the (ident, status) of the testcases of 'trun'"""
+
+    return [(tc["ident"], tc["status"]) for tc in cij.selftest.tcases(trun)]
+
+def serial(aux_root):
+    """@returns list of check results of resuming a serial run"""
+
+    res_root = os.sep.join([aux_root, "serial"])
+    runs_fpath = os.sep.join([aux_root, "runs_serial"])
+
+    _, trun = cij.selftest.run(res_root, "resume.plan")
+    if trun is None:
+        cij.err("cijoe_runner_resume: no trun.yml of the serial run")
+        return [False]
+
+    interrupt(res_root, "first_0/st_pass.sh")
+
+    _, trun = cij.selftest.resume(res_root, runs_fpath)
+    if trun is None:
+        cij.err("cijoe_runner_resume: no trun.yml of the resumed run")
+        return [False]
+
+    replayed = cij.runner.trun_from_journal(
+        cij.runner.journal_fpath(res_root)
+    )
+
+    return [
+        cij.selftest.expect(
+            "serial, runs", cij.selftest.runs(runs_fpath),
+            ["st_fail.sh", "st_pass.sh"]
+        ),
+        cij.selftest.expect("serial, tcases", statuses(trun), EXPECTED),
+        cij.selftest.expect("serial, status", trun["status"], "FAIL"),
+        cij.selftest.expect("replayed, tcases", statuses(replayed), EXPECTED),
+        cij.selftest.expect("replayed, status", replayed["status"], "FAIL")
+    ]
+
+def parallel(aux_root):
+    """@returns list of check results of resuming a parallel bashd run"""
+
+    res_root = os.sep.join([aux_root, "parallel"])
+    runs_fpath = os.sep.join([aux_root, "runs_parallel"])
+
+    if os.path.exists(res_root):
+        shutil.rmtree(res_root)
+
+    cij.selftest.runner([
+        os.sep.join(["testplans", "resume.plan"]), "env.sh",
+        "--output", res_root, "--jobs", "2", "--executor", "bashd"
+    ], cwd=cij.selftest.fixtures())
+    if not cij.runner.trun_exists(res_root):
+        cij.err("cijoe_runner_resume: no trun of the parallel run")
+        return [False]
+
+    interrupt(res_root)
+
+    _, trun = cij.selftest.resume(res_root, runs_fpath)
+    if trun is None:
+        cij.err("cijoe_runner_resume: no trun.yml of the resumed run")
+        return [False]
+
+    return [
+        cij.selftest.expect(
+            "parallel, runs", sorted(cij.selftest.runs(runs_fpath)),
+            ["st_fail.sh", "st_pass.sh", "st_pass.sh"]
+        ),
+        cij.selftest.expect("parallel, tcases", statuses(trun), EXPECTED),
+        cij.selftest.expect(
+            "parallel, conf (JOBS, EXECUTOR)",
+            (trun["conf"]["JOBS"], trun["conf"]["EXECUTOR"]), (2, "bashd")
+        ),
+        cij.selftest.expect(
+            "parallel, conf TESTPLAN_FPATH",
+            trun["conf"]["TESTPLAN_FPATH"], os.sep.join([
+                cij.selftest.fixtures(), "testplans", "resume.plan"
+            ])
+        )
+    ]
+
+def main():
+    """
+    @returns cij.test.PASS on success and cij.test.FAIL otherwise
+    """
+
+    aux_root = os.sep.join([cij.ENV.get("CIJ_TEST_RES_ROOT"), "_aux"])
+
+    checks = serial(aux_root) + parallel(aux_root)
+
+    return cij.test.PASS if all(checks) else cij.test.FAIL
+
+if __name__ == "__main__":
+    cij.test.texit(rcode=main())
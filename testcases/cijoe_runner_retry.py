@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+"""
+    Verify retries of testcases, with and without the result cache
+
+    A flaky testcase must pass on its retry instead of replaying the failure
+    of its first attempt from the cache, and failures must not be cached, such
+    that a second run with the same cache replays only the passes
+"""
+import os
+import cij.selftest
+import cij.test
+import cij
+cij.test.enter()
+
+def main():
+    """
+    @returns cij.test.PASS on success and cij.test.FAIL otherwise
+    """
+
+    aux_root = os.sep.join([cij.ENV.get("CIJ_TEST_RES_ROOT"), "_aux"])
+    cache = os.sep.join([aux_root, "cache"])
+    runs_fpath = os.sep.join([aux_root, "runs"])
+
+    checks = []
+    for rnum, expected in enumerate([
+            {
+                "st_pass.sh": ("PASS", 1, False),
+                "st_flaky.sh": ("FLAKY", 2, False),
+                "st_fail.sh": ("FAIL", 2, False),
+                "runs": ["st_pass.sh", "st_flaky.sh", "st_flaky.sh",
+                         "st_fail.sh", "st_fail.sh"]
+            },
+            {
+                "st_pass.sh": ("PASS", 1, True),
+                "st_flaky.sh": ("PASS", 1, True),
+                "st_fail.sh": ("FAIL", 2, False),
+                "runs": ["st_fail.sh", "st_fail.sh"]
+            }
+    ]):
+        if os.path.exists(runs_fpath):
+            os.remove(runs_fpath)
+
+        _, trun = cij.selftest.run(
+            os.sep.join([aux_root, "trun_%d" % rnum]), "retry.plan",
+            ["--cache", cache], runs_fpath
+        )
+        if trun is None:
+            cij.err("cijoe_runner_retry: no trun.yml of run: %d" % rnum)
+            return cij.test.FAIL
+
+        for name in ["st_pass.sh", "st_flaky.sh", "st_fail.sh"]:
+            tcase = cij.selftest.tcase(trun, name)
+            checks.append(cij.selftest.expect(
+                "run: %d, %s (status, attempts, cached)" % (rnum, name),
+                (tcase["status"], tcase["attempts"], tcase["cached"]),
+                expected[name]
+            ))
+
+        checks.append(cij.selftest.expect(
+            "run: %d, runs" % rnum,
+            cij.selftest.runs(runs_fpath), expected["runs"]
+        ))
+
+    return cij.test.PASS if all(checks) else cij.test.FAIL
+
+if __name__ == "__main__":
+    cij.test.texit(rcode=main())
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+"""
+    Verify the resource usage recorded for the scripts of a run
+
+    The bash executor records the full rusage of a script, the bashd executor
+    only its CPU-time, the remaining fields are None, in trun.yml as well as
+    in trun.db
+"""
+import sqlite3
+import os
+import cij.selftest
+import cij.results
+import cij.test
+import cij
+cij.test.enter()
+
+def main():
+    """
+    @returns cij.test.PASS on success and cij.test.FAIL otherwise
+    """
+
+    aux_root = os.sep.join([cij.ENV.get("CIJ_TEST_RES_ROOT"), "_aux"])
+
+    checks = []
+    for executor in ["bash", "bashd"]:
+        res_root = os.sep.join([aux_root, executor])
+
+        _, trun = cij.selftest.run(
+            res_root, "rusage.plan", ["--executor", executor]
+        )
+        if trun is None:
+            cij.err("cijoe_runner_rusage: no trun.yml of: %s" % executor)
+            return cij.test.FAIL
+
+        tcase = cij.selftest.tcase(trun, "st_busy.sh")
+        rusage = tcase["rusage"] or {}
+
+        conn = sqlite3.connect(cij.results.fpath(res_root))
+        try:
+            row = conn.execute(
+                "SELECT %s FROM tcases WHERE ident = ?" % ", ".join(
+                    cij.results.RUSAGE
+                ), (tcase["ident"],)
+            ).fetchone()
+        finally:
+            conn.close()
+
+        checks += [
+            cij.selftest.expect(
+                "%s, status" % executor, tcase["status"], "PASS"
+            ),
+            cij.selftest.expect(
+                "%s, cpu-time > 0.2" % executor,
+                (rusage.get("utime") or 0) + (rusage.get("stime") or 0) > 0.2,
+                True
+            ),
+            cij.selftest.expect(
+                "%s, fields recorded" % executor,
+                [key for key in cij.results.RUSAGE
+                 if rusage.get(key) is not None],
+                cij.results.RUSAGE if executor == "bash" else [
+                    "utime", "stime"
+                ]
+            ),
+            cij.selftest.expect(
+                "%s, trun.db" % executor, list(row or []),
+                [rusage.get(key) for key in cij.results.RUSAGE]
+            )
+        ]
+
+        if executor == "bash":
+            checks.append(cij.selftest.expect(
+                "bash, maxrss > 0", rusage.get("maxrss", 0) > 0, True
+            ))
+
+    return cij.test.PASS if all(checks) else cij.test.FAIL
+
+if __name__ == "__main__":
+    cij.test.texit(rcode=main())
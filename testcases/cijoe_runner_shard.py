@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+"""
+    Verify sharding of a run and merging the outputs of the shards
+
+    Each testcase must run in exactly one of the shards, and the merged
+    output must have the status of every testcase, none left UNKN, also of
+    testcases retried or timed out, with its log in the merged output, and
+    the progress counting each of them. The report cache of a shard must not
+    be merged
+"""
+import os
+import cij.selftest
+import cij.reporter
+import cij.test
+import cij
+cij.test.enter()
+
+NSHARDS = 2
+
+EXPECTED = {
+    "shard.plan": [
+        ("first_0/st_pass.sh", "PASS"),
+        ("first_0/st_fail.sh", "FAIL"),
+        ("second_1/st_pass.sh", "PASS"),
+        ("second_1/st_fail.sh", "FAIL"),
+        ("third_2/st_pass.sh", "PASS")
+    ],
+    "shard_status.plan": [
+        ("retry_0/st_pass.sh", "PASS"),
+        ("retry_0/st_flaky.sh", "FLAKY"),
+        ("timeout_1/st_hang.sh", "TIMEOUT"),
+        ("timeout_1/st_pass.sh", "PASS")
+    ]
+}
+
+def sharded(aux_root, plan):
+    """@returns list of check results of a sharded run of 'plan' merged"""
+
+    expected = EXPECTED[plan]
+
+    checks = []
+    shard_roots = []
+    ran = []
+    for shard in range(1, NSHARDS + 1):
+        shard_root = os.sep.join([aux_root, plan, "shard_%d" % shard])
+        runs_fpath = os.sep.join([aux_root, plan, "runs_%d" % shard])
+        if os.path.exists(runs_fpath):
+            os.remove(runs_fpath)
+
+        _, trun = cij.selftest.run(
+            shard_root, plan, ["--shard", "%d/%d" % (shard, NSHARDS)],
+            runs_fpath
+        )
+        if trun is None:
+            cij.err("cijoe_runner_shard: no trun.yml of %s, shard: %d" % (
+                plan, shard
+            ))
+            return [False]
+
+        shard_ran = [
+            tc["ident"] for tc in cij.selftest.tcases(trun)
+            if tc["status"] != "UNKN"
+        ]
+        checks.append(cij.selftest.expect(
+            "%s, shard: %d, runs" % (plan, shard),
+            len(cij.selftest.runs(runs_fpath)),
+            len(shard_ran) + shard_ran.count("retry_0/st_flaky.sh")
+        ))
+
+        os.makedirs(os.sep.join([shard_root, cij.reporter.CACHE_DNAME]))
+
+        shard_roots.append(shard_root)
+        ran += shard_ran
+
+    checks.append(cij.selftest.expect(
+        "%s, shards, tcases ran" % plan, sorted(ran),
+        sorted(ident for ident, _ in expected)
+    ))
+
+    merged_root = os.sep.join([aux_root, plan, "merged"])
+    rcode, trun = cij.selftest.merge(merged_root, shard_roots)
+    if trun is None:
+        cij.err("cijoe_runner_shard: no trun.yml of the merge of %s" % plan)
+        return [False]
+
+    tcases = cij.selftest.tcases(trun)
+    progress = dict((key, 0) for key in trun["progress"])
+    for _, status in expected:
+        progress[status] += 1
+
+    checks += [
+        cij.selftest.expect("%s, merge, rcode" % plan, rcode, 0),
+        cij.selftest.expect(
+            "%s, merged, tcases" % plan,
+            [(tc["ident"], tc["status"]) for tc in tcases], expected
+        ),
+        cij.selftest.expect(
+            "%s, merged, progress" % plan, trun["progress"], progress
+        ),
+        cij.selftest.expect(
+            "%s, merged, status" % plan, trun["status"], "FAIL"
+        ),
+        cij.selftest.expect(
+            "%s, merged, logs" % plan,
+            [os.path.exists(tc["log_fpath"]) for tc in tcases],
+            [True] * len(expected)
+        ),
+        cij.selftest.expect(
+            "%s, merged, report cache" % plan, os.path.exists(
+                os.sep.join([merged_root, cij.reporter.CACHE_DNAME])
+            ), False
+        )
+    ]
+
+    return checks
+
+def main():
+    """
+    @returns cij.test.PASS on success and cij.test.FAIL otherwise
+    """
+
+    aux_root = os.sep.join([cij.ENV.get("CIJ_TEST_RES_ROOT"), "_aux"])
+
+    checks = []
+    for plan in sorted(EXPECTED):
+        checks += sharded(aux_root, plan)
+
+    return cij.test.PASS if all(checks) else cij.test.FAIL
+
+if __name__ == "__main__":
+    cij.test.texit(rcode=main())
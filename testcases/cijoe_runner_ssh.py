@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+"""
+    Verify multiplexing the SSH connections of a run over a control socket
+
+    There being no sshd to connect to, the fixture 'ssh' stands in for ssh,
+    recording its arguments, and creates the control socket as a master
+    connection would. The testcases of a run, with either executor, must use
+    the same control socket, in a directory created for the run, the
+    connection of which must be stopped, and the directory removed, when
+    exiting the run. The same for cij.ssh.command() and control_start() and
+    control_stop() of cij.ssh
+"""
+import os
+import cij.selftest
+import cij.ssh
+import cij.test
+import cij
+cij.test.enter()
+
+def ssh_log(fpath):
+    """@returns list of the arguments of each call of the fixture ssh"""
+
+    if not os.path.exists(fpath):
+        return []
+
+    with open(fpath) as log_fd:
+        return [line.split() for line in log_fd]
+
+def control_path(tcase):
+    """@returns the SSH_CONTROL_PATH logged by the st_ssh.sh testcase"""
+
+    with open(tcase["log_fpath"]) as log_fd:
+        for line in log_fd:
+            if line.startswith("st_ssh.sh: SSH_CONTROL_PATH: "):
+                return line.split()[-1]
+
+    return None
+
+def mux_args(path):
+    """@returns the ssh arguments multiplexing over the socket at 'path'"""
+
+    return [
+        "-o", "ControlMaster=auto", "-o", "ControlPath=%s" % path,
+        "-o", "ControlPersist=%s" % cij.ssh.CONTROL_PERSIST
+    ]
+
+def run(aux_root, executor, log_fpath):
+    """@returns list of check results of a run of ssh.plan by 'executor'"""
+
+    if os.path.exists(log_fpath):
+        os.remove(log_fpath)
+
+    _, trun = cij.selftest.run(
+        os.sep.join([aux_root, executor]), "ssh.plan",
+        ["--executor", executor]
+    )
+    if trun is None:
+        cij.err("cijoe_runner_ssh: no trun.yml of: %s" % executor)
+        return [False]
+
+    tcases = cij.selftest.tcases(trun)
+    paths = [control_path(tc) for tc in tcases]
+    dpath = os.path.dirname(paths[0] or "")
+
+    return [
+        cij.selftest.expect(
+            "%s, tcases" % executor, [tc["status"] for tc in tcases],
+            ["PASS"] * len(tcases)
+        ),
+        cij.selftest.expect(
+            "%s, control path" % executor,
+            [os.path.basename(path or "") for path in paths],
+            ["%C"] * len(tcases)
+        ),
+        cij.selftest.expect(
+            "%s, ssh calls" % executor, ssh_log(log_fpath), [
+                ["-p", "22"] + mux_args(paths[0]) + ["root@127.0.0.1", "true"]
+            ] * len(tcases) + [[
+                "-o", "ControlPath=%s" % os.sep.join([dpath, "cij"]),
+                "-O", "exit", "cij"
+            ]]
+        ),
+        cij.selftest.expect(
+            "%s, control dir removed" % executor, os.path.exists(dpath),
+            False
+        )
+    ]
+
+def library(log_fpath):
+    """@returns list of check results of the control socket by cij.ssh"""
+
+    if os.path.exists(log_fpath):
+        os.remove(log_fpath)
+
+    cij.ENV["SSH_HOST"] = "127.0.0.1"
+    cij.ENV["SSH_USER"] = "root"
+
+    dpath = cij.ssh.control_start()
+    if dpath is None:
+        cij.err("cijoe_runner_ssh: control_start() did not start")
+        return [False]
+
+    path = cij.ENV.get("SSH_CONTROL_PATH")
+    rcode, _, _ = cij.ssh.command(["true"], shell=False, echo=False)
+
+    checks = [
+        cij.selftest.expect("library, control path", path, os.sep.join([
+            dpath, "%C"
+        ])),
+        cij.selftest.expect("library, command rcode", rcode, 0),
+        cij.selftest.expect(
+            "library, started once", cij.ssh.control_start(), None
+        ),
+        cij.selftest.expect(
+            "library, stopped", cij.ssh.control_stop(dpath), 1
+        ),
+        cij.selftest.expect(
+            "library, ssh calls", ssh_log(log_fpath), [
+                ["-p", "22"] + mux_args(path) + ["root@127.0.0.1", "'true'"],
+                [
+                    "-o", "ControlPath=%s" % os.sep.join([dpath, "cij"]),
+                    "-O", "exit", "cij"
+                ]
+            ]
+        ),
+        cij.selftest.expect(
+            "library, control dir removed", os.path.exists(dpath), False
+        ),
+        cij.selftest.expect(
+            "library, control path unset", "SSH_CONTROL_PATH" in cij.ENV,
+            False
+        )
+    ]
+
+    return checks
+
+def main():
+    """
+    @returns cij.test.PASS on success and cij.test.FAIL otherwise
+    """
+
+    aux_root = os.sep.join([cij.ENV.get("CIJ_TEST_RES_ROOT"), "_aux"])
+    if not os.path.exists(aux_root):
+        os.makedirs(aux_root)
+    log_fpath = os.sep.join([aux_root, "ssh.log"])
+
+    cij.ENV["PATH"] = os.pathsep.join([
+        os.sep.join([cij.selftest.fixtures(), "bin"]), cij.ENV.get("PATH")
+    ])
+    cij.ENV["SELFTEST_SSH_LOG"] = log_fpath
+    cij.ENV["SSH_CMD_TIME"] = "0"
+    cij.ENV["SSH_PORT"] = "22"
+    cij.ENV.pop("SSH_CONTROL_PATH", None)   # That of the runner running this
+
+    checks = []
+    for executor in ["bash", "bashd"]:
+        checks += run(aux_root, executor, log_fpath)
+    checks += library(log_fpath)
+
+    return cij.test.PASS if all(checks) else cij.test.FAIL
+
+if __name__ == "__main__":
+    cij.test.texit(rcode=main())
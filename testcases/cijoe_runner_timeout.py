@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+"""
+    Verify timeouts of testcases and the elapsed budgets of testsuites and
+    of the trun
+
+    A hanging testcase is killed at its timeout and the run continues, a
+    retry after a timeout runs anew and its pass is cached, and a spent
+    budget kills the running testcase and leaves the rest of the testsuite,
+    or trun, not run
+
+    A testcase is TIMEOUT when one of its hooks times out, and it is not
+    retried when the budget is spent
+"""
+import os
+import cij.selftest
+import cij.test
+import cij
+cij.test.enter()
+
+def main():
+    """
+    @returns cij.test.PASS on success and cij.test.FAIL otherwise
+    """
+
+    aux_root = os.sep.join([cij.ENV.get("CIJ_TEST_RES_ROOT"), "_aux"])
+    cache = os.sep.join([aux_root, "cache"])
+
+    checks = []
+    for rnum, (plan, expected) in enumerate([
+            ("timeout.plan", {
+                ("tcase", "st_hang.sh"): ("TIMEOUT", True),
+                ("tcase", "st_pass.sh"): ("PASS", False),
+                ("retry", "st_flaky_hang.sh"): ("FLAKY", False),
+                ("tsuite", "st_hang.sh"): ("TIMEOUT", True),
+                ("tsuite", "st_pass.sh"): ("UNKN", False),
+            }),
+            ("timeout.plan", {
+                ("retry", "st_flaky_hang.sh"): ("PASS", False),
+            }),
+            ("budget.plan", {
+                ("first", "st_hang.sh"): ("TIMEOUT", True),
+                ("second", "st_pass.sh"): ("UNKN", False),
+            })
+    ]):
+        rcode, trun = cij.selftest.run(
+            os.sep.join([aux_root, "trun_%d" % rnum]), plan,
+            ["--cache", cache]
+        )
+        if trun is None:
+            cij.err("cijoe_runner_timeout: no trun.yml of run: %d" % rnum)
+            return cij.test.FAIL
+
+        checks.append(cij.selftest.expect(
+            "run: %d, rcode > 0" % rnum, rcode > 0, True
+        ))
+        checks.append(cij.selftest.expect(            # e.g. lock released
+            "run: %d, rcode of trun exit-hooks" % rnum,
+            [hook["rcode"] for hook in trun["hooks"]["exit"]], [0]
+        ))
+
+        for (tsuite_name, fname), status in sorted(expected.items()):
+            tcase = cij.selftest.tcase(trun, fname, tsuite_name)
+            checks.append(cij.selftest.expect(
+                "run: %d, %s/%s (status, killed)" % (rnum, tsuite_name, fname),
+                (tcase["status"], 1.5 < (tcase["wallc"] or 0) < 10),
+                status
+            ))
+
+    runs_fpath = os.sep.join([aux_root, "runs_hooks"])
+    _, trun = cij.selftest.run(
+        os.sep.join([aux_root, "trun_hooks"]), "hooks.plan", None, runs_fpath
+    )
+    if trun is None:
+        cij.err("cijoe_runner_timeout: no trun.yml of run: hooks")
+        return cij.test.FAIL
+
+    for tsuite_name, expected in [
+            ("enter", ("TIMEOUT", 2)),
+            ("exit", ("TIMEOUT", 1)),
+            ("budget", ("TIMEOUT", 1))
+    ]:
+        tcase = cij.selftest.tcase(trun, "st_pass.sh", tsuite_name)
+        checks.append(cij.selftest.expect(
+            "hooks, %s (status, attempts)" % tsuite_name,
+            (tcase["status"], tcase["attempts"]), expected
+        ))
+
+    checks.append(cij.selftest.expect(
+        "hooks, runs", cij.selftest.runs(runs_fpath), [
+            "st_slowin_enter.sh", "st_slowin_enter.sh",
+            "st_pass.sh", "st_slowout_exit.sh",
+            "st_slowin_enter.sh"
+        ]
+    ))
+
+    return cij.test.PASS if all(checks) else cij.test.FAIL
+
+if __name__ == "__main__":
+    cij.test.texit(rcode=main())
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+"""
+    Verify the timeline of a run written in the Chrome trace format
+
+    The trace must have a span of the trun, enclosing the spans of its
+    testsuites, testcases and hooks, a span per attempt of a retried
+    testcase, and, for a parallel run, a track per worker carrying the
+    testsuites run by that worker and the hooks of the targets on the main
+    track
+"""
+import json
+import os
+import cij.selftest
+import cij.test
+import cij
+cij.test.enter()
+
+def trace_load(fpath):
+    """@returns the events of the trace in 'fpath', None when unreadable"""
+
+    try:
+        with open(fpath) as trace_fd:
+            return json.load(trace_fd)["traceEvents"]
+    except (IOError, OSError, ValueError, KeyError) as exc:
+        cij.err("cijoe_runner_trace: invalid trace: %r" % exc)
+
+    return None
+
+def spans(events, cat):
+    """@returns the spans of the given category"""
+
+    return [ev for ev in events if ev["ph"] == "X" and ev["cat"] == cat]
+
+def enclosed(events):
+    """@returns True when the span of the trun encloses all other spans"""
+
+    trun = spans(events, "trun")[0]
+    end = trun["ts"] + trun["dur"]
+
+    return all(
+        trun["ts"] <= ev["ts"] and ev["ts"] + ev["dur"] <= end
+        for ev in events if ev["ph"] == "X"
+    )
+
+def serial(aux_root):
+    """@returns list of check results of the trace of a serial run"""
+
+    trace_fpath = os.sep.join([aux_root, "serial.json"])
+    _, trun = cij.selftest.run(
+        os.sep.join([aux_root, "serial"]), "retry.plan",
+        ["--trace", trace_fpath]
+    )
+    events = trace_load(trace_fpath) if trun else None
+    if events is None:
+        cij.err("cijoe_runner_trace: no trace of the serial run")
+        return [False]
+
+    return [
+        cij.selftest.expect(
+            "serial, trun", [ev["name"] for ev in spans(events, "trun")
+                             if ev["name"] == "trun"], ["trun"]
+        ),
+        cij.selftest.expect(
+            "serial, tsuites", [ev["name"] for ev in spans(events, "tsuite")],
+            [ts["ident"] for ts in trun["testsuites"]]
+        ),
+        cij.selftest.expect(
+            "serial, tcases",
+            [(ev["name"], ev["args"]["status"])
+             for ev in spans(events, "tcase")],
+            [(tc["ident"], tc["status"]) for tc in cij.selftest.tcases(trun)]
+        ),
+        cij.selftest.expect(
+            "serial, attempts",
+            [(ev["name"], ev["args"]["status"])
+             for ev in spans(events, "attempt")], [
+                 ("retry_0/st_flaky.sh #1", "FAIL"),
+                 ("retry_0/st_flaky.sh #2", "PASS"),
+                 ("retry_0/st_fail.sh #1", "FAIL"),
+                 ("retry_0/st_fail.sh #2", "FAIL")
+             ]
+        ),
+        cij.selftest.expect(
+            "serial, tracks",
+            sorted(set(ev["tid"] for ev in events)), [0]
+        ),
+        cij.selftest.expect("serial, enclosed", enclosed(events), True)
+    ]
+
+def parallel(aux_root):
+    """@returns list of check results of the trace of a parallel run"""
+
+    trace_fpath = os.sep.join([aux_root, "parallel.json"])
+    _, trun = cij.selftest.run(
+        os.sep.join([aux_root, "parallel"]), "parallel.plan", [
+            "--env-pool",
+            os.sep.join([cij.selftest.fixtures(), "env_pool.sh"]),
+            "--trace", trace_fpath
+        ]
+    )
+    events = trace_load(trace_fpath) if trun else None
+    if events is None:
+        cij.err("cijoe_runner_trace: no trace of the parallel run")
+        return [False]
+
+    workers = sorted(set(ts["worker"] for ts in trun["testsuites"]))
+
+    return [
+        cij.selftest.expect(
+            "parallel, tsuite tracks",
+            [(ev["name"], ev["tid"]) for ev in spans(events, "tsuite")],
+            [(ts["ident"], ts["worker"] + 1) for ts in trun["testsuites"]]
+        ),
+        cij.selftest.expect(
+            "parallel, track names",
+            [ev["args"]["name"] for ev in events
+             if ev["name"] == "thread_name"],
+            ["main"] + ["worker %d" % worker for worker in workers]
+        ),
+        cij.selftest.expect(
+            "parallel, targets",
+            [(ev["name"], ev["tid"]) for ev in spans(events, "target")], [
+                (tg["ident"] + suffix, 0) for tg in trun["targets"]
+                for suffix in ["", ":enter", ":exit"]
+            ]
+        ),
+        cij.selftest.expect(
+            "parallel, lock hooks of trun and target",
+            [(ev["name"], ev["tid"]) for ev in spans(events, "hook")
+             if "lock_" in ev["name"]],
+            [("hook_lock_enter.sh", 0)] * 2 + [("hook_lock_exit.sh", 0)] * 2
+        ),
+        cij.selftest.expect("parallel, enclosed", enclosed(events), True)
+    ]
+
+def main():
+    """
+    @returns cij.test.PASS on success and cij.test.FAIL otherwise
+    """
+
+    aux_root = os.sep.join([cij.ENV.get("CIJ_TEST_RES_ROOT"), "_aux"])
+    if not os.path.exists(aux_root):
+        os.makedirs(aux_root)
+
+    checks = serial(aux_root) + parallel(aux_root)
+
+    return cij.test.PASS if all(checks) else cij.test.FAIL
+
+if __name__ == "__main__":
+    cij.test.texit(rcode=main())
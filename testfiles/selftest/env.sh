@@ -0,0 +1,9 @@
+#!/usr/bin/env bash
+#
+# Environment of the selftest fixtures, the fixture testcases run locally
+#
+# SSH_HOST differs from envs/localhost.sh such that the lock taken by the
+# runner of the fixtures does not collide with the lock of the selftest itself
+#
+export SSH_HOST=127.0.0.1
+export SSH_USER=root
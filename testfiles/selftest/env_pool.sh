@@ -0,0 +1,9 @@
+#!/usr/bin/env bash
+#
+# Second environment of the selftest fixtures, for a pool of envs
+#
+# SSH_PORT differs from env.sh such that the two targets take distinct locks
+#
+export SSH_HOST=127.0.0.1
+export SSH_PORT=2222
+export SSH_USER=root
@@ -0,0 +1 @@
+../../../hooks/lock_enter.sh
\ No newline at end of file
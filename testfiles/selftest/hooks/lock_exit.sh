@@ -0,0 +1 @@
+../../../hooks/lock_exit.sh
\ No newline at end of file
@@ -0,0 +1,6 @@
+#!/usr/bin/env bash
+#
+# Does nothing, as a hook of testcases, but record that it ran
+#
+[[ -n "$SELFTEST_RUNS" ]] && echo "st_noop_enter.sh" >> "$SELFTEST_RUNS"
+exit 0
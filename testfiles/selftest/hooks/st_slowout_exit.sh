@@ -0,0 +1,7 @@
+#!/usr/bin/env bash
+#
+# Hangs, as a hook of testcases, until killed
+#
+[[ -n "$SELFTEST_RUNS" ]] && echo "st_slowout_exit.sh" >> "$SELFTEST_RUNS"
+sleep 60
+exit 0
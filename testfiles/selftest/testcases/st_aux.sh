@@ -0,0 +1,10 @@
+#!/usr/bin/env bash
+#
+# Produces more auxiliary files in a directory than are listed in reports
+#
+[[ -n "$SELFTEST_RUNS" ]] && echo "st_aux.sh" >> "$SELFTEST_RUNS"
+mkdir -p "$CIJ_TEST_RES_ROOT/_aux/many" || exit 1
+for num in $(seq 1 150); do
+  echo "st_aux.sh: file: $num" > "$CIJ_TEST_RES_ROOT/_aux/many/file_$num.txt"
+done
+exit 0
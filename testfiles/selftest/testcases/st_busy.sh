@@ -0,0 +1,9 @@
+#!/usr/bin/env bash
+#
+# Passes, after spending about half a second of CPU-time
+#
+[[ -n "$SELFTEST_RUNS" ]] && echo "st_busy.sh" >> "$SELFTEST_RUNS"
+for ((i = 0; i < 300000; ++i)); do
+  :
+done
+exit 0
@@ -0,0 +1,6 @@
+#!/usr/bin/env bash
+#
+# Fails
+#
+[[ -n "$SELFTEST_RUNS" ]] && echo "st_fail.sh" >> "$SELFTEST_RUNS"
+exit 1
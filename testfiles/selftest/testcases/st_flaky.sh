@@ -0,0 +1,10 @@
+#!/usr/bin/env bash
+#
+# Fails the first time it runs in a result directory, passes when retried
+#
+[[ -n "$SELFTEST_RUNS" ]] && echo "st_flaky.sh" >> "$SELFTEST_RUNS"
+if [[ ! -f "$CIJ_TEST_RES_ROOT/st_flaky.marker" ]]; then
+  touch "$CIJ_TEST_RES_ROOT/st_flaky.marker"
+  exit 1
+fi
+exit 0
@@ -0,0 +1,10 @@
+#!/usr/bin/env bash
+#
+# Hangs the first time it runs in a result directory, passes when retried
+#
+[[ -n "$SELFTEST_RUNS" ]] && echo "st_flaky_hang.sh" >> "$SELFTEST_RUNS"
+if [[ ! -f "$CIJ_TEST_RES_ROOT/st_flaky_hang.marker" ]]; then
+  touch "$CIJ_TEST_RES_ROOT/st_flaky_hang.marker"
+  sleep 60
+fi
+exit 0
@@ -0,0 +1,7 @@
+#!/usr/bin/env bash
+#
+# Hangs, until killed by the watchdog of the runner
+#
+[[ -n "$SELFTEST_RUNS" ]] && echo "st_hang.sh" >> "$SELFTEST_RUNS"
+sleep 60
+exit 0
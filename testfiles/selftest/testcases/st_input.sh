@@ -0,0 +1,6 @@
+#!/usr/bin/env bash
+#
+# Passes when the file at $SELFTEST_INPUT contains "pass"
+#
+[[ -n "$SELFTEST_RUNS" ]] && echo "st_input.sh" >> "$SELFTEST_RUNS"
+grep -q "pass" "$SELFTEST_INPUT"
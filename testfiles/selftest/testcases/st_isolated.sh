@@ -0,0 +1,13 @@
+#!/usr/bin/env bash
+#
+# Passes when nothing leaked from st_leak.sh, that is, it has the env, the
+# evars of the testplan and runs in its result directory, exits with the
+# number of the failed check otherwise
+#
+[[ -n "$SELFTEST_RUNS" ]] && echo "st_isolated.sh" >> "$SELFTEST_RUNS"
+[[ -z "$SELFTEST_LEAK" ]] || exit 11
+declare -F selftest_leak > /dev/null && exit 12
+[[ "$SSH_HOST" == "127.0.0.1" ]] || exit 13
+[[ "$PWD" == "$CIJ_TEST_RES_ROOT" ]] || exit 14
+[[ "$SELFTEST_EVAR" == "tsuite" ]] || exit 15
+exit 0
@@ -0,0 +1,13 @@
+#!/usr/bin/env bash
+#
+# Changes the environment, the working directory and defines a function,
+# none of which may leak into other testcases, and exits with 3
+#
+[[ -n "$SELFTEST_RUNS" ]] && echo "st_leak.sh" >> "$SELFTEST_RUNS"
+export SELFTEST_LEAK=1
+export SSH_HOST=leaked
+selftest_leak() {
+  :
+}
+cd / || exit 1
+exit 3
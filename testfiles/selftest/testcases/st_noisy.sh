@@ -0,0 +1,9 @@
+#!/usr/bin/env bash
+#
+# Logs lines with ANSI escape-sequences and control characters, then fails
+#
+[[ -n "$SELFTEST_RUNS" ]] && echo "st_noisy.sh" >> "$SELFTEST_RUNS"
+for num in $(seq 1 100); do
+  printf '\033[0;31mst_noisy.sh: line: %d\001\033[0m\n' "$num"
+done
+exit 1
@@ -0,0 +1,6 @@
+#!/usr/bin/env bash
+#
+# Passes
+#
+[[ -n "$SELFTEST_RUNS" ]] && echo "st_pass.sh" >> "$SELFTEST_RUNS"
+exit 0
@@ -0,0 +1,7 @@
+#!/usr/bin/env bash
+#
+# Runs a command over SSH, logging the control socket of the connection
+#
+[[ -n "$SELFTEST_RUNS" ]] && echo "st_ssh.sh" >> "$SELFTEST_RUNS"
+echo "st_ssh.sh: SSH_CONTROL_PATH: $SSH_CONTROL_PATH"
+ssh::cmd "true"
@@ -0,0 +1,9 @@
+#!/usr/bin/env bash
+#
+# Passes, logging the SSH_PORT of the env it runs with, taking a second such
+# that the testsuites of a parallel run are spread over the workers
+#
+[[ -n "$SELFTEST_RUNS" ]] && echo "st_target.sh" >> "$SELFTEST_RUNS"
+echo "st_target.sh: SSH_PORT: ${SSH_PORT:-22}"
+sleep 1
+exit 0